@@ -0,0 +1,59 @@
+import time
+import asyncio
+import argparse
+import logging
+from agent.memory_manager import AsyncMemoryManager
+
+logging.basicConfig(level=logging.WARNING)
+
+QUERIES = ["Who am I?", "What did we agree on yesterday?", "Which server hosts the database?",
+           "When is the next release?", "What is the project code name?"]
+
+async def loop_lag(stop: asyncio.Event, tick: float = 0.01):
+    """Worst delay of a 10ms timer: how long the loop was blocked."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        worst = max(worst, time.perf_counter() - start - tick)
+    return worst
+
+async def measure(name, run_all, total):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    await run_all()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    print(f"{name:18s} {total / elapsed:8.1f} recalls/s  max loop stall {lag * 1000:8.1f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent arecall vs blocking recall inside the event loop.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    memory = AsyncMemoryManager()
+    total = args.concurrency * args.rounds
+    queries = [f"{QUERIES[i % len(QUERIES)]} #{i}" for i in range(total)]  # distinct, so the cache doesn't help
+    await memory.arecall("warmup")
+
+    async def sync_recalls():
+        for q in queries:
+            memory.recall(q)
+
+    async def async_recalls():
+        sem = asyncio.Semaphore(args.concurrency)
+        async def one(q):
+            async with sem:
+                await memory.arecall(q)
+        await asyncio.gather(*(one(q) for q in queries))
+
+    print(f"\n--- Memory Concurrency Benchmark ({total} recalls) ---")
+    await measure("blocking recall", sync_recalls, total)
+    await measure("async arecall", async_recalls, total)
+    await memory.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -85,6 +85,12 @@ class BrowserTool:
         await self.page.screenshot(path=path)
         return f"Screenshot saved to {path}"
 
+    async def capture_frame(self, quality: int = 70, clip: dict = None) -> bytes:
+        """JPEG screenshot for vision models; `clip` ({x, y, width, height}) limits it to a region."""
+        if not self.page:
+            await self.start()
+        return await self.page.screenshot(type="jpeg", quality=quality, scale="css", clip=clip)
+
     async def stop(self):
         if self.context:
             await self.context.close()
@@ -3,7 +3,7 @@ import logging
 import signal
 import sys
 from agent.model_manager import ModelManager
-from agent.memory_manager import MemoryManager
+from agent.memory_manager import AsyncMemoryManager
 from agent.browser_tool import BrowserTool
 
 # Configure Logging
@@ -13,7 +13,7 @@ logger = logging.getLogger("SensoryAgent")
 class SensoryAgent:
     def __init__(self):
         self.model_manager = ModelManager()
-        self.memory_manager = MemoryManager()
+        self.memory_manager = AsyncMemoryManager()
         self.browser_tool = BrowserTool(headless=False) # Helper for visualization
         self.llm = self.model_manager.get_llm()
         self.running = True
@@ -32,7 +32,7 @@ class SensoryAgent:
                 logger.info("Agent heartbeat...")
                 
                 # Example: Check memory
-                # memories = self.memory_manager.recall("Who am I?")
+                # memories = await self.memory_manager.arecall("Who am I?")
                 
                 await asyncio.sleep(10)
         except asyncio.CancelledError:
@@ -43,6 +43,8 @@ class SensoryAgent:
     async def shutdown(self):
         logger.info("Shutting down agent...")
         await self.browser_tool.stop()
+        # Flush batched activity rows and release DB connections
+        await self.memory_manager.aclose()
         logger.info("Shutdown complete.")
 
 def handle_exit(sig, frame):
@@ -2,13 +2,19 @@ import os
 import yaml
 import logging
 import json
+import time
+import queue
+import asyncio
+import threading
 from datetime import datetime
 from sqlalchemy import create_engine, text, Column, Integer, String, DateTime, JSON
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.dialects.postgresql import JSONB
 from langchain_postgres.vectorstores import PGVector
 from langchain_ollama import OllamaEmbeddings
 from pathlib import Path
+from services.memory.embedding_cache import EmbeddingCache, CachedEmbeddings
 
 logger = logging.getLogger("MemoryManager")
 Base = declarative_base()
@@ -21,6 +27,122 @@ class ActivityLog(Base):
     details = Column(JSONB)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class ActivityLogWriter:
+    """
+    Background writer for ActivityLog rows.
+
+    `submit` only enqueues; a writer thread drains the bounded queue and inserts
+    whole batches with one multi-row INSERT when `batch_size` rows are pending or
+    `flush_interval` seconds have passed. When the queue is full, `submit` waits
+    up to `enqueue_timeout` on the caller's thread (backpressure) and then drops
+    the event; both cases are counted. Otherwise it never blocks. `close()`
+    flushes whatever is left.
+    """
+    def __init__(self, engine, batch_size=100, flush_interval=1.0, max_queue=10000, enqueue_timeout=0.05):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.overflows = 0
+        self._stats_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ActivityLogWriter", daemon=True)
+        self._thread.start()
+
+    def _count(self, name, n=1):
+        # Called from many producer threads and the writer thread
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def submit(self, action: str, status: str, details: dict = None) -> bool:
+        """Queues a row. Blocks for at most `enqueue_timeout`, and only when the queue is full."""
+        if self._closed.is_set():
+            self._count("dropped")
+            return False
+        row = {"action": action, "status": status, "details": details or {}, "timestamp": datetime.utcnow()}
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self._count("overflows")
+        try:
+            self.queue.put(row, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None: # close() sentinel
+                    self._write(batch)
+                    self._drain()
+                    return
+                batch.append(row)
+            self._write(batch)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                row = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(ActivityLog.__table__.insert(), batch)
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            self._count("failed", len(batch))
+            logger.error(f"Failed to write {len(batch)} activity rows: {e}")
+
+    def close(self, timeout: float = 10.0):
+        """Stops accepting events and waits for the queue to be flushed."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        while self._thread.is_alive():
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queued": self.queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "overflows": self.overflows,
+            }
+
 class MemoryManager:
     def __init__(self, config_path: str = "config.yaml"):
         self.config = self._load_config(config_path)
@@ -32,8 +154,14 @@ class MemoryManager:
         
         # Initialize Vector Store
         self.embedding_model = self._get_embedding_model(mem_config)
+        # recall() embeds every query through Ollama; cache them (LRU + optional SQLite file)
+        self.embedding_cache = EmbeddingCache(
+            namespace=f"ollama:{mem_config.get('embedding_model', 'nomic-embed-text')}",
+            max_entries=mem_config.get("embedding_cache_size", 10000),
+            disk_path=os.getenv("EMBEDDING_CACHE_PATH", mem_config.get("embedding_cache_path"))
+        )
         self.vector_store = PGVector(
-            embeddings=self.embedding_model,
+            embeddings=CachedEmbeddings(self.embedding_model, self.embedding_cache),
             collection_name="memories",
             connection=self.db_url,
             use_jsonb=True,
@@ -41,6 +169,14 @@ class MemoryManager:
         
         self._init_db()
 
+        self.activity_writer = ActivityLogWriter(
+            self.engine,
+            batch_size=mem_config.get("activity_batch_size", 100),
+            flush_interval=mem_config.get("activity_flush_interval", 1.0),
+            max_queue=mem_config.get("activity_queue_size", 10000),
+            enqueue_timeout=mem_config.get("activity_enqueue_timeout", 0.05),
+        )
+
     def _load_config(self, path: str) -> dict:
         try:
             p = Path(path)
@@ -77,21 +213,22 @@ class MemoryManager:
             logger.error(f"Database initialization failed: {e}")
 
     def log_activity(self, action: str, status: str, details: dict = None):
-        session = self.Session()
-        try:
-            log_entry = ActivityLog(
-                action=action,
-                status=status,
-                details=details or {}
-            )
-            session.add(log_entry)
-            session.commit()
-            logger.info(f"Activity logged: {action} - {status}")
-        except Exception as e:
-            logger.error(f"Failed to log activity: {e}")
-            session.rollback()
-        finally:
-            session.close()
+        """
+        Queues an activity row; it is written in the next batch. Never waits on
+        Postgres; only waits (up to activity_enqueue_timeout) when the queue is full.
+        """
+        if self.activity_writer.submit(action, status, details):
+            logger.debug(f"Activity queued: {action} - {status}")
+        else:
+            logger.warning(f"Activity dropped (queue full): {action} - {status}")
+
+    def activity_stats(self) -> dict:
+        return self.activity_writer.stats()
+
+    def close(self):
+        """Flushes pending activity rows; call before the process exits."""
+        self.activity_writer.close()
+        logger.info(f"Activity log flushed: {self.activity_writer.stats()}")
 
     def store_memory(self, text: str, metadata: dict = None):
         """Stores a semantic memory"""
@@ -100,3 +237,62 @@ class MemoryManager:
     def recall(self, query: str, k: int = 4):
         """Recalls memories based on semantic similarity"""
         return self.vector_store.similarity_search(query, k=k)
+
+    def embedding_cache_stats(self) -> dict:
+        return self.embedding_cache.stats()
+
+def _async_db_url(url: str) -> str:
+    """Same database, async driver (psycopg 3, which PGVector's async mode expects)."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+class AsyncMemoryManager(MemoryManager):
+    """
+    MemoryManager with native asyncio variants for the SensoryAgent loop.
+
+    `arecall`/`astore_memory` go through an async SQLAlchemy engine (own pool,
+    sized by memory.async_pool_size / async_max_overflow) and PGVector in
+    async_mode, with embeddings fetched via aembed_*; many calls can be in
+    flight at once without blocking the loop. The sync API keeps working.
+    """
+    def __init__(self, config_path: str = "config.yaml"):
+        super().__init__(config_path)
+        mem_config = self.config.get("memory", {})
+
+        self.async_engine = create_async_engine(
+            _async_db_url(self.db_url),
+            pool_size=mem_config.get("async_pool_size", 10),
+            max_overflow=mem_config.get("async_max_overflow", 20),
+            pool_timeout=mem_config.get("async_pool_timeout", 30),
+            pool_recycle=mem_config.get("async_pool_recycle", 1800),
+            pool_pre_ping=True,
+        )
+        self.async_vector_store = PGVector(
+            embeddings=CachedEmbeddings(self.embedding_model, self.embedding_cache),
+            collection_name="memories",
+            connection=self.async_engine,
+            use_jsonb=True,
+            async_mode=True,
+        )
+
+    async def astore_memory(self, text: str, metadata: dict = None):
+        """Stores a semantic memory"""
+        return await self.async_vector_store.aadd_texts([text], metadatas=[metadata or {}])
+
+    async def arecall(self, query: str, k: int = 4):
+        """Recalls memories based on semantic similarity"""
+        return await self.async_vector_store.asimilarity_search(query, k=k)
+
+    async def alog_activity(self, action: str, status: str, details: dict = None):
+        # Enqueueing is instant unless the batch writer is backed up; only then
+        # move the (bounded) wait off the loop.
+        if self.activity_writer.queue.full():
+            await asyncio.to_thread(self.log_activity, action, status, details)
+        else:
+            self.log_activity(action, status, details)
+
+    async def aclose(self):
+        await asyncio.to_thread(self.close)
+        await self.async_engine.dispose()
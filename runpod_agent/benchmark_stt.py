@@ -0,0 +1,138 @@
+"""
+Offline STT benchmark.
+
+Runs each provider over a directory of WAV fixtures and reports model load time,
+real-time factor (decode time / audio duration) and end-of-speech latency
+(time from the last audio frame to the final transcript, with audio fed in
+real-time-sized frames as the capture thread would). If `<name>.txt` exists next
+to a WAV file it is used as the reference transcript for word error rate.
+
+Usage:
+    python benchmark_stt.py fixtures/ --providers vosk whisper google
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import logging
+import numpy as np
+from src.config import config_instance
+from src.stt import STTManager, resample
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("STTBench")
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+def load_wav(path):
+    """Loads a WAV file as 16 kHz mono int16 PCM bytes."""
+    with wave.open(path, "rb") as wf:
+        rate, channels, width = wf.getframerate(), wf.getnchannels(), wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM is supported")
+    audio = np.frombuffer(raw, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    audio = resample(audio, rate, SAMPLE_RATE)
+    return audio.astype(np.int16).tobytes()
+
+def word_error_rate(ref, hyp):
+    r, h = ref.lower().split(), (hyp or "").lower().split()
+    d = list(range(len(h) + 1))
+    for i in range(1, len(r) + 1):
+        prev, d[0] = d[0], i
+        for j in range(1, len(h) + 1):
+            cur = min(d[j] + 1, d[j - 1] + 1, prev + (r[i - 1] != h[j - 1]))
+            prev, d[j] = d[j], cur
+    return d[len(h)] / max(1, len(r))
+
+def bench_provider(provider, fixtures):
+    config_instance.config["stt_provider"] = provider
+    manager = STTManager()
+
+    start = time.perf_counter()
+    engine = manager.get_engine(provider)
+    load_s = time.perf_counter() - start
+    logger.info(f"[{provider}] model load: {load_s:.2f}s")
+
+    frame_bytes = SAMPLE_RATE * 2 * FRAME_MS // 1000
+    rows = []
+    for path, pcm, ref in fixtures:
+        duration = len(pcm) / (SAMPLE_RATE * 2)
+
+        start = time.perf_counter()
+        text = engine.transcribe(pcm, SAMPLE_RATE)
+        decode_s = time.perf_counter() - start
+
+        stream = engine.open_stream(SAMPLE_RATE)
+        first_partial = None
+        start = time.perf_counter()
+        for i in range(0, len(pcm), frame_bytes):
+            hyp = stream.feed(pcm[i:i + frame_bytes])
+            if hyp and first_partial is None:
+                first_partial = time.perf_counter() - start
+        end_of_audio = time.perf_counter()
+        stream.finish()
+        latency_s = time.perf_counter() - end_of_audio
+
+        row = {
+            "file": os.path.basename(path),
+            "duration": duration,
+            "rtf": decode_s / duration if duration else 0.0,
+            "latency_ms": latency_s * 1000,
+            "first_partial_ms": first_partial * 1000 if first_partial is not None else None,
+            "wer": word_error_rate(ref, text) if ref is not None else None,
+        }
+        rows.append(row)
+        logger.info(f"[{provider}] {row['file']}: rtf={row['rtf']:.3f} latency={row['latency_ms']:.0f}ms text={text!r}")
+    return load_s, rows
+
+def summarize(provider, load_s, rows):
+    def mean(key):
+        vals = [r[key] for r in rows if r[key] is not None]
+        return sum(vals) / len(vals) if vals else None
+
+    wer = mean("wer")
+    partial = mean("first_partial_ms")
+    print(f"{provider:<10} load={load_s:6.2f}s  rtf={mean('rtf'):.3f}  "
+          f"latency={mean('latency_ms'):7.0f}ms  "
+          f"first_partial={'n/a' if partial is None else f'{partial:.0f}ms':>7}  "
+          f"wer={'n/a' if wer is None else f'{wer:.2%}'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark STT providers on WAV fixtures.")
+    parser.add_argument("fixtures", help="Directory containing .wav files (and optional .txt references)")
+    parser.add_argument("--providers", nargs="+", default=["vosk", "whisper"])
+    args = parser.parse_args()
+
+    fixtures = []
+    for name in sorted(os.listdir(args.fixtures)):
+        if not name.endswith(".wav"):
+            continue
+        path = os.path.join(args.fixtures, name)
+        ref_path = path[:-4] + ".txt"
+        ref = open(ref_path).read().strip() if os.path.exists(ref_path) else None
+        fixtures.append((path, load_wav(path), ref))
+
+    if not fixtures:
+        logger.error(f"No WAV fixtures found in {args.fixtures}")
+        return False
+
+    results = []
+    for provider in args.providers:
+        try:
+            results.append((provider, *bench_provider(provider, fixtures)))
+        except Exception as e:
+            logger.error(f"[{provider}] benchmark failed: {e}")
+
+    print("\n--- STT Benchmark ---")
+    for provider, load_s, rows in results:
+        summarize(provider, load_s, rows)
+    return bool(results)
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
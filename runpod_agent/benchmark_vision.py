@@ -0,0 +1,132 @@
+"""
+Offline vision payload benchmark.
+
+Runs every frame in a fixture directory of saved Zoom screenshots through each
+preprocessing variant and reports bytes per frame, preprocessing time, vision
+model latency, end-to-end decision latency (encode + model + parse, mean and
+p95) and decision accuracy.
+
+Fixtures are recorded from real joins: set `vision_record_dir` in config and
+every model decision saves its full screenshot as `<ACTION>__<ms>.png` with a
+`.bbox.json`. Review/rename the labels, then keep a variant (e.g. cropping) only
+if its accuracy matches `png` on the set.
+
+Expected actions come from `labels.json` ({"file.png": "ENTER_NAME", ...}) or,
+failing that, from the file name prefix (`ENTER_NAME__chrome.png`). An optional
+`<name>.bbox.json` next to a frame holds the dialog region (as returned by
+DIALOG_BBOX_JS) used by the cropped variants.
+
+Usage:
+    python benchmark_vision.py fixtures/zoom_screens/ --variants png jpeg-768 webp-768 jpeg-512-crop
+    python benchmark_vision.py fixtures/zoom_screens/ --no-model   # sizes only
+"""
+import os
+import io
+import json
+import time
+import base64
+import argparse
+import logging
+from PIL import Image
+from src.vision import prepare_frame
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("VisionBench")
+
+def parse_variant(name):
+    """'png' or '<jpeg|webp>-<max_side>[-crop]' -> (fmt, max_side, crop)."""
+    if name == "png":
+        return "PNG", None, False
+    parts = name.split("-")
+    return parts[0].upper(), int(parts[1]), len(parts) > 2 and parts[2] == "crop"
+
+def load_fixtures(directory):
+    labels = {}
+    labels_path = os.path.join(directory, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path, "r") as f:
+            labels = json.load(f)
+
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".png"):
+            continue
+        path = os.path.join(directory, name)
+        expected = labels.get(name) or (name.split("__")[0] if "__" in name else None)
+        region = None
+        bbox_path = os.path.splitext(path)[0] + ".bbox.json"
+        if os.path.exists(bbox_path):
+            with open(bbox_path, "r") as f:
+                region = json.load(f)
+        with open(path, "rb") as f:
+            fixtures.append((name, f.read(), expected, region))
+    return fixtures
+
+def encode(png, fmt, max_side, crop, region, quality):
+    if fmt == "PNG":
+        return png
+    return prepare_frame(png, max_side=max_side, fmt=fmt, quality=quality, region=region if crop else None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision frame size/latency/accuracy benchmark.")
+    parser.add_argument("fixtures")
+    parser.add_argument("--variants", nargs="+", default=["png", "jpeg-768", "webp-768", "jpeg-768-crop", "jpeg-512-crop"])
+    parser.add_argument("--quality", type=int, default=70)
+    parser.add_argument("--name", default="Bot")
+    parser.add_argument("--url", default="https://zoom.us/j/0000000000")
+    parser.add_argument("--no-model", action="store_true", help="Only measure sizes and preprocessing time")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        raise SystemExit(f"No PNG fixtures in {args.fixtures}")
+    logger.info(f"{len(fixtures)} frames loaded.")
+
+    query_model = None
+    if not args.no_model:
+        # Imported lazily: src.bot brings up the full bot (audio devices, browser helpers)
+        from src.bot import VisionHelper
+        query_model = VisionHelper._query_model
+
+    rows = []
+    for variant in args.variants:
+        fmt, max_side, crop = parse_variant(variant)
+        sizes, prep_ms, model_ms, total_ms, correct, labelled = [], [], [], [], 0, 0
+        for name, png, expected, region in fixtures:
+            start = time.perf_counter()
+            frame = encode(png, fmt, max_side, crop, region, args.quality)
+            b64 = base64.b64encode(frame).decode("ascii")
+            prep_ms.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(b64))
+
+            if query_model is None:
+                continue
+            start = time.perf_counter()
+            (action, _, _), _ = query_model(b64, args.name, args.url)
+            model_ms.append((time.perf_counter() - start) * 1000)
+            total_ms.append(prep_ms[-1] + model_ms[-1])
+            if expected:
+                labelled += 1
+                correct += action == expected
+                if action != expected:
+                    logger.info(f"[{variant}] {name}: expected {expected}, got {action}")
+
+        w, h = Image.open(io.BytesIO(frame)).size
+        total_ms.sort()
+        rows.append((variant, f"{w}x{h}", sum(sizes) / len(sizes), sum(prep_ms) / len(prep_ms),
+                     sum(model_ms) / len(model_ms) if model_ms else None,
+                     sum(total_ms) / len(total_ms) if total_ms else None,
+                     total_ms[int(0.95 * (len(total_ms) - 1))] if total_ms else None,
+                     correct / labelled if labelled else None))
+
+    print("\n--- Vision Payload Benchmark ---")
+    print(f"{'variant':16s} {'last size':>10s} {'b64 KB/frame':>13s} {'prep ms':>8s} {'decide ms':>10s} "
+          f"{'e2e ms':>8s} {'e2e p95':>8s} {'accuracy':>9s}")
+    num = lambda v, w: f"{v:{w}.0f}" if v is not None else f"{'-':>{w}s}"
+    for variant, dims, size, prep, decide, e2e, e2e_p95, acc in rows:
+        acc_s = f"{acc:9.0%}" if acc is not None else f"{'-':>9s}"
+        print(f"{variant:16s} {dims:>10s} {size / 1024:13.1f} {prep:8.1f} {num(decide, 10)} "
+              f"{num(e2e, 8)} {num(e2e_p95, 8)} {acc_s}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from src.bot import bot_instance
+from src.pool import pool_instance
 from src.audio import audio_instance
 from src.config import config_instance
-import requests
+from src.tts import tts_instance
+from src.backends import backend_instance
+from src.jobs import job_instance, JobConflictError
+from src.models import model_instance
 import os
 
 app = FastAPI(title="RunPod Zoom Agent")
@@ -23,6 +26,11 @@ class ConfigRequest(BaseModel):
     tts_api_url: str = None
     tts_api_key: str = None
     tts_voice_id: str = None
+    stt_provider: str = None
+
+@app.on_event("startup")
+def prewarm():
+    pool_instance.prewarm()
 
 @app.get("/health")
 def health_check():
@@ -42,49 +50,164 @@ async def get_config_page(request: Request):
 @app.post("/config")
 def update_config(cfg: ConfigRequest):
     """Updates the agent configuration."""
-    new_conf = cfg.dict()
+    new_conf = cfg.dict(exclude_none=True)
     config_instance.save_config(new_conf)
-    # Reload bot config (dynamic update)
-    bot_instance.reload_config()
+    # Reload shared config and every pooled bot (dynamic update)
+    pool_instance.reload_config()
     return {"status": "updated", "config": config_instance.config}
 
-@app.post("/test_tts")
+@app.post("/test_tts", status_code=202)
 def test_tts():
-    """Triggers a TTS test with current settings."""
-    bot_instance.speak("This is a test of the text to speech system.")
-    return {"status": "playing"}
+    """Triggers a TTS test with current settings (runs as a background job)."""
+    job = job_instance.submit("test_tts", lambda job: pool_instance.default().speak("This is a test of the text to speech system."),
+                              params={"bot_id": "default"})
+    return {"status": "playing", "job_id": job.id}
+
+@app.get("/tts/cache")
+def tts_cache_stats():
+    """TTS synthesis cache hit/miss counters."""
+    return tts_instance.cache.stats()
 
 # --- Core Endpoints ---
 
-@app.post("/join")
+def _job_response(job, message):
+    return {
+        "message": message,
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+def _submit_join(bot, request, on_failure=None):
+    """Queues a join job for `bot`; `on_failure()` runs if the join fails (e.g. to free a pooled bot)."""
+    def run(job):
+        try:
+            success, msg = bot.join_meeting(request.url, request.name, on_event=job.emit, requested_at=job.created_at)
+        except Exception as e:
+            success, msg = False, str(e)
+        if not success:
+            if on_failure:
+                on_failure()
+            raise RuntimeError(f"Failed to join meeting: {msg}")
+        return {"message": msg, "url": request.url}
+
+    try:
+        job = job_instance.submit("join", run, params={**request.dict(), "bot_id": bot.bot_id}, unique=True)
+    except JobConflictError:
+        raise HTTPException(status_code=409, detail="A join is already in progress")
+    return {**_job_response(job, "Attempting to join meeting"), "url": request.url, "bot_id": bot.bot_id}
+
+def _get_bot(bot_id):
+    bot = pool_instance.get(bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return bot
+
+@app.post("/join", status_code=202)
 def join_meeting(request: JoinRequest):
-    success, error_msg = bot_instance.join_meeting(request.url, request.name)
-    if success:
-        return {"message": "Attempting to join meeting", "url": request.url}
-    else:
-        raise HTTPException(status_code=500, detail=f"Failed to join meeting: {error_msg}")
+    """Starts the join flow on the default bot as a background job. Progress: GET /jobs/{id}/events (SSE)."""
+    return _submit_join(pool_instance.default(), request)
 
-@app.post("/leave")
+@app.post("/leave", status_code=202)
 def leave_meeting():
-    bot_instance.leave_meeting()
-    return {"message": "Left meeting"}
+    job = job_instance.submit("leave", lambda job: pool_instance.remove("default"), params={"bot_id": "default"})
+    return _job_response(job, "Leaving meeting")
 
 @app.get("/status")
 def status():
-    return bot_instance.get_status()
+    bot = pool_instance.get("default")
+    return {
+        **(bot.get_status() if bot else {"bot_id": "default", "status": "IDLE"}),
+        "jobs": [j.to_dict() for j in job_instance.list(active_only=True)],
+    }
+
+# --- Bot Pool (one bot per meeting) ---
+
+@app.get("/bots")
+def list_bots():
+    return pool_instance.list()
+
+@app.post("/bots", status_code=202)
+def create_bot(request: JoinRequest):
+    """Creates a new bot (own browser + audio devices) and joins the meeting with it."""
+    try:
+        bot = pool_instance.create()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    # A failed join frees the bot's slot, browser and audio devices
+    return _submit_join(bot, request, on_failure=lambda: pool_instance.remove(bot.bot_id))
+
+@app.get("/bots/{bot_id}")
+def bot_status(bot_id: str):
+    bot = _get_bot(bot_id)
+    return {
+        **bot.get_status(),
+        "jobs": [j.to_dict() for j in job_instance.list(active_only=True) if j.params.get("bot_id") == bot_id],
+    }
+
+@app.post("/bots/{bot_id}/leave", status_code=202)
+def bot_leave(bot_id: str):
+    _get_bot(bot_id)
+    job = job_instance.submit("leave", lambda job: pool_instance.remove(bot_id), params={"bot_id": bot_id})
+    return _job_response(job, "Leaving meeting")
+
+# --- Session History ---
+
+@app.get("/sessions")
+def list_sessions(url: str = None, since: str = None, until: str = None,
+                  min_duration: float = None, max_duration: float = None, limit: int = 100):
+    """Past meetings from the session catalog. since/until are ISO timestamps, durations in seconds."""
+    try:
+        return pool_instance.default().memory.find_sessions(
+            url=url, since=since, until=until,
+            min_duration=min_duration, max_duration=max_duration, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# --- Background Jobs ---
+
+@app.get("/jobs")
+def list_jobs():
+    return [j.to_dict() for j in job_instance.list()]
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_instance.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_events=True)
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's progress; honours Last-Event-ID for resume."""
+    job = job_instance.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    last_seq = int(request.headers.get("last-event-id", 0) or 0)
+    return StreamingResponse(
+        job_instance.stream(job, last_seq=last_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 @app.get("/audio/status")
 def audio_status():
     return audio_instance.check_audio_system()
 
+@app.get("/ollama/models")
+def ollama_models():
+    """Configured models, residency (/api/ps), swaps, queue and load times."""
+    model_instance.poll_residency()
+    return model_instance.stats()
+
 @app.get("/ollama/check")
-def check_ollama():
+async def check_ollama():
     """
     Proxy check to see if Ollama is reachable on localhost
     """
     try:
-        ollama_host = os.getenv("OLLAMA_HOST", "localhost:11434")
-        resp = requests.get(f"http://{ollama_host}/api/tags")
+        resp = await backend_instance.get("ollama").aget("/api/tags", timeout=5)
         if resp.status_code == 200:
             return {"status": "ok", "models": resp.json()}
         else:
@@ -1,5 +1,10 @@
+import time
+import queue
 import logging
+import threading
 import subprocess
+from collections import deque
+import numpy as np
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -34,4 +39,373 @@ class AudioManager:
         # This is already done in start.sh, but can be reinforced here.
         pass
 
+    def _load_module(self, *args):
+        result = subprocess.run(["pactl", "load-module", *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"pactl load-module {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def create_bot_devices(self, bot_id):
+        """
+        Creates a private audio routing for one bot, mirroring start.sh:
+        Speaker_<id> (Chrome output, captured via its monitor) and
+        Mic_<id> -> MicSource_<id> (bot voice, used by Chrome as microphone).
+        Returns the device names and the loaded module ids (for cleanup). On any
+        failure the modules loaded so far are unloaded and RuntimeError is raised.
+        """
+        devices = {
+            "speaker_sink": f"Speaker_{bot_id}",
+            "mic_sink": f"Mic_{bot_id}",
+            "mic_source": f"MicSource_{bot_id}",
+            "modules": [],
+        }
+        try:
+            devices["modules"].append(self._load_module(
+                "module-null-sink", f"sink_name={devices['speaker_sink']}",
+                f"sink_properties=device.description=Speaker_{bot_id}"))
+            devices["modules"].append(self._load_module(
+                "module-null-sink", f"sink_name={devices['mic_sink']}",
+                f"sink_properties=device.description=Microphone_{bot_id}"))
+            devices["modules"].append(self._load_module(
+                "module-virtual-source", f"source_name={devices['mic_source']}",
+                f"master={devices['mic_sink']}.monitor",
+                f"source_properties=device.description=MicSource_{bot_id}"))
+        except Exception as e:
+            self.remove_bot_devices(devices["modules"])
+            if isinstance(e, RuntimeError):
+                raise
+            # e.g. FileNotFoundError when pactl is missing
+            raise RuntimeError(f"Could not create audio devices for bot {bot_id}: {e}") from e
+        logger.info(f"Audio devices created for bot {bot_id}")
+        return devices
+
+    def remove_bot_devices(self, modules):
+        for module_id in reversed(modules):
+            try:
+                subprocess.run(["pactl", "unload-module", str(module_id)], capture_output=True)
+            except OSError as e:
+                logger.error(f"Failed to unload audio module {module_id}: {e}")
+
+class Utterance:
+    """A contiguous segment of detected speech (16-bit mono PCM)."""
+    def __init__(self, pcm, sample_rate, start_time, end_time):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.start_time = start_time
+        self.end_time = end_time
+
+    @property
+    def duration(self):
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+class VoiceActivityDetector:
+    """
+    Streaming energy-based VAD with an adaptive noise floor.
+
+    The floor is an exponential moving average of frame RMS, updated only while
+    no speech is active. Speech starts when energy exceeds floor * start_ratio and
+    ends after `hangover_ms` of frames below floor * stop_ratio.
+    """
+    def __init__(self, frame_ms=30, start_ratio=3.0, stop_ratio=2.0, min_energy=200,
+                 hangover_ms=600, min_speech_ms=250, max_utterance_s=15, adapt_rate=0.05):
+        self.start_ratio = start_ratio
+        self.stop_ratio = stop_ratio
+        self.min_energy = min_energy
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.adapt_rate = adapt_rate
+        self.noise_floor = None
+        self.in_speech = False
+        self.speech_frames = 0
+        self.silent_frames = 0
+
+    @property
+    def threshold(self):
+        return max(self.min_energy, (self.noise_floor or 0) * self.start_ratio)
+
+    def process(self, rms):
+        """Feeds one frame's RMS. Returns 'start', 'end' or None."""
+        if self.noise_floor is None:
+            self.noise_floor = rms
+
+        if not self.in_speech:
+            if rms > self.threshold:
+                self.in_speech = True
+                self.speech_frames = 1
+                self.silent_frames = 0
+                return "start"
+            self.noise_floor += self.adapt_rate * (rms - self.noise_floor)
+            return None
+
+        self.speech_frames += 1
+        if rms < max(self.min_energy, self.noise_floor * self.stop_ratio):
+            self.silent_frames += 1
+        else:
+            self.silent_frames = 0
+
+        if self.silent_frames >= self.hangover_frames or self.speech_frames >= self.max_frames:
+            self.in_speech = False
+            return "end"
+        return None
+
+    def is_valid(self):
+        """True if the utterance that just ended had enough voiced frames to keep."""
+        return self.speech_frames - self.silent_frames >= self.min_speech_frames
+
+class AudioCapture:
+    """
+    Persistent capture of a PulseAudio source (default: SpeakerSink.monitor).
+
+    A background thread reads raw PCM from `parec` into a ring buffer, runs the
+    VAD on every frame and pushes finished utterances onto `segments`. Capture
+    never stops between turns, so speech arriving while the bot thinks or speaks
+    is queued instead of lost.
+    """
+    def __init__(self, source="SpeakerSink.monitor", sample_rate=16000, frame_ms=30,
+                 preroll_ms=300, buffer_s=30, queue_segments=True):
+        self.source = source
+        self.queue_segments = queue_segments
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * 2 * frame_ms // 1000
+        self.preroll_frames = max(1, preroll_ms // frame_ms)
+        self.ring = deque(maxlen=buffer_s * 1000 // frame_ms)
+        self.segments = queue.Queue()
+        self.listeners = []
+        self.vad = VoiceActivityDetector(frame_ms=frame_ms)
+        self.process = None
+        self.thread = None
+        self.running = False
+
+    def add_listener(self, callback):
+        """
+        Registers callback(event, frame). Events: 'speech_start', 'speech_frame' (one per
+        PCM frame of the utterance, pre-roll included), 'speech_end' and 'speech_discard'
+        (utterance too short to keep).
+        """
+        self.listeners.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        cmd = [
+            "parec", f"--device={self.source}", "--format=s16le", f"--rate={self.sample_rate}",
+            "--channels=1", "--raw", f"--latency-msec={self.frame_ms}"
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        logger.info(f"Audio capture started on {self.source}")
+
+    def stop(self):
+        self.running = False
+        if self.process:
+            self.process.terminate()
+            self.process = None
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        logger.info("Audio capture stopped.")
+
+    def get_segment(self, timeout=None):
+        """Returns the next Utterance, or None if none arrived within `timeout` seconds."""
+        try:
+            return self.segments.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _emit(self, event, frame=None):
+        for callback in self.listeners:
+            try:
+                callback(event, frame)
+            except Exception as e:
+                logger.error(f"Capture listener failed: {e}")
+
+    def _run(self):
+        utterance = []
+        started_at = None
+        stream = self.process.stdout
+        while self.running:
+            frame = stream.read(self.frame_bytes)
+            if not frame or len(frame) < self.frame_bytes:
+                if self.running:
+                    logger.error("Audio capture stream closed unexpectedly.")
+                break
+
+            self.ring.append(frame)
+            samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+            rms = float(np.sqrt(np.mean(samples * samples)))
+            event = self.vad.process(rms)
+
+            if event == "start":
+                # Include the pre-roll so the first syllable is not clipped
+                utterance = list(self.ring)[-self.preroll_frames:]
+                started_at = time.time() - len(utterance) * self.frame_ms / 1000
+                self._emit("speech_start")
+                for f in utterance:
+                    self._emit("speech_frame", f)
+            elif self.vad.in_speech:
+                utterance.append(frame)
+                self._emit("speech_frame", frame)
+            elif event == "end":
+                utterance.append(frame)
+                self._emit("speech_frame", frame)
+                if self.vad.is_valid():
+                    if self.queue_segments:
+                        self.segments.put(Utterance(b"".join(utterance), self.sample_rate, started_at, time.time()))
+                    self._emit("speech_end")
+                else:
+                    self._emit("speech_discard")
+                utterance = []
+        self.running = False
+
+class Playback:
+    """Handle for one queued clip. `done` is set when it finished or was cancelled."""
+    def __init__(self, pcm, generation):
+        self.pcm = pcm
+        self.generation = generation
+        self.done = threading.Event()
+        self.cancelled = False
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+class PlaybackEngine:
+    """
+    Streams PCM into a PulseAudio sink (default: MicSink) through one long-lived
+    `pacat` process, so replies no longer pay fork/exec and decoder startup.
+
+    Clips are queued and written in small chunks paced to real time, keeping only
+    `lead_ms` of audio ahead of the sink. stop() therefore silences the output
+    within roughly lead_ms + latency_ms, and duck() ramps the gain per chunk.
+    """
+    def __init__(self, sink="MicSink", sample_rate=24000, chunk_ms=20, lead_ms=40, latency_ms=40):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.chunk_bytes = sample_rate * 2 * chunk_ms // 1000
+        self.byte_rate = sample_rate * 2
+        self.lead_s = lead_ms / 1000
+        self.latency_ms = latency_ms
+        self.queue = queue.Queue()
+        self.generation = 0
+        self.gain = 1.0
+        self.target_gain = 1.0
+        self.current = None
+        self.process = None
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def is_playing(self):
+        return self.current is not None or not self.queue.empty()
+
+    def decode(self, path):
+        """Decodes any audio file (mp3/wav/...) to mono s16le PCM at the engine rate."""
+        cmd = ["ffmpeg", "-v", "quiet", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate), "-"]
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {path}")
+        return result.stdout
+
+    def play(self, pcm, block=True):
+        """Queues PCM for playback. Returns the Playback handle (after it ends if `block`)."""
+        with self._lock:
+            item = Playback(pcm, self.generation)
+            self.queue.put(item)
+        if block:
+            item.wait()
+        return item
+
+    def play_file(self, path, block=True):
+        return self.play(self.decode(path), block=block)
+
+    def stop(self):
+        """Cancels the current clip and everything queued behind it."""
+        with self._lock:
+            self.generation += 1
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                item.cancelled = True
+                item.done.set()
+        logger.info("Playback stopped.")
+
+    def duck(self, level=0.3):
+        """Lowers the output volume (ramped) without stopping playback."""
+        self.target_gain = level
+
+    def unduck(self):
+        self.target_gain = 1.0
+
+    def _ensure_process(self):
+        if self.process is None or self.process.poll() is not None:
+            cmd = [
+                "pacat", "--playback", f"--device={self.sink}", "--format=s16le",
+                f"--rate={self.sample_rate}", "--channels=1", "--raw", f"--latency-msec={self.latency_ms}"
+            ]
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return self.process
+
+    def _apply_gain(self, chunk):
+        if self.gain == 1.0 and self.target_gain == 1.0:
+            return chunk
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        ramp = np.linspace(self.gain, self.target_gain, len(samples), dtype=np.float32)
+        self.gain = self.target_gain
+        return np.clip(samples * ramp, -32768, 32767).astype(np.int16).tobytes()
+
+    def close(self):
+        """Stops playback and shuts down the writer thread and pacat process."""
+        self.stop()
+        self.queue.put(None)
+        self.thread.join(timeout=2)
+        if self.process:
+            self.process.terminate()
+            self.process = None
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if item.generation != self.generation:
+                item.cancelled = True
+                item.done.set()
+                continue
+
+            self.current = item
+            try:
+                proc = self._ensure_process()
+                start = time.monotonic()
+                written = 0
+                for i in range(0, len(item.pcm), self.chunk_bytes):
+                    if item.generation != self.generation:
+                        item.cancelled = True
+                        break
+                    chunk = self._apply_gain(item.pcm[i:i + self.chunk_bytes])
+                    proc.stdin.write(chunk)
+                    proc.stdin.flush()
+                    written += len(chunk)
+                    # Stay at most lead_s ahead of real time so stop() takes effect quickly
+                    ahead = start + written / self.byte_rate - time.monotonic()
+                    if ahead > self.lead_s:
+                        time.sleep(ahead - self.lead_s)
+                if not item.cancelled:
+                    # Let the tail drain before reporting completion
+                    remaining = start + written / self.byte_rate - time.monotonic()
+                    if remaining > 0:
+                        time.sleep(remaining)
+            except Exception as e:
+                logger.error(f"Playback failed: {e}")
+                self.process = None
+            finally:
+                self.current = None
+                item.done.set()
+
 audio_instance = AudioManager()
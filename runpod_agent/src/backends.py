@@ -0,0 +1,185 @@
+import os
+import asyncio
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.config import config_instance
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger("Backends")
+
+class BackendBusyError(requests.exceptions.RequestException):
+    """Raised when a backend already has `max_inflight` requests and the queue wait expires."""
+
+class BackendClient:
+    """
+    Keep-alive HTTP client for one backend (Ollama, TTS, ...).
+
+    Sync calls go through a pooled requests.Session with retries/backoff on
+    connection errors and 502/503/504 (read timeouts are never retried, so a slow
+    generation is not silently run twice). Async calls use a lazily created
+    httpx.AsyncClient with the same limits. A semaphore caps in-flight requests so
+    a stalled backend makes callers fail fast instead of piling up blocked threads.
+    """
+    def __init__(self, name, base_url="", timeout=30, retries=2, backoff=0.3, pool_size=10,
+                 max_inflight=None, queue_timeout=30):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_inflight or pool_size)
+        self._async_client = None
+        self._async_loop = None
+
+        retry = Retry(
+            total=retries, connect=retries, read=0, status=retries,
+            backoff_factor=backoff, status_forcelist=(502, 503, 504),
+            allowed_methods=None, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """
+        Sends a request within the in-flight cap. For stream=True the slot is held
+        until the response is closed (use it as a context manager or close() it),
+        so streamed generations count against the cap while their body is read.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise BackendBusyError(f"Backend '{self.name}' is saturated")
+        try:
+            response = self.session.request(method, self.url(path), timeout=timeout or self.timeout, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        if not kwargs.get("stream"):
+            self._slots.release()
+            return response
+
+        close = response.close
+        release_lock = threading.Lock()
+        released = False
+        def close_and_release():
+            nonlocal released
+            try:
+                close()
+            finally:
+                # close() may run from the reader and from a cleanup path at once;
+                # only the first caller gives the slot back
+                with release_lock:
+                    first, released = not released, True
+                if first:
+                    self._slots.release()
+        response.close = close_and_release # Response.__exit__ calls self.close()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def _get_async_client(self):
+        if httpx is None:
+            raise RuntimeError("httpx is not installed; async backend calls are unavailable")
+        if self._async_client is None:
+            self._async_loop = asyncio.get_running_loop()
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                transport=httpx.AsyncHTTPTransport(retries=self.retries),
+            )
+        return self._async_client
+
+    async def arequest(self, method, path, timeout=None, **kwargs):
+        client = self._get_async_client()
+        return await client.request(method, self.url(path), timeout=timeout or self.timeout, **kwargs)
+
+    async def aget(self, path, **kwargs):
+        return await self.arequest("GET", path, **kwargs)
+
+    async def apost(self, path, **kwargs):
+        return await self.arequest("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+        client, self._async_client = self._async_client, None
+        loop, self._async_loop = self._async_loop, None
+        if client is None:
+            return
+        # The async client's connections belong to the loop that created it; close it there
+        try:
+            if loop.is_closed():
+                logger.warning(f"Event loop of '{self.name}' async client is closed; dropping it")
+            elif not loop.is_running():
+                loop.run_until_complete(client.aclose())
+            elif self._current_loop() is loop:
+                loop.create_task(client.aclose())
+            else:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to close async client for '{self.name}': {e}")
+
+    @staticmethod
+    def _current_loop():
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+class BackendRegistry:
+    """
+    Lazily builds one BackendClient per backend name from ConfigManager:
+    `<name>_url`, `<name>_timeout`, `<name>_max_inflight`, plus the shared
+    `http_pool_size`, `http_retries` and `http_backoff`.
+    """
+    def __init__(self):
+        self.clients = {}
+        self._lock = threading.Lock()
+
+    def _default_url(self, name):
+        if name == "ollama":
+            return f"http://{os.getenv('OLLAMA_HOST', 'localhost:11434')}"
+        return ""
+
+    def get(self, name):
+        with self._lock:
+            client = self.clients.get(name)
+            if client is None:
+                client = BackendClient(
+                    name,
+                    base_url=config_instance.get(f"{name}_url") or self._default_url(name),
+                    timeout=config_instance.get(f"{name}_timeout", 30),
+                    retries=config_instance.get("http_retries", 2),
+                    backoff=config_instance.get("http_backoff", 0.3),
+                    pool_size=config_instance.get("http_pool_size", 10),
+                    max_inflight=config_instance.get(f"{name}_max_inflight"),
+                )
+                self.clients[name] = client
+                logger.info(f"Backend '{name}' client created ({client.base_url or 'absolute URLs'})")
+            return client
+
+    def reload(self):
+        """Drops all clients so the next call picks up new configuration."""
+        with self._lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients = {}
+
+# Global Instance
+backend_instance = BackendRegistry()
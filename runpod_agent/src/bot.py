@@ -1,198 +1,407 @@
 import logging
 import asyncio
 import base64
-import requests
 import json
 import time
 import os
-import os
+import uuid
 # from gtts import gTTS (Removed, using tts_manager)
-import speech_recognition as sr
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from src.memory import MemoryManager
+from src.long_term import long_term_instance, RetrievalPrefetch
 from src.tts import tts_instance
 from src.config import config_instance
+from src.backends import backend_instance
+from src.audio import AudioCapture, PlaybackEngine
+from src.stt import stt_instance, StreamingTranscriber
+from src.pipeline import SentenceChunker, SpeechPipeline, TurnTimer
+from src.vision import FrameTracker, frame_signature, join_scope, prepare_frame, dialog_region, record_fixture, vision_cache_instance
+from src.join_state import join_state_instance, page_signature
+from src.models import model_instance, ModelQueueTimeout
+from src.conversation import Conversation
+from src.browser import browser_pool_instance
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ZoomBot")
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-VISION_MODEL = "llama3.2-vision"
-CHAT_MODEL = "llama3.2-vision" # Using same model for chat logic
+OLLAMA_GENERATE = "/api/generate"
+OLLAMA_CHAT = "/api/chat"
+
+# Fixed phrases spoken in (almost) every meeting; synthesized into the TTS cache at startup
+PREWARM_PHRASES = [
+    "Navigating to Zoom meeting.",
+    "I am now listening.",
+    "Hello everyone, I have joined the meeting.",
+    "The meeting has ended. Goodbye.",
+    "I encountered an error joining the meeting.",
+    "I didn't quite catch that.",
+    "I see the launch button.",
+    "I am entering the name.",
+    "Joining audio.",
+    "There is a CAPTCHA.",
+    "I am unsure, waiting.",
+    "Processing...",
+]
+
+_warm_lock = threading.Lock()
+_warmed = False
+
+def warm_shared(force=False):
+    """
+    Prewarms the process-wide TTS cache and loads the STT engine, once per process
+    (or again with force=True after a config change). Both are shared by every bot.
+    """
+    global _warmed
+    with _warm_lock:
+        if _warmed and not force:
+            return
+        _warmed = True
+    threading.Thread(target=tts_instance.prewarm, args=(PREWARM_PHRASES,), name="TTSPrewarm", daemon=True).start()
+    threading.Thread(target=stt_instance.warmup, name="STTWarmup", daemon=True).start()
+
+def reload_shared_config():
+    """Re-reads the config file and refreshes everything bots share (backends, TTS/STT, models)."""
+    config_instance.load_config()
+    backend_instance.reload()
+    # Provider/voice may have changed: warm the cache for the new key space
+    warm_shared(force=True)
+    # Models may have changed too
+    model_instance.warmup_async()
+
+class VisionRequest:
+    """
+    Cancellation handle for one streamed vision call. cancel() closes the HTTP
+    stream, which makes Ollama stop generating, and frees the model slot.
+    """
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.response = None
+        self._lock = threading.Lock()
+
+    def attach(self, response):
+        with self._lock:
+            self.response = response
+            if self.cancelled.is_set():
+                response.close()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self._lock:
+            if self.response is not None:
+                try:
+                    self.response.close()
+                except Exception:
+                    pass
 
 class VisionHelper:
     @staticmethod
-    def decide_action(driver, name, join_url):
+    def decide_action(driver, name, join_url, tracker=None):
         """
         Sends current screenshot to Vision model and gets the next action instruction.
+        The model is skipped when the frame is unchanged since the previous cycle
+        (`tracker`) or matches a known screen in the cross-meeting decision cache.
         Returns: Tuple(ACTION_TYPE, REASONING, SPEAK_TEXT)
         """
         try:
-            screenshot_b64 = driver.get_screenshot_as_base64()
-            
-            prompt = f"""
-            Identify the current state of this Zoom Meeting Join flow.
-            Goal: Join the meeting with name '{name}'.
-            URL: {join_url}
-            
-            Based on the screenshot, choose the single best ACTION from this list:
-            1. CLICK_LAUNCH (If you see 'Launch Meeting' button or 'Open Zoom Meetings' dialog)
-            2. ENTER_NAME (If you see an input field for 'Your Name' and a 'Join' button)
-            3. CLICK_JOIN_AUDIO (If you see 'Join Audio', 'Join by Computer', or a microphone with a red slash)
-            4. SOLVE_CAPTCHA (If you see a CAPTCHA or 'I am not a robot')
-            5. MEETING_ENDED (If you see 'The meeting has ended', 'Host has ended the meeting', or 'Thank you for attending')
-            6. END_SUCCESS (Only if you see the meeting interface AND the microphone is Unmuted/Green/Active. If audio popup is visible, choose CLICK_JOIN_AUDIO)
-            
-            Format: Check the image carefully. Return a JSON object:
-            {{ 
-                "action": "ACTION_NAME", 
-                "reasoning": "Brief explanation of what you see",
-                "speak": "A short, natural sentence announcing what you are doing (e.g., 'I am joining audio now.')"
-            }}
-            """
-
-            payload = {
-                "model": VISION_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "images": [screenshot_b64],
-                "format": "json" 
-            }
-            
-            # logger.info("Thinking... (Sending screenshot to Vision Model)")
-            response = requests.post(OLLAMA_URL, json=payload, timeout=45)
-            
-            if response.status_code == 200:
-                result_text = response.json().get("response", "").strip()
-                # logger.info(f"Model Response: {result_text}")
-                try:
-                    data = json.loads(result_text)
-                    return (
-                        data.get("action", "WAIT"), 
-                        data.get("reasoning", "No reasoning provided"),
-                        data.get("speak", "Processing...")
-                    )
-                except:
-                    # Fallback if model outputs plain text
-                    speak_fallback = "I am unsure, waiting."
-                    if "LAUNCH" in result_text.upper(): return "CLICK_LAUNCH", result_text, "I see the launch button."
-                    if "NAME" in result_text.upper(): return "ENTER_NAME", result_text, "I am entering the name."
-                    if "AUDIO" in result_text.upper(): return "CLICK_JOIN_AUDIO", result_text, "Joining audio."
-                    if "CAPTCHA" in result_text.upper(): return "SOLVE_CAPTCHA", result_text, "There is a CAPTCHA."
-                    if "ENDED" in result_text.upper(): return "MEETING_ENDED", result_text, "The meeting has ended."
-                    return "WAIT", result_text, speak_fallback
-            else:
-                logger.error(f"Ollama Error: {response.text}")
-                return "WAIT", "Model Error", "I encountered an error."
+            decision, frame = VisionHelper.capture(driver, tracker)
+            if decision:
+                return decision
+            return VisionHelper.query(frame, name, join_url, tracker)
         except Exception as e:
             logger.error(f"Vision Decision Failed: {e}")
             return "WAIT", str(e), "System failure."
 
+    @staticmethod
+    def capture(driver, tracker=None):
+        """
+        Driver-side half of decide_action (must run on the thread owning the driver).
+        Returns (decision, None) when the tracker or decision cache already knows the
+        frame, otherwise (None, frame) with the encoded frame for query().
+        """
+        screenshot_png = driver.get_screenshot_as_png()
+        scope = join_scope(driver.current_url)
+        try:
+            dhash, thumb = frame_signature(screenshot_png)
+        except Exception as e:
+            logger.warning(f"Frame signature failed: {e}")
+            dhash, thumb = None, None
+
+        if thumb is not None:
+            if tracker and tracker.unchanged(thumb):
+                vision_cache_instance.record("unchanged")
+                action, reasoning, _ = tracker.last_decision
+                return (action, f"(unchanged frame) {reasoning}", None), None
+            cached = vision_cache_instance.lookup(scope, dhash)
+            if cached:
+                vision_cache_instance.record("cached")
+                if tracker: tracker.remember(thumb, cached)
+                return tuple(cached), None
+
+        screenshot_b64 = base64.b64encode(VisionHelper.encode_frame(driver, screenshot_png)).decode("ascii")
+        frame = {"b64": screenshot_b64, "dhash": dhash, "thumb": thumb, "scope": scope}
+        if config_instance.get("vision_record_dir"):
+            frame["png"], frame["region"] = screenshot_png, dialog_region(driver)
+        return None, frame
+
+    @staticmethod
+    def query(frame, name, join_url, tracker=None, request=None):
+        """Model half of decide_action; safe to run off the driver thread. Cancelled calls are not cached."""
+        try:
+            decision, ok = VisionHelper._query_model(frame["b64"], name, join_url, request=request)
+        except ModelQueueTimeout as e:
+            logger.warning(f"Vision call not started: {e}")
+            return ("WAIT", "Vision model busy", None)
+        if request and request.cancelled.is_set():
+            return decision
+        vision_cache_instance.record("model")
+        if ok and "png" in frame:
+            record_fixture(config_instance.get("vision_record_dir"), frame["png"], frame["region"], decision[0])
+        if ok and frame["thumb"] is not None:
+            if tracker: tracker.remember(frame["thumb"], decision)
+            vision_cache_instance.store(frame["scope"], frame["dhash"], decision)
+        return decision
+
+    @staticmethod
+    def encode_frame(driver, screenshot_png):
+        """Downscaled (optionally dialog-cropped) JPEG/WebP of the screenshot (see vision_* config); PNG on failure."""
+        try:
+            # Off by default: the crop hides page-level cues (ended banners, footer audio buttons)
+            region = dialog_region(driver) if config_instance.get("vision_crop_dialog", False) else None
+            frame = prepare_frame(
+                screenshot_png,
+                max_side=config_instance.get("vision_max_side", 768),
+                fmt=config_instance.get("vision_format", "jpeg"),
+                quality=config_instance.get("vision_quality", 70),
+                region=region,
+            )
+            logger.debug(f"Vision frame: {len(screenshot_png)} -> {len(frame)} bytes (cropped={bool(region)})")
+            return frame
+        except Exception as e:
+            logger.warning(f"Frame preprocessing failed, sending PNG: {e}")
+            return screenshot_png
+
+    @staticmethod
+    def _query_model(screenshot_b64, name, join_url, request=None):
+        """
+        Returns ((ACTION, REASONING, SPEAK), ok). ok is False on transport/model errors
+        or cancellation. The response is streamed so `request.cancel()` can abort it.
+        """
+        prompt = f"""
+        Identify the current state of this Zoom Meeting Join flow.
+        Goal: Join the meeting with name '{name}'.
+        URL: {join_url}
+
+        Based on the screenshot, choose the single best ACTION from this list:
+        1. CLICK_LAUNCH (If you see 'Launch Meeting' button or 'Open Zoom Meetings' dialog)
+        2. ENTER_NAME (If you see an input field for 'Your Name' and a 'Join' button)
+        3. CLICK_JOIN_AUDIO (If you see 'Join Audio', 'Join by Computer', or a microphone with a red slash)
+        4. SOLVE_CAPTCHA (If you see a CAPTCHA or 'I am not a robot')
+        5. MEETING_ENDED (If you see 'The meeting has ended', 'Host has ended the meeting', or 'Thank you for attending')
+        6. END_SUCCESS (Only if you see the meeting interface AND the microphone is Unmuted/Green/Active. If audio popup is visible, choose CLICK_JOIN_AUDIO)
+
+        Format: Check the image carefully. Return a JSON object:
+        {{ 
+            "action": "ACTION_NAME", 
+            "reasoning": "Brief explanation of what you see",
+            "speak": "A short, natural sentence announcing what you are doing (e.g., 'I am joining audio now.')"
+        }}
+        """
+
+        model = model_instance.vision_model()
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "images": [screenshot_b64],
+            "format": "json" 
+        }
+
+        # logger.info("Thinking... (Sending screenshot to Vision Model)")
+        cancelled = ("WAIT", "Vision call cancelled", None), False
+        parts = []
+        with model_instance.slot(model, cancel=request.cancelled if request else None) as keep_alive:
+            if request and request.cancelled.is_set():
+                return cancelled
+            payload["keep_alive"] = keep_alive
+            response = None
+            try:
+                response = backend_instance.get("ollama").post(OLLAMA_GENERATE, json=payload, stream=True)
+                if request: request.attach(response)
+                if response.status_code != 200:
+                    logger.error(f"Ollama Error: {response.text}")
+                    return ("WAIT", "Model Error", "I encountered an error."), False
+                for line in response.iter_lines():
+                    if request and request.cancelled.is_set():
+                        break
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    parts.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        model_instance.record(model, chunk)
+                        break
+            except Exception:
+                # Closing the stream from cancel() surfaces here as a read error
+                if request and request.cancelled.is_set():
+                    return cancelled
+                raise
+            finally:
+                if response is not None: response.close()
+        if request and request.cancelled.is_set():
+            return cancelled
+
+        result_text = "".join(parts).strip()
+        if result_text:
+            # logger.info(f"Model Response: {result_text}")
+            try:
+                data = json.loads(result_text)
+                return (
+                    data.get("action", "WAIT"), 
+                    data.get("reasoning", "No reasoning provided"),
+                    data.get("speak", "Processing...")
+                ), True
+            except:
+                # Fallback if model outputs plain text
+                speak_fallback = "I am unsure, waiting."
+                if "LAUNCH" in result_text.upper(): return ("CLICK_LAUNCH", result_text, "I see the launch button."), False
+                if "NAME" in result_text.upper(): return ("ENTER_NAME", result_text, "I am entering the name."), False
+                if "AUDIO" in result_text.upper(): return ("CLICK_JOIN_AUDIO", result_text, "Joining audio."), False
+                if "CAPTCHA" in result_text.upper(): return ("SOLVE_CAPTCHA", result_text, "There is a CAPTCHA."), False
+                if "ENDED" in result_text.upper(): return ("MEETING_ENDED", result_text, "The meeting has ended."), False
+                return ("WAIT", result_text, speak_fallback), False
+        else:
+            logger.error("Ollama returned an empty vision response")
+            return ("WAIT", "Model Error", "I encountered an error."), False
+
 class ZoomBot:
-    def __init__(self):
+    def __init__(self, bot_id="default", speaker_sink="SpeakerSink", mic_sink="MicSink",
+                 mic_source="MicSource", work_dir="/tmp"):
+        self.bot_id = bot_id
+        self.speaker_sink = speaker_sink
+        self.mic_sink = mic_sink
+        self.mic_source = mic_source
+        self.work_dir = work_dir
+        os.makedirs(work_dir, exist_ok=True)
         self.driver = None
+        self.browser = None
         self.status = "IDLE"
-        self.recognizer = sr.Recognizer()
+        self.meeting_url = None
+        self.joined_at = None
+        self.last_decision = None
+        self.join_timings = []
+        self.last_join_page_load_ms = None
+        self.conversation = None
+        # Vision calls run here so the driver thread can keep watching the DOM
+        self.vision_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"vision-{bot_id}")
         self.is_listening = False
-        # Use default mic (which start.sh sets to SpeakerSink.monitor)
-        self.mic_index = None 
+        self.partial_text = ""
+        # Memory search started from partial transcripts, picked up by ask_llm
+        self.prefetch = RetrievalPrefetch(
+            long_term_instance,
+            min_words=config_instance.get("stt_prefetch_min_words", 4),
+            step_words=config_instance.get("stt_prefetch_step_words", 3),
+        )
+        # Persistent capture of what Zoom plays (SpeakerSink.monitor), decoded as it streams in
+        self.capture = AudioCapture(source=f"{speaker_sink}.monitor", queue_segments=False)
+        self.transcriber = StreamingTranscriber(stt_instance, on_partial=self._on_partial)
+        self.capture.add_listener(self.transcriber)
+        self.capture.add_listener(self._on_capture_event)
+        # In-process playback into MicSink (Zoom's microphone)
+        self.playback = PlaybackEngine(sink=mic_sink)
+        self.active_pipeline = None
+        warm_shared()
         self.memory = MemoryManager() 
+        self.apply_config()
+
+    def browser_key(self):
+        return browser_pool_instance.key(self.speaker_sink, self.mic_source)
 
     def start_browser(self):
-        """Initializes the Selenium Chrome Driver with Audio support."""
+        """Takes a (normally pre-launched) Chrome for this bot's audio devices from the browser pool."""
         logger.info("Starting Chrome Browser...")
-        options = Options()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--use-fake-ui-for-media-stream") # Auto-allow mic/cam
-        options.add_argument("--window-size=1280,720")
-        
-        # Audio Flags
-        options.add_argument("--autoplay-policy=no-user-gesture-required")
-        
         try:
-            self.driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=options
-            )
+            self.browser = browser_pool_instance.acquire(self.browser_key())
+            self.driver = self.browser.driver
             self.status = "BROWSER_READY"
             logger.info("Chrome Started Successfully.")
         except Exception as e:
             logger.error(f"Failed to start Chrome: {e}")
             self.status = "ERROR"
 
-    def speak(self, text):
-        """Uses TTSManager to generate speech and plays it via mpg123 into MicSink."""
+    def speak(self, text, block=True):
+        """
+        Uses TTSManager to generate speech and queues it on the PlaybackEngine (MicSink).
+        With block=False it returns as soon as the clip is queued.
+        """
         try:
             logger.info(f"Speaking: {text}")
             
-            # Generate Audio File
-            success = tts_instance.speak(text, "/tmp/speech.mp3")
+            # Generate Audio File (unique per call: speak() may run from several threads)
+            speech_file = os.path.join(self.work_dir, f"speech_{uuid.uuid4().hex}.mp3")
+            try:
+                success = tts_instance.speak(text, speech_file)
+                pcm = self.playback.decode(speech_file) if success else None
+            finally:
+                if os.path.exists(speech_file):
+                    os.remove(speech_file)
             
-            if success:
-                # Play to MicSink so Zoom hears it
-                os.system("PULSE_SINK=MicSink mpg123 -q /tmp/speech.mp3") 
+            if pcm:
+                self.playback.play(pcm, block=block)
         except Exception as e:
             logger.error(f"TTS Error: {e}")
 
-    def listen(self):
-        """Listens for audio input via PulseAudio Default Source (Force SpeakerSink.monitor)."""
-        try:
-            # Force PyAudio to use SpeakerSink.monitor as 'default'
-            original_source = os.environ.get("PULSE_SOURCE")
-            os.environ["PULSE_SOURCE"] = "SpeakerSink.monitor"
-            
-            try:
-                # Re-initialize recognizer to pick up new env var? 
-                # Actually, sr.Microphone() creates PyAudio instance on enter.
-                with sr.Microphone() as source:
-                    logger.info("Listening to SpeakerSink.monitor...")
-                    self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                    logger.info(f"Energy Threshold: {self.recognizer.energy_threshold}")
-                    
-                    try:
-                        audio = self.recognizer.listen(source, timeout=10, phrase_time_limit=15)
-                        logger.info(f"Audio captured! Size: {len(audio.get_raw_data())} bytes")
-                    except sr.WaitTimeoutError:
-                        logger.warning("Listening timed out (No speech detected).")
-                        return None
-            finally:
-                # Restore environment
-                if original_source:
-                    os.environ["PULSE_SOURCE"] = original_source
+    def _on_capture_event(self, event, frame):
+        """Barge-in: a participant started talking while we are speaking."""
+        mode = config_instance.get("barge_in", "stop")
+        if event in ("speech_end", "speech_discard"):
+            self.playback.unduck()
+        elif event == "speech_start" and mode != "off":
+            # A reply in progress counts even between two sentences, when nothing is playing
+            pipeline = self.active_pipeline
+            if pipeline is None and not self.playback.is_playing:
+                return
+            if mode == "duck":
+                self.playback.duck()
+            else:
+                logger.info("Barge-in detected, stopping playback.")
+                if pipeline:
+                    pipeline.cancel()
                 else:
-                    del os.environ["PULSE_SOURCE"]
+                    self.playback.stop()
 
-            try:
-                # Using Google STT for lightweight speed 
-                text = self.recognizer.recognize_google(audio)
-                logger.info(f"Heard: {text}")
-                self.memory.add_entry("User", text)
-                return text
-            except sr.UnknownValueError:
-                logger.info("STT: Could not understand audio (Unintelligible).")
-                return None
-            except sr.RequestError as e:
-                logger.error(f"STT Service Error: {e}")
+    def listen(self, timeout=1.0):
+        """Returns the next transcript produced by the streaming recognizer, if any."""
+        try:
+            text = self.transcriber.get(timeout=timeout)
+            if not text:
                 return None
+            self.partial_text = ""
+            logger.info(f"Heard: {text}")
+            self.memory.add_entry("User", text)
+            return text
         except Exception as e:
             logger.error(f"Mic Error: {e}")
             return None
 
+    def _on_partial(self, text):
+        self.partial_text = text
+        logger.debug(f"Hearing: {text}")
+        conversation = self.conversation
+        self.prefetch.update(text, exclude=conversation.recent_text() if conversation else "")
+
     def start_conversation_loop(self):
         """Main listening loop once in the meeting."""
         self.is_listening = True
         logger.info("--- Starting Conversation Loop ---")
+        self.capture.start()
         self.speak("I am now listening.")
         
         while self.is_listening:
@@ -200,77 +409,125 @@ class ZoomBot:
             user_input = self.listen()
             
             if user_input:
-                # 2. Think (LLM)
-                response_text = self.ask_llm(user_input)
-                
-                # 3. Speak
-                if response_text:
-                    self.speak(response_text)
+                # 2. Think (LLM) + 3. Speak, streamed sentence by sentence
+                self.respond(user_input)
             
             # Check if meeting ended (Quick vision check logic or status check)
             if self.status != "IN_MEETING":
                 break
         
+        self.capture.stop()
         logger.info("Conversation Loop Ended.")
 
-    def ask_llm(self, text):
-        """Sends text to Ollama for a chat response."""
-        context = self.memory.get_recent_context(limit=10)
-        
-        prompt = f"""You are a helpful AI assistant in a Zoom meeting.
-        
-CONTEXT (Recent Conversation):
-{context}
+    def respond(self, text):
+        """Streams the LLM reply into the TTS pipeline so speech starts after the first sentence."""
+        timer = TurnTimer()
+        pipeline = SpeechPipeline(self.playback, work_dir=self.work_dir, timer=timer)
+        self.active_pipeline = pipeline
+        try:
+            return self.ask_llm(text, on_sentence=pipeline.submit, timer=timer, cancel=pipeline.cancelled)
+        finally:
+            pipeline.close()
+            self.active_pipeline = None
 
-CURRENT INPUT: {text}
+    def get_conversation(self):
+        """Chat state for the current session (a new one when the session changed)."""
+        session_id = self.memory.current_session_id
+        if self.conversation is None or self.conversation.session_id != session_id:
+            self.conversation = Conversation(session_id)
+        return self.conversation
 
-RESPONSE (Brief and natural):"""
+    def ask_llm(self, text, on_sentence=None, timer=None, cancel=None):
+        """
+        Sends text to Ollama /api/chat for a response, consuming the NDJSON token stream.
+        The session's Conversation keeps an append-only message list so Ollama reuses
+        its KV cache and only prefills the new turn.
+        Each complete sentence is passed to `on_sentence` as soon as it is generated.
+        Setting the `cancel` event (barge-in) closes the stream so Ollama stops generating.
+        """
+        conversation = self.get_conversation()
+        # Usually already fetched from the partial transcript; otherwise bounded by
+        # ltm_search_timeout / ltm_token_budget, empty if unavailable
+        memories = self.prefetch.take(text)
+        if memories is None:
+            memories = long_term_instance.retrieve(text, exclude=conversation.recent_text())
+        if timer: timer.mark("memories")
+        messages = conversation.build(text, memories)
 
+        model = model_instance.chat_model()
         payload = {
-            "model": CHAT_MODEL,
-            "prompt": prompt,
-            "stream": False
+            "model": model,
+            "messages": messages,
+            "stream": True
         }
+        timer = timer or TurnTimer()
+        chunker = SentenceChunker()
+        tokens = []
+        done_chunk = None
         try:
-            resp = requests.post(OLLAMA_URL, json=payload, timeout=20)
-            if resp.status_code == 200:
-                response = resp.json().get("response", "").strip()
-                self.memory.add_entry("Agent", response)
-                return response
+            with model_instance.slot(model, cancel=cancel) as keep_alive:
+                payload["keep_alive"] = keep_alive
+                with backend_instance.get("ollama").post(OLLAMA_CHAT, json=payload, stream=True) as resp:
+                    if resp.status_code != 200:
+                        logger.error(f"Ollama Error: {resp.text}")
+                    else:
+                        for line in resp.iter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            token = chunk.get("message", {}).get("content", "")
+                            if token:
+                                timer.mark("first_token")
+                                tokens.append(token)
+                                for sentence in chunker.feed(token):
+                                    if on_sentence: on_sentence(sentence)
+                            if chunk.get("done"):
+                                model_instance.record(model, chunk)
+                                done_chunk = chunk
+                                break
+                            if cancel is not None and cancel.is_set():
+                                logger.info("Reply interrupted, closing LLM stream.")
+                                break
+
+                        rest = chunker.flush()
+                        if rest and on_sentence: on_sentence(rest)
+                        timer.mark("llm_done")
+
+                        response = "".join(tokens).strip()
+                        if response:
+                            conversation.commit(text, response, done_chunk)
+                            self.memory.add_entry("Agent", response)
+                            return response
         except Exception as e:
             logger.error(f"LLM Error: {e}")
-        return "I didn't quite catch that."
 
-    def check_meeting_status_via_dom(self):
+        fallback = "I didn't quite catch that."
+        if not tokens and on_sentence: on_sentence(fallback)
+        return fallback
+
+    def join_meeting(self, join_url: str, name: str, on_event=None, requested_at=None):
         """
-        Checks DOM for indicators that we are successfully IN the meeting.
-        This overrides the Vision Model if it's hallucinating.
+        Runs the join flow. `on_event(event, **data)` receives progress
+        (navigation, each vision decision and action) for API streaming.
+        `requested_at` (epoch seconds, e.g. when POST /join was accepted) is the
+        start of the page-load timing; defaults to now.
         """
-        try:
-            # 1. Check for 'Leave' or 'End' button
-            leave_btn = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'Leave') or contains(@aria-label, 'Leave')]")
-            if leave_btn: return "IN_MEETING"
-            
-            # 2. Check for 'Mute' / 'Unmute' button
-            mute_btn = self.driver.find_elements(By.XPATH, "//button[contains(@aria-label, 'mute') or contains(@aria-label, 'unmute')]")
-            if mute_btn: return "IN_MEETING"
-            
-            # 3. Check for 'Chat' or 'Participants'
-            footer_btns = self.driver.find_elements(By.CLASS_NAME, "footer-button__button")
-            if len(footer_btns) > 2: return "IN_MEETING"
-            
-            return None
-        except:
-            return None
+        requested_at = requested_at or time.time()
+        emit = on_event or (lambda event, **data: None)
+        self.status = "JOINING"
+        self.meeting_url = join_url
+        emit("status", status=self.status)
 
-    def join_meeting(self, join_url: str, name: str):
+        # Load the vision model while the browser navigates
+        model_instance.warmup_async([model_instance.vision_model()])
         if not self.driver: self.start_browser()
         if not self.driver: return False, "Driver Failed"
 
         try:
             logger.info(f"Navigating: {join_url}")
+            emit("navigate", url=join_url)
             self.memory.start_session(join_url)
-            self.speak(f"Navigating to Zoom meeting.")
+            self.speak(f"Navigating to Zoom meeting.", block=False)
             
             # Try efficient URL first
             if "/j/" in join_url and "wc" not in join_url:
@@ -286,28 +543,43 @@ RESPONSE (Brief and natural):"""
             else:
                 self.driver.get(join_url)
             
-            logger.info("Page loaded. Entering Vision Loop...")
+            # Request -> first page load: browser acquire plus navigation, the part the pool should keep short
+            self.last_join_page_load_ms = round((time.time() - requested_at) * 1000)
+            emit("page_loaded", page_load_ms=self.last_join_page_load_ms,
+                 browser_acquire_ms=browser_pool_instance.last_acquire_ms)
+            logger.info(f"Page loaded {self.last_join_page_load_ms} ms after the join request. Entering Vision Loop...")
             
-            # Smart Loop: Retry up to 15 times
+            # Event-driven loop: each cycle waits for the page to react rather than a fixed sleep
             success = False
-            for i in range(15):
-                logger.info(f"--- Vision Cycle {i+1}/15 ---")
+            tracker = FrameTracker()
+            max_cycles = config_instance.get("join_max_cycles", 15)
+            settle_timeout = config_instance.get("join_settle_timeout", 3.0)
+            self.join_timings = []
+            page = join_state_instance.probe(self.driver)
+            for i in range(max_cycles):
+                logger.info(f"--- Vision Cycle {i+1}/{max_cycles} ---")
+                emit("cycle", cycle=i + 1)
+                timer = TurnTimer()
                 
-                # FAST PATH: Check DOM first!
-                dom_status = self.check_meeting_status_via_dom()
-                if dom_status == "IN_MEETING":
-                    logger.info("DOM CHECK: Successfully detected meeting interface!")
-                    action = "END_SUCCESS"
-                    reasoning = "DOM elements found (Leave/Mute buttons)"
-                    speech = None # Wait for explicit hello
+                # FAST PATH: Deterministic DOM/text rules (reuses the probe from the last wait)
+                dom_decision = join_state_instance.match(page)
+                timer.mark("dom")
+                if dom_decision:
+                    action, reasoning, speech, rule = dom_decision
+                    join_state_instance.record(rule)
+                    source = "dom"
                 else:
-                    # SLOW PATH: Vision Model
-                    action, reasoning, speech = VisionHelper.decide_action(self.driver, name, join_url)
+                    # SLOW PATH: Vision Model, cancelled if the DOM resolves first
+                    action, reasoning, speech, source, page = self._vision_decision(name, join_url, tracker, page, timer)
                 
-                logger.info(f"DECISION: {action} | REASON: {reasoning}")
+                logger.info(f"DECISION ({source}): {action} | REASON: {reasoning}")
+                self.last_decision = {"cycle": i + 1, "action": action, "reasoning": reasoning, "source": source, "time": time.time()}
+                emit("decision", **self.last_decision, speech=speech)
                 
-                if speech: self.speak(speech)
+                if speech: self.speak(speech, block=False)
                 
+                signature = page_signature(page)
+                wait_timeout = settle_timeout
                 if action == "CLICK_LAUNCH":
                     self.perform_click_launch()
                 elif action == "ENTER_NAME":
@@ -317,7 +589,7 @@ RESPONSE (Brief and natural):"""
                     self.perform_join_audio()
                 elif action == "SOLVE_CAPTCHA":
                     logger.warning("CAPTCHA Detected! Attempting to wait/retry instead of quitting.")
-                    time.sleep(5)
+                    wait_timeout = config_instance.get("join_captcha_timeout", 5.0)
                 elif action == "MEETING_ENDED":
                     self.speak("The meeting has ended. Goodbye.")
                     self.leave_meeting()
@@ -325,25 +597,108 @@ RESPONSE (Brief and natural):"""
                 elif action == "END_SUCCESS":
                     self.speak("Hello everyone, I have joined the meeting.")
                     self.status = "IN_MEETING"
+                    self.joined_at = time.time()
+                    emit("status", status=self.status)
                     success = True
+                    timer.mark("action")
+                    self._record_cycle(i + 1, action, source, timer, emit)
                     break # Exit Vision Loop, Enter Chat Loop
                 elif action == "WAIT":
                     pass
+                timer.mark("action")
+                emit("action", action=action)
                 
-                time.sleep(3)
+                poll = config_instance.get("join_poll_interval", 0.25)
+                quiet = config_instance.get("join_quiet_period", 0.3)
+                if source == "stale":
+                    # The page already moved mid-call; let the transition finish before the next capture
+                    page, settled = join_state_instance.wait_for_quiet(
+                        self.driver, timeout=wait_timeout, poll=poll, quiet=quiet)
+                    timer.mark("settled" if settled else "settle_timeout")
+                else:
+                    page, changed = join_state_instance.wait_for_change(
+                        self.driver, signature, timeout=wait_timeout, poll=poll, quiet=quiet)
+                    timer.mark("settled" if changed else "settle_timeout")
+                self._record_cycle(i + 1, action, source, timer, emit)
 
+            join_state_instance.log_coverage()
             if success:
                 # Start Conversation Thread (Non-blocking)
+                model_instance.warmup_async([model_instance.chat_model()])
                 threading.Thread(target=self.start_conversation_loop, daemon=True).start()
                 return True, "Joined & Listening"
             else:
+                self.status = "BROWSER_READY" if self.driver else "IDLE"
                 return False, "Timed out trying to join."
 
         except Exception as e:
             logger.error(f"Error: {e}")
             self.speak("I encountered an error joining the meeting.")
+            self.status = "ERROR"
             return False, str(e)
             
+    def _vision_decision(self, name, join_url, tracker, page, timer):
+        """
+        Runs the vision model on a worker while the driver thread keeps probing the
+        DOM. The call is cancelled when a DOM rule matches, the page changes under
+        it (its frame is stale) or it runs past `vision_timeout` seconds.
+        Returns (action, reasoning, speech, source, page).
+        """
+        try:
+            decision, frame = VisionHelper.capture(self.driver, tracker)
+        except Exception as e:
+            logger.error(f"Vision Decision Failed: {e}")
+            return "WAIT", str(e), "System failure.", "vision", page
+        timer.mark("capture")
+        if decision:
+            join_state_instance.record("vision_fallback")
+            return (*decision, "vision", page)
+
+        request = VisionRequest()
+        future = self.vision_pool.submit(VisionHelper.query, frame, name, join_url, tracker, request)
+        signature = page_signature(page)
+        poll = config_instance.get("join_poll_interval", 0.25)
+        deadline = time.monotonic() + config_instance.get("vision_timeout", 45)
+        while True:
+            try:
+                action, reasoning, speech = future.result(timeout=poll)
+                timer.mark("vision")
+                join_state_instance.record("vision_fallback")
+                return action, reasoning, speech, "vision", page
+            except FutureTimeout:
+                pass
+            except Exception as e:
+                logger.error(f"Vision Decision Failed: {e}")
+                return "WAIT", str(e), "System failure.", "vision", page
+
+            latest = join_state_instance.probe(self.driver)
+            dom_decision = join_state_instance.match(latest)
+            if dom_decision:
+                request.cancel()
+                timer.mark("vision_cancelled")
+                action, reasoning, speech, rule = dom_decision
+                join_state_instance.record(rule)
+                logger.info(f"DOM rule '{rule}' matched during vision call; cancelled it.")
+                return action, reasoning, speech, "dom", latest
+            if latest and page_signature(latest) != signature:
+                request.cancel()
+                timer.mark("vision_cancelled")
+                logger.info("Page changed during vision call; re-evaluating.")
+                return "WAIT", "Page changed during vision call", None, "stale", latest
+            if time.monotonic() >= deadline:
+                request.cancel()
+                timer.mark("vision_timeout")
+                logger.warning("Vision call timed out; cancelled it.")
+                return "WAIT", "Vision call timed out", None, "vision", latest or page
+
+    def _record_cycle(self, cycle, action, source, timer, emit):
+        """Keeps and emits the per-cycle timing breakdown (ms since cycle start)."""
+        timings = timer.summary()
+        entry = {"cycle": cycle, "action": action, "source": source, "timings": timings}
+        self.join_timings.append(entry)
+        emit("timing", **entry)
+        logger.info(f"Cycle {cycle} timings ({source}): " + " ".join(f"{k}={v}ms" for k, v in timings.items()))
+
     def perform_join_audio(self):
         logger.info("Executing CLICK_JOIN_AUDIO...")
         try:
@@ -396,10 +751,13 @@ RESPONSE (Brief and natural):"""
             # Clear and Send Keys (Simulates real typing)
             input_field.clear()
             input_field.send_keys(name)
-            time.sleep(1) 
             
-            # Locate and Click Join Button
+            # Locate Join Button; wait (short polls) for it to enable instead of a fixed sleep
             join_btn = self.driver.find_element(By.CSS_SELECTOR, 'button.preview-join-button')
+            try:
+                WebDriverWait(self.driver, 3, poll_frequency=0.1).until(lambda d: join_btn.is_enabled())
+            except TimeoutException:
+                pass
             # Check if enabled
             if join_btn.is_enabled():
                 join_btn.click()
@@ -415,19 +773,52 @@ RESPONSE (Brief and natural):"""
 
     def leave_meeting(self):
         self.is_listening = False # Stop loop
+        self.playback.stop()
         self.memory.end_session()
-        if self.driver:
-            self.driver.quit()
+        if self.browser:
+            # Back to the pool (reset, or recycled if worn out) instead of a full quit
+            browser_pool_instance.release(self.browser)
+            self.browser = None
             self.driver = None
-            self.status = "IDLE"
-            logger.info("Browser Closed.")
+            logger.info("Browser Released.")
+        self.status = "IDLE"
+        self.meeting_url = None
+        self.joined_at = None
 
-    def get_status(self):
-        return {"status": self.status, "listening": self.is_listening}
+    def shutdown(self):
+        """Releases everything this bot owns (browser, vision workers, audio threads/processes)."""
+        self.leave_meeting()
+        self.vision_pool.shutdown(wait=False, cancel_futures=True)
+        self.capture.stop()
+        self.transcriber.stop()
+        self.playback.close()
 
-    def reload_config(self):
-        config_instance.load_config()
-        logger.info("Bot configuration reloaded.")
+    def get_status(self):
+        return {
+            "bot_id": self.bot_id,
+            "status": self.status,
+            "listening": self.is_listening,
+            "speaking": self.playback.is_playing,
+            "hearing": self.partial_text,
+            "meeting_url": self.meeting_url,
+            "session_id": self.memory.current_session_id,
+            "joined_at": self.joined_at,
+            "last_decision": self.last_decision,
+            "join_timings": self.join_timings,
+            "last_join_page_load_ms": self.last_join_page_load_ms,
+            "conversation": self.conversation.stats() if self.conversation else None,
+            "tts_cache": tts_instance.cache.stats(),
+            "vision": vision_cache_instance.stats(),
+            "join_rules": join_state_instance.stats(),
+            "long_term": {**long_term_instance.stats(), "prefetch": self.prefetch.stats()},
+            "models": model_instance.stats(),
+            "browsers": browser_pool_instance.stats(),
+        }
 
-# Instantiate Global Bot
-bot_instance = ZoomBot()
+    def apply_config(self):
+        """Applies the per-bot parts of the config (warm browsers); see reload_shared_config for the rest."""
+        if config_instance.get("browser_prewarm", True):
+            browser_pool_instance.register(self.browser_key())
+        else:
+            browser_pool_instance.drain(self.browser_key())
+        logger.info(f"Bot {self.bot_id} configuration applied.")
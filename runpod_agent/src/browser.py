@@ -0,0 +1,313 @@
+import os
+import time
+import logging
+import threading
+from src.config import config_instance
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger("BrowserPool")
+
+_driver_path = None
+_driver_lock = threading.Lock()
+
+def driver_path(refresh=False):
+    """
+    Chromedriver binary, resolved once per process. CHROMEDRIVER_PATH (or the
+    chromedriver_path config key) wins; otherwise webdriver-manager resolves it
+    and the result is remembered in chromedriver_cache across restarts.
+    """
+    global _driver_path
+    with _driver_lock:
+        pinned = os.getenv("CHROMEDRIVER_PATH") or config_instance.get("chromedriver_path")
+        if pinned:
+            return pinned
+        cache_file = config_instance.get("chromedriver_cache", "/workspace/chromedriver_path")
+        if _driver_path and not refresh:
+            return _driver_path
+        if not refresh:
+            try:
+                with open(cache_file, "r") as f:
+                    cached = f.read().strip()
+                if cached and os.path.exists(cached):
+                    _driver_path = cached
+                    return _driver_path
+            except OSError:
+                pass
+
+        start = time.monotonic()
+        _driver_path = ChromeDriverManager().install()
+        logger.info(f"Resolved chromedriver {_driver_path} in {(time.monotonic() - start) * 1000:.0f} ms")
+        try:
+            with open(cache_file, "w") as f:
+                f.write(_driver_path)
+        except OSError as e:
+            logger.warning(f"Could not cache chromedriver path: {e}")
+        return _driver_path
+
+def chrome_options():
+    options = Options()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--use-fake-ui-for-media-stream") # Auto-allow mic/cam
+    options.add_argument("--window-size=1280,720")
+
+    # Audio Flags
+    options.add_argument("--autoplay-policy=no-user-gesture-required")
+    return options
+
+def process_tree_rss_mb(pid):
+    """Resident memory (MB) of `pid` and all its descendants, from /proc."""
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            rss_pages[int(entry)] = int(fields[21])
+        except (OSError, IndexError, ValueError):
+            continue
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        total += rss_pages.get(p, 0)
+        stack.extend(children.get(p, []))
+    return total * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+
+class PooledBrowser:
+    def __init__(self, driver, key):
+        self.driver = driver
+        self.key = key
+        self.uses = 0
+        self.created = time.time()
+        self.baseline_rss_mb = self.rss_mb()
+
+    def pid(self):
+        try:
+            return self.driver.service.process.pid
+        except Exception:
+            return None
+
+    def rss_mb(self):
+        pid = self.pid()
+        if pid is None:
+            return None
+        try:
+            return process_tree_rss_mb(pid)
+        except OSError:
+            return None
+
+    def healthy(self):
+        try:
+            if self.driver.service.process.poll() is not None:
+                return False
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def visited_origins(self):
+        """
+        Origins to wipe on reset: the configured `browser_clear_origins`, the pages
+        still open, and every host that set a cookie (Zoom hops between zoom.us,
+        app.zoom.us and regional subdomains such as us05web.zoom.us).
+        """
+        origins = set(config_instance.get("browser_clear_origins", ["https://zoom.us", "https://app.zoom.us"]))
+        for handle in self.driver.window_handles:
+            self.driver.switch_to.window(handle)
+            origin = self.driver.execute_script("return location.origin")
+            if origin and origin.startswith("http"):
+                origins.add(origin)
+        for cookie in self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", []):
+            domain = cookie.get("domain", "").lstrip(".")
+            if domain:
+                origins.add(f"https://{domain}")
+        return origins
+
+    def reset(self):
+        """Drops meeting state so the next join starts from a clean profile. Returns False on failure."""
+        try:
+            origins = self.visited_origins()
+            handles = self.driver.window_handles
+            for handle in handles[1:]:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(handles[0])
+            # Zoom asks "leave site?" on unload; sessionStorage is per tab, so clear it while still there
+            self.driver.execute_script(
+                "window.onbeforeunload = null; try { sessionStorage.clear(); } catch (e) {}"
+            )
+            self.driver.get("about:blank")
+            # Cookies, local storage, IndexedDB, service workers and Cache Storage of every visited origin
+            for origin in origins:
+                self.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            self.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            return True
+        except Exception as e:
+            logger.warning(f"Browser reset failed: {e}")
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Browser quit failed: {e}")
+
+class BrowserPool:
+    """
+    Keeps pre-launched Chrome instances warm so a join only has to navigate.
+
+    Browsers are keyed by their audio routing (PULSE_SINK, PULSE_SOURCE), which
+    is fixed per process. register() asks for `browser_pool_size` idle browsers
+    for a key; they are launched in the background and replaced as they are
+    handed out. acquire() returns a healthy idle browser, or launches one inline
+    if none is ready. release() resets the browser (cookies, storage, extra
+    windows) and returns it to the pool, unless it has served `browser_max_uses`
+    meetings or its process tree grew by more than `browser_max_rss_growth_mb`,
+    in which case it is quit and replaced.
+    """
+    def __init__(self):
+        self.idle = {}
+        self.targets = {}
+        self.launching = {}
+        self.launches = 0
+        self.reuses = 0
+        self.recycled = 0
+        self.unhealthy = 0
+        self.last_acquire_ms = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(speaker_sink, mic_source):
+        return (speaker_sink, mic_source)
+
+    def register(self, key):
+        with self._lock:
+            self.targets[key] = config_instance.get("browser_pool_size", 1)
+            self.idle.setdefault(key, [])
+        self.replenish_async(key)
+
+    def drain(self, key):
+        """Quits the idle browsers for `key` and stops keeping it warm (its audio devices are gone)."""
+        with self._lock:
+            self.targets.pop(key, None)
+            idle = self.idle.pop(key, [])
+        for browser in idle:
+            browser.quit()
+
+    def _launch(self, key):
+        speaker_sink, mic_source = key
+        # Route this browser's audio to the bot's own sink/source pair
+        env = {**os.environ, "PULSE_SINK": speaker_sink, "PULSE_SOURCE": mic_source}
+        try:
+            driver = webdriver.Chrome(service=Service(driver_path(), env=env), options=chrome_options())
+        except Exception as e:
+            # A Chrome upgrade can outdate the cached driver; resolve again once
+            logger.warning(f"Chrome launch failed ({e}); re-resolving chromedriver.")
+            driver = webdriver.Chrome(service=Service(driver_path(refresh=True), env=env), options=chrome_options())
+        driver.get("about:blank")
+        with self._lock:
+            self.launches += 1
+        return PooledBrowser(driver, key)
+
+    def replenish_async(self, key):
+        threading.Thread(target=self._replenish, args=(key,), name="BrowserWarm", daemon=True).start()
+
+    def _replenish(self, key):
+        while True:
+            with self._lock:
+                if key not in self.targets:
+                    return
+                if len(self.idle[key]) + self.launching.get(key, 0) >= self.targets[key]:
+                    return
+                self.launching[key] = self.launching.get(key, 0) + 1
+            try:
+                start = time.monotonic()
+                browser = self._launch(key)
+                logger.info(f"Warm browser ready for {key[0]} in {(time.monotonic() - start) * 1000:.0f} ms")
+            except Exception as e:
+                logger.error(f"Failed to pre-launch Chrome: {e}")
+                return
+            finally:
+                with self._lock:
+                    self.launching[key] -= 1
+            with self._lock:
+                if key in self.targets:
+                    self.idle[key].append(browser)
+                    browser = None
+            if browser:
+                browser.quit() # Drained while launching
+
+    def acquire(self, key):
+        """A ready browser for `key` (warm if possible). Raises if Chrome cannot be started."""
+        start = time.monotonic()
+        browser = None
+        while browser is None:
+            with self._lock:
+                idle = self.idle.get(key)
+                candidate = idle.pop(0) if idle else None
+            if candidate is None:
+                break
+            if candidate.healthy():
+                browser = candidate
+                if candidate.uses:
+                    with self._lock:
+                        self.reuses += 1
+            else:
+                with self._lock:
+                    self.unhealthy += 1
+                candidate.quit()
+
+        warm = browser is not None
+        if browser is None:
+            browser = self._launch(key)
+        if key in self.targets:
+            self.replenish_async(key)
+        self.last_acquire_ms = round((time.monotonic() - start) * 1000)
+        logger.info(f"Browser acquired in {self.last_acquire_ms} ms ({'warm' if warm else 'cold'}, use {browser.uses + 1})")
+        return browser
+
+    def release(self, browser):
+        """Returns a browser after a meeting; recycles it when worn out."""
+        browser.uses += 1
+        rss = browser.rss_mb()
+        grown = rss is not None and browser.baseline_rss_mb is not None and \
+            rss - browser.baseline_rss_mb > config_instance.get("browser_max_rss_growth_mb", 800)
+        worn = browser.uses >= config_instance.get("browser_max_uses", 20)
+
+        keep = False
+        if not (grown or worn) and browser.reset():
+            with self._lock:
+                if browser.key in self.targets and len(self.idle[browser.key]) < self.targets[browser.key]:
+                    self.idle[browser.key].append(browser)
+                    keep = True
+        if not keep:
+            if grown or worn:
+                logger.info(f"Recycling browser after {browser.uses} uses (rss {rss} MB, baseline {browser.baseline_rss_mb} MB)")
+                with self._lock:
+                    self.recycled += 1
+            browser.quit()
+            if browser.key in self.targets:
+                self.replenish_async(browser.key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "idle": {f"{sink}/{source}": len(b) for (sink, source), b in self.idle.items()},
+                "launching": sum(self.launching.values()),
+                "launches": self.launches,
+                "reuses": self.reuses,
+                "recycled": self.recycled,
+                "unhealthy": self.unhealthy,
+                "last_acquire_ms": self.last_acquire_ms,
+                "driver_path": _driver_path,
+            }
+
+# Global Instance
+browser_pool_instance = BrowserPool()
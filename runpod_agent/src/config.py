@@ -12,6 +12,60 @@ class ConfigManager:
             "tts_api_url": "http://chatterbox:8000/v1",
             "tts_api_key": "",
             "tts_voice_id": "default",
+            "tts_cache_dir": "/workspace/tts_cache",
+            "tts_cache_memory_mb": 32,
+            "tts_cache_disk_mb": 512,
+            "stt_provider": "google", # google | vosk | whisper
+            "stt_model_path": "/workspace/models/vosk-model-small-en-us-0.15",
+            "stt_whisper_model": "base.en",
+            "stt_language": "en",
+            "stt_prefetch_min_words": 4,
+            "stt_prefetch_step_words": 3,
+            "barge_in": "stop", # stop | duck | off
+            "ollama_timeout": 60,
+            "tts_timeout": 10,
+            "http_pool_size": 10,
+            "http_retries": 2,
+            "http_backoff": 0.3,
+            "pool_max_bots": 4,
+            "pool_max_load_per_cpu": 0.85,
+            "pool_min_free_mem_mb": 1024,
+            "pool_bot_mem_mb": 1500,
+            "vision_cache_path": "/workspace/vision_cache.json",
+            "vision_cache_max_distance": 2,
+            "vision_max_side": 768,
+            "vision_format": "jpeg",
+            "vision_quality": 70,
+            "vision_crop_dialog": False,
+            "vision_record_dir": None,
+            "vision_timeout": 45,
+            "transcript_flush_every": 1,
+            "transcript_fsync_interval": 2.0,
+            "ltm_enabled": True,
+            "ltm_backend": "numpy",
+            "ltm_path": "/workspace/memory/vectors",
+            "ltm_token_budget": 300,
+            "ltm_top_k": 6,
+            "ltm_search_timeout": 0.3,
+            "ltm_search_mode": "hybrid", # hybrid | vector
+            "ollama_keep_alive": "30m",
+            "ollama_affinity_ms": 2000,
+            "ollama_queue_timeout": 60,
+            "ollama_ps_interval": 30,
+            "chat_history_budget": 1200,
+            "chat_keep_tokens": 500,
+            "chat_summary_words": 120,
+            "browser_prewarm": True,
+            "browser_pool_size": 1,
+            "browser_max_uses": 20,
+            "browser_clear_origins": ["https://zoom.us", "https://app.zoom.us"],
+            "browser_max_rss_growth_mb": 800,
+            "chromedriver_cache": "/workspace/chromedriver_path",
+            "join_max_cycles": 15,
+            "join_poll_interval": 0.25,
+            "join_settle_timeout": 3.0,
+            "join_quiet_period": 0.3,
+            "join_captcha_timeout": 5.0,
             "model_vision": "llama3.2-vision",
             "model_chat": "llama3.2-vision"
         }
@@ -0,0 +1,181 @@
+import time
+import logging
+import threading
+from collections import deque
+from src.config import config_instance
+from src.backends import backend_instance
+from src.models import model_instance
+from src.long_term import estimate_tokens
+
+logger = logging.getLogger("Conversation")
+
+OLLAMA_GENERATE = "/api/generate"
+
+# Never changes within a session, so Ollama can keep it in the KV cache
+SYSTEM_PROMPT = (
+    "You are a helpful AI assistant in a Zoom meeting. Messages from the meeting "
+    "are transcribed speech. Reply briefly and naturally, as you would speak."
+)
+
+MEMORY_HEADER = "RELEVANT MEMORIES (Earlier in this or past meetings):\n"
+
+SUMMARY_PROMPT = """Summarize this meeting conversation for your own later reference.
+Keep names, decisions, numbers and open questions. At most {words} words.
+
+{previous}CONVERSATION:
+{transcript}
+
+SUMMARY:"""
+
+class TurnMetrics:
+    def __init__(self, chunk, history_tokens):
+        self.prompt_tokens = chunk.get("prompt_eval_count", 0)
+        self.prefill_ms = round(chunk.get("prompt_eval_duration", 0) / 1e6, 1)
+        self.eval_tokens = chunk.get("eval_count", 0)
+        self.eval_ms = round(chunk.get("eval_duration", 0) / 1e6, 1)
+        self.history_tokens = history_tokens
+        self.time = time.time()
+
+    def to_dict(self):
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "prefill_ms": self.prefill_ms,
+            "eval_tokens": self.eval_tokens,
+            "eval_ms": self.eval_ms,
+            "history_tokens": self.history_tokens,
+        }
+
+class Conversation:
+    """
+    Chat state for one meeting session, sent to Ollama /api/chat.
+
+    The message list only ever grows at the end: a fixed system prompt, an
+    optional running summary, then user/assistant turns. Per-turn RAG memories
+    travel inside the user message of that request only; the stored turn is the
+    plain text, so old memories are neither re-sent nor folded into the summary.
+    The KV cache prefix of consecutive requests therefore runs up to the previous
+    user turn when it carried memories (or through the previous reply when it
+    did not), and Ollama prefills at most the last exchange plus the new turn.
+
+    When the history exceeds `chat_history_budget` tokens, the oldest turns are
+    folded into the summary by a background call to the chat model until the
+    recent turns fit in `chat_keep_tokens`. That rewrites the prefix once;
+    prefill then stays flat again until the next fold.
+    """
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.summary = ""
+        self.messages = []
+        self.turns = 0
+        self.folds = 0
+        self.metrics = deque(maxlen=config_instance.get("chat_metrics_window", 50))
+        self._lock = threading.Lock()
+        self._summarizing = False
+
+    def build(self, text, memories=""):
+        """Messages for the next request: the stored prefix plus the new user turn."""
+        content = f"{MEMORY_HEADER}{memories}\n\n{text}" if memories else text
+        user_message = {"role": "user", "content": content}
+        with self._lock:
+            prefix = [{"role": "system", "content": SYSTEM_PROMPT}]
+            if self.summary:
+                prefix.append({"role": "system", "content": f"Summary of the conversation so far:\n{self.summary}"})
+            return prefix + list(self.messages) + [user_message]
+
+    def commit(self, text, reply, chunk=None):
+        """
+        Appends a finished turn (even a partial, interrupted reply) and records prefill
+        metrics. `text` is the user's words as passed to build(), without memories.
+        """
+        with self._lock:
+            self.messages.append({"role": "user", "content": text})
+            self.messages.append({"role": "assistant", "content": reply})
+            self.turns += 1
+            history_tokens = self._history_tokens()
+            if chunk:
+                metrics = TurnMetrics(chunk, history_tokens)
+                self.metrics.append(metrics)
+                logger.info(f"Turn {self.turns}: prefill {metrics.prompt_tokens} tok in {metrics.prefill_ms} ms "
+                            f"(history {history_tokens} tok)")
+            needs_fold = history_tokens > config_instance.get("chat_history_budget", 1200) and not self._summarizing
+            if needs_fold:
+                self._summarizing = True
+        if needs_fold:
+            threading.Thread(target=self._fold, daemon=True).start()
+
+    def recent_text(self):
+        """Plain transcript of the kept turns (used to de-duplicate retrieved memories)."""
+        with self._lock:
+            return "\n".join(m["content"] for m in self.messages)
+
+    def _history_tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(m["content"]) for m in self.messages)
+
+    def _fold(self):
+        """Moves the oldest turns into the summary. On failure they are dropped instead."""
+        keep_tokens = config_instance.get("chat_keep_tokens", 500)
+        with self._lock:
+            # Oldest whole user/assistant pairs go; the latest pair always stays
+            remaining = sum(estimate_tokens(m["content"]) for m in self.messages)
+            count = 0
+            while count + 2 < len(self.messages) and remaining > keep_tokens:
+                remaining -= sum(estimate_tokens(m["content"]) for m in self.messages[count:count + 2])
+                count += 2
+            folded = self.messages[:count]
+            previous = self.summary
+        try:
+            if folded:
+                summary = self._summarize(previous, folded)
+                with self._lock:
+                    # Turns added meanwhile sit after the folded ones; only the front is replaced
+                    self.messages = self.messages[count:]
+                    if summary is not None:
+                        self.summary = summary
+                    self.folds += 1
+                logger.info(f"Folded {count} messages into the summary ({estimate_tokens(self.summary)} tok)")
+        finally:
+            with self._lock:
+                self._summarizing = False
+
+    def _summarize(self, previous, messages):
+        words = config_instance.get("chat_summary_words", 120)
+        transcript = "\n".join(f"{'Assistant' if m['role'] == 'assistant' else 'Meeting'}: {m['content']}"
+                               for m in messages)
+        prompt = SUMMARY_PROMPT.format(
+            words=words,
+            previous=f"PREVIOUS SUMMARY:\n{previous}\n\n" if previous else "",
+            transcript=transcript,
+        )
+        model = model_instance.chat_model()
+        try:
+            with model_instance.slot(model) as keep_alive:
+                resp = backend_instance.get("ollama").post(
+                    OLLAMA_GENERATE,
+                    json={"model": model, "prompt": prompt, "stream": False, "keep_alive": keep_alive},
+                )
+            if resp.status_code == 200:
+                summary = resp.json().get("response", "").strip()
+                if summary:
+                    return summary
+            logger.error(f"Summary request failed: {resp.status_code} {resp.text[:200]}")
+        except Exception as e:
+            logger.error(f"Summary request failed: {e}")
+        return None
+
+    def stats(self):
+        with self._lock:
+            metrics = [m.to_dict() for m in self.metrics]
+            history_tokens = self._history_tokens()
+        prefill = [m["prefill_ms"] for m in metrics]
+        prompt = [m["prompt_tokens"] for m in metrics]
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "messages": len(self.messages),
+            "history_tokens": history_tokens,
+            "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+            "folds": self.folds,
+            "avg_prefill_ms": round(sum(prefill) / len(prefill), 1) if prefill else 0.0,
+            "avg_prompt_tokens": round(sum(prompt) / len(prompt), 1) if prompt else 0.0,
+            "last_turn": metrics[-1] if metrics else None,
+        }
@@ -0,0 +1,139 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("JobMgr")
+
+class JobConflictError(RuntimeError):
+    """Raised by submit(unique=True) when a job of the same kind is already active for the bot."""
+    def __init__(self, job):
+        super().__init__(f"Job {job.id} ({job.kind}) is already active")
+        self.job = job
+
+class Job:
+    """A unit of background work (join, leave, TTS test) with an append-only event log."""
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def emit(self, event, **data):
+        """Records a progress event (thread-safe). Passed to the bot as its `on_event` hook."""
+        with self._lock:
+            self.events.append({"seq": len(self.events) + 1, "time": time.time(), "event": event, **data})
+
+    def events_since(self, seq):
+        with self._lock:
+            return self.events[seq:]
+
+    def to_dict(self, include_events=False):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_events:
+            data["events"] = self.events_since(0)
+        return data
+
+class JobManager:
+    """
+    Runs bot operations on a thread pool so API handlers return immediately.
+    Keeps the most recent `history` jobs for status queries and event replay.
+    """
+    def __init__(self, max_workers=4, history=100):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.jobs = OrderedDict()
+        self.history = history
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params=None, unique=False):
+        """
+        Schedules fn(job). Its return value becomes job.result; an exception fails the job.
+        With unique=True, raises JobConflictError if a `kind` job for the same bot_id is
+        still active (checked and registered atomically).
+        """
+        job = Job(kind, params)
+        with self._lock:
+            if unique:
+                active = self._find_active(kind, job.params.get("bot_id"))
+                if active:
+                    raise JobConflictError(active)
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history:
+                oldest_id, oldest = next(iter(self.jobs.items()))
+                if not oldest.done:
+                    break
+                del self.jobs[oldest_id]
+        self.executor.submit(self._run, job, fn)
+        logger.info(f"Job {job.id} ({kind}) queued.")
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.started_at = time.time()
+        job.emit("started")
+        try:
+            job.result = fn(job)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.emit("finished", status=job.status, result=job.result, error=job.error)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self, active_only=False):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [j for j in jobs if not (active_only and j.done)]
+
+    def _find_active(self, kind, bot_id):
+        return next((j for j in self.jobs.values()
+                     if not j.done and j.kind == kind and j.params.get("bot_id") == bot_id), None)
+
+    def find_active(self, kind, bot_id=None):
+        with self._lock:
+            return self._find_active(kind, bot_id)
+
+    async def stream(self, job, last_seq=0, poll_interval=0.25):
+        """Async generator of Server-Sent Events for a job, ending after its final event."""
+        seq = last_seq
+        while True:
+            for event in job.events_since(seq):
+                seq = event["seq"]
+                yield f"id: {seq}\nevent: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+                if event["event"] == "finished":
+                    return
+            await asyncio.sleep(poll_interval)
+
+# Global Instance
+job_instance = JobManager()
@@ -0,0 +1,168 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger("JoinState")
+
+# Collects everything the rules need in a single execute_script round trip.
+PAGE_PROBE_JS = """
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const label = el => (el.innerText || el.value || el.getAttribute('aria-label') || '').trim().toLowerCase();
+const all = sel => Array.from(document.querySelectorAll(sel)).filter(visible);
+return {
+    url: location.href,
+    text: (document.body ? document.body.innerText : '').slice(0, 5000).toLowerCase(),
+    buttons: all('button, a, [role="button"]').map(label).filter(t => t),
+    aria: all('[aria-label]').map(e => e.getAttribute('aria-label').toLowerCase()),
+    name_input: all('input[type="text"]').length > 0,
+    join_button: all('button.preview-join-button').length > 0,
+    captcha: all('iframe[src*="captcha"], iframe[title*="captcha" i], .g-recaptcha, #captcha').length > 0,
+    footer_buttons: all('.footer-button__button').length
+};
+"""
+
+def page_signature(page):
+    """Hashable summary of a probe; changes when the join flow moves to another screen."""
+    if not page:
+        return None
+    return (page["url"], tuple(page["buttons"]), tuple(page["aria"]), page["name_input"],
+            page["join_button"], page["captcha"], page["footer_buttons"])
+
+def _any(haystack, needles):
+    return any(n in item for item in haystack for n in needles)
+
+def _in_meeting(p):
+    # The preview/name screen has its own Mute/Unmute toggles, so "mute" only
+    # counts once the meeting footer is on screen
+    if p["join_button"]:
+        return False
+    return (_any(p["buttons"] + p["aria"], ["leave"]) or p["footer_buttons"] > 2
+            or (p["footer_buttons"] > 0 and _any(p["aria"], ["mute"])))
+
+# Ordered rules: (name, action, predicate, speech). First match wins.
+RULES = [
+    ("ended", "MEETING_ENDED",
+     lambda p: _any([p["text"]], ["meeting has ended", "host has ended", "thank you for attending",
+                                  "this meeting has been ended"]),
+     None),
+    ("captcha", "SOLVE_CAPTCHA",
+     lambda p: p["captcha"] or "i'm not a robot" in p["text"] or "i am not a robot" in p["text"],
+     "There is a CAPTCHA."),
+    ("audio_prompt", "CLICK_JOIN_AUDIO",
+     lambda p: _any(p["buttons"], ["join audio by computer", "join with computer audio"])
+               or (_in_meeting(p) and _any(p["buttons"] + p["aria"], ["join audio"])),
+     "Joining audio."),
+    ("in_meeting", "END_SUCCESS", _in_meeting, None),
+    ("name_entry", "ENTER_NAME",
+     lambda p: p["name_input"] and (p["join_button"] or "your name" in p["text"]),
+     "I am entering the name."),
+    ("launch_page", "CLICK_LAUNCH",
+     lambda p: _any(p["buttons"], ["launch meeting", "join from your browser"]),
+     "I see the launch button."),
+]
+
+class JoinStateClassifier:
+    """
+    Deterministic classifier for the Zoom web join flow.
+
+    One execute_script call gathers visible button labels, aria labels, inputs and
+    page text; ordered rules map that snapshot to a join action. When no rule
+    matches the caller falls back to the vision model. Per-rule hit counts are
+    kept so rule coverage (how often the expensive path runs) can be logged.
+    """
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.counts = {name: 0 for name, _, _, _ in rules}
+        self.counts["vision_fallback"] = 0
+        self._lock = threading.Lock()
+
+    def probe(self, driver):
+        """One execute_script snapshot of the page, or None if the probe failed."""
+        try:
+            return driver.execute_script(PAGE_PROBE_JS)
+        except Exception as e:
+            logger.warning(f"Page probe failed: {e}")
+            return None
+
+    def match(self, page):
+        """Returns (action, reasoning, speech, rule) for a probe, or None. Does not count."""
+        if not page:
+            return None
+        for name, action, predicate, speech in self.rules:
+            try:
+                matched = predicate(page)
+            except Exception:
+                matched = False
+            if matched:
+                return action, f"DOM rule '{name}' matched", speech, name
+        return None
+
+    def record(self, rule):
+        """Counts one decision by `rule` (or "vision_fallback")."""
+        with self._lock:
+            self.counts[rule] += 1
+
+    def classify(self, driver):
+        """Returns (action, reasoning, speech, rule) or None if no rule matches."""
+        decision = self.match(self.probe(driver))
+        self.record(decision[3] if decision else "vision_fallback")
+        return decision
+
+    def wait_for_change(self, driver, signature, timeout=3.0, poll=0.25, quiet=0.3):
+        """
+        Polls the page until its signature differs from `signature` and then stays
+        stable for `quiet` seconds (so multi-step transitions settle), or until
+        `timeout`. Returns (page, changed) with the latest probe.
+        """
+        deadline = time.monotonic() + timeout
+        page = self.probe(driver)
+        current = page_signature(page)
+        stable_since = time.monotonic()
+        changed = current != signature
+        while time.monotonic() < deadline:
+            if changed and time.monotonic() - stable_since >= quiet:
+                break
+            time.sleep(poll)
+            latest = self.probe(driver)
+            latest_sig = page_signature(latest)
+            if latest_sig != current:
+                current, stable_since = latest_sig, time.monotonic()
+            page = latest
+            changed = changed or current != signature
+        return page, changed
+
+    def wait_for_quiet(self, driver, timeout=3.0, poll=0.25, quiet=0.3):
+        """
+        Polls until the page signature stays the same for `quiet` seconds, or until
+        `timeout`. Used after the page moved under a vision call, when there is no
+        "before" signature left to wait on. Returns (page, settled).
+        """
+        deadline = time.monotonic() + timeout
+        page = self.probe(driver)
+        current = page_signature(page)
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
+            if time.monotonic() - stable_since >= quiet:
+                return page, True
+            time.sleep(poll)
+            page = self.probe(driver)
+            latest_sig = page_signature(page)
+            if latest_sig != current:
+                current, stable_since = latest_sig, time.monotonic()
+        return page, False
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            fallback = self.counts["vision_fallback"]
+            return {
+                "counts": dict(self.counts),
+                "rule_coverage": round((total - fallback) / total, 3) if total else 0.0,
+            }
+
+    def log_coverage(self):
+        stats = self.stats()
+        logger.info(f"Join rule coverage: {stats['rule_coverage']:.0%} {stats['counts']}")
+
+# Global Instance
+join_state_instance = JoinStateClassifier()
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from src.config import config_instance
+
+# Ensure we can import from services (repo checkout)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+try:
+    from services.memory.store import MemoryStore
+    IMPORT_ERROR = None
+except ImportError as e:
+    MemoryStore = None
+    IMPORT_ERROR = e
+
+logger = logging.getLogger("LongTermMemory")
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) for prompt budgeting."""
+    return max(1, len(text) // 4)
+
+def format_entry(entry):
+    return f"{entry['speaker']}: {entry['text']}"
+
+class TranscriptChunker:
+    """
+    Groups consecutive transcript entries of one session into chunks of about
+    `max_chars`, so a retrieved snippet carries its question and answer together.
+    """
+    def __init__(self, max_chars=600):
+        self.max_chars = max_chars
+        self.lines = []
+        self.size = 0
+        self.first_seq = 0
+        self.first_timestamp = None
+        self.seq = 0
+
+    def feed(self, entry):
+        """Returns a finished chunk (first_seq, text, first_timestamp) or None."""
+        line = format_entry(entry)
+        chunk = None
+        if self.lines and self.size + len(line) > self.max_chars:
+            chunk = self.flush()
+        if not self.lines:
+            self.first_seq = self.seq
+            self.first_timestamp = entry.get("timestamp")
+        self.lines.append(line)
+        self.size += len(line) + 1
+        self.seq += 1
+        return chunk
+
+    def flush(self):
+        if not self.lines:
+            return None
+        chunk = (self.first_seq, "\n".join(self.lines), self.first_timestamp)
+        self.lines, self.size = [], 0
+        return chunk
+
+class LongTermMemory:
+    """
+    Background transcript -> vector memory ingestion plus budgeted retrieval.
+
+    `submit` only enqueues (never blocks the reply path). A worker thread chunks
+    entries per session and writes chunks in batches via MemoryStore.add_memories,
+    with IDs "<session>:<seq>" so re-ingesting is idempotent. `retrieve` runs
+    hybrid search with a hard timeout and returns snippets that fit a token budget.
+    Disabled (no-ops) when services.memory is not importable or ltm_enabled is off.
+    """
+    def __init__(self):
+        self.enabled = config_instance.get("ltm_enabled", True) and MemoryStore is not None
+        self.batch_size = config_instance.get("ltm_batch_size", 16)
+        self.flush_interval = config_instance.get("ltm_flush_interval", 5.0)
+        self.chunk_chars = config_instance.get("ltm_chunk_chars", 600)
+        self.queue = queue.Queue(maxsize=config_instance.get("ltm_queue_size", 5000))
+        self.store = None
+        self.chunkers = {}
+        self.sessions = {}
+        self.pending = []
+        self.marker_path = config_instance.get("ltm_marker_path", "/workspace/memory/ltm_indexed.json")
+        self.indexed = set()
+        self.ingested = 0
+        self.dropped = 0
+        self._store_lock = threading.Lock()
+        self._search_workers = config_instance.get("ltm_search_workers", 2)
+        self._search_pool = ThreadPoolExecutor(max_workers=self._search_workers, thread_name_prefix="ltm-search")
+        # Searches that outlive ltm_search_timeout keep a worker busy; never queue more than the pool runs
+        self._search_slots = threading.BoundedSemaphore(self._search_workers)
+        self.search_timeouts = 0
+        self.search_skipped = 0
+        self._thread = None
+
+        if not self.enabled:
+            if MemoryStore is None:
+                logger.error(f"services.memory is not importable ({IMPORT_ERROR}); long-term memory is DISABLED. "
+                             "Is services/ in the image?")
+            return
+        self._thread = threading.Thread(target=self._run, name="LongTermMemory", daemon=True)
+        self._thread.start()
+
+    def _get_store(self):
+        with self._store_lock:
+            if self.store is None:
+                self.store = MemoryStore(
+                    qdrant_host=config_instance.get("ltm_qdrant_host", os.getenv("QDRANT_HOST", "local")),
+                    collection_name=config_instance.get("ltm_collection", "meeting_transcripts"),
+                    local_path=config_instance.get("ltm_path", "/workspace/memory/vectors"),
+                    backend=config_instance.get("ltm_backend", "numpy"),
+                )
+            return self.store
+
+    # --- Ingestion (background) ---
+
+    def start_session(self, session_id, meeting_url):
+        self._put(("start", session_id, meeting_url))
+
+    def submit(self, session_id, entry):
+        self._put(("entry", session_id, entry))
+
+    def end_session(self, session_id):
+        self._put(("end", session_id, None))
+
+    def _put(self, item):
+        if not self.enabled:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        # Load the store and encoder here, not on the first reply
+        try:
+            self._get_store().encoder.encode("warmup")
+            self.indexed = self._load_marker()
+            self.backfill(config_instance.get("ltm_transcripts_dir", "/workspace/memory/transcripts"))
+        except Exception as e:
+            logger.error(f"Long-term memory startup failed: {e}")
+
+        while True:
+            try:
+                kind, session_id, data = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Idle: make partially filled chunks searchable
+                for sid in list(self.chunkers):
+                    self._add_chunk(sid, self.chunkers[sid].flush())
+                self._write()
+                continue
+            self._handle(kind, session_id, data)
+
+    def _handle(self, kind, session_id, data):
+        if kind == "start":
+            self.sessions[session_id] = data
+            self.chunkers[session_id] = TranscriptChunker(self.chunk_chars)
+        elif kind == "entry":
+            chunker = self.chunkers.setdefault(session_id, TranscriptChunker(self.chunk_chars))
+            self._add_chunk(session_id, chunker.feed(data))
+        elif kind == "end":
+            chunker = self.chunkers.pop(session_id, None)
+            if chunker:
+                self._add_chunk(session_id, chunker.flush())
+            self._write()
+            self.sessions.pop(session_id, None)
+            self.indexed.add(session_id)
+            self._save_marker()
+
+        if len(self.pending) >= self.batch_size:
+            self._write()
+
+    def _add_chunk(self, session_id, chunk):
+        if not chunk:
+            return
+        first_seq, text, timestamp = chunk
+        metadata = {
+            "session_id": session_id,
+            "meeting_url": self.sessions.get(session_id),
+            "seq": first_seq,
+            "spoken_at": timestamp,
+        }
+        self.pending.append((f"{session_id}:{first_seq}", text, metadata))
+
+    def _write(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            stats = self._get_store().add_memories(
+                [(text, metadata) for _, text, metadata in batch],
+                ids=[memory_id for memory_id, _, _ in batch],
+                batch_size=self.batch_size,
+            )
+            self.ingested += stats["count"]
+        except Exception as e:
+            logger.error(f"Failed to ingest {len(batch)} transcript chunks: {e}")
+
+    def _load_marker(self):
+        try:
+            with open(self.marker_path, "r") as f:
+                return set(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return set()
+
+    def _save_marker(self):
+        try:
+            tmp_path = f"{self.marker_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(sorted(self.indexed), f)
+            os.replace(tmp_path, self.marker_path)
+        except OSError as e:
+            logger.error(f"Failed to save long-term memory marker: {e}")
+
+    def backfill(self, transcripts_dir):
+        """Indexes finished transcripts (<id>.json) that never were, e.g. from before this feature. Runs on the worker."""
+        if not os.path.isdir(transcripts_dir):
+            return 0
+        added = 0
+        for name in sorted(os.listdir(transcripts_dir)):
+            session_id, ext = os.path.splitext(name)
+            if ext != ".json" or session_id in self.indexed:
+                continue
+            try:
+                with open(os.path.join(transcripts_dir, name), "r") as f:
+                    entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping transcript {name}: {e}")
+                continue
+            self._handle("start", session_id, None)
+            for entry in entries:
+                self._handle("entry", session_id, entry)
+            self._handle("end", session_id, None)
+            added += 1
+        if added:
+            logger.info(f"Indexed {added} past transcripts into long-term memory.")
+        return added
+
+    # --- Retrieval (reply path) ---
+
+    def retrieve(self, query, token_budget=None, exclude=None):
+        """
+        Snippets relevant to `query` as one string, at most `token_budget` tokens.
+        Lines already in `exclude` (the recent context) are skipped. Returns ""
+        if the search is slower than ltm_search_timeout, so replies never wait on it.
+        """
+        if not self.enabled or not query or self.store is None:
+            return ""
+        token_budget = token_budget or config_instance.get("ltm_token_budget", 300)
+        timeout = config_instance.get("ltm_search_timeout", 0.3)
+        if not self._search_slots.acquire(blocking=False):
+            # Earlier searches are still running past their timeout
+            self.search_skipped += 1
+            logger.warning("Long-term memory search skipped: earlier searches still running.")
+            return ""
+        future = self._search_pool.submit(
+            self.store.search_memory, query, limit=config_instance.get("ltm_top_k", 6), score_threshold=0.3,
+            mode=config_instance.get("ltm_search_mode", "hybrid"),
+        )
+        future.add_done_callback(lambda _: self._search_slots.release())
+        try:
+            hits = future.result(timeout=timeout)
+        except FutureTimeout:
+            self.search_timeouts += 1
+            logger.warning(f"Long-term memory search exceeded {timeout}s; replying without it.")
+            return ""
+        except Exception as e:
+            logger.error(f"Long-term memory search failed: {e}")
+            return ""
+
+        excluded = set((exclude or "").splitlines())
+        snippets, used = [], 0
+        for hit in hits:
+            lines = [l for l in (hit["text"] or "").splitlines() if l not in excluded]
+            if not lines:
+                continue
+            snippet = "\n".join(lines)
+            cost = estimate_tokens(snippet)
+            if used + cost > token_budget:
+                continue
+            snippets.append(snippet)
+            used += cost
+        return "\n---\n".join(snippets)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "queued": self.queue.qsize(),
+            "pending_chunks": len(self.pending),
+            "ingested": self.ingested,
+            "dropped": self.dropped,
+            "search_timeouts": self.search_timeouts,
+            "search_skipped": self.search_skipped,
+        }
+
+class RetrievalPrefetch:
+    """
+    Starts the long-term memory search from streaming STT partials, so the
+    snippets are usually ready when the speaker stops talking.
+
+    A new search starts once the partial has at least `min_words` words and has
+    grown by `step_words` since the last one; a queued, not yet started search is
+    dropped in favour of the newer partial. take() hands the latest result to the
+    reply if its query is a word prefix covering at least `min_coverage` of the
+    final transcript; otherwise it returns None and the caller searches itself.
+
+    The chat prompt is not prefilled early: the history prefix is already in
+    Ollama's KV cache (see Conversation), only the new turn is left to prefill,
+    and a speculative request would hold the chat model slot for nothing when the
+    final transcript differs.
+    """
+    def __init__(self, memory, min_words=4, step_words=3, min_coverage=0.6):
+        self.memory = memory
+        self.min_words = min_words
+        self.step_words = step_words
+        self.min_coverage = min_coverage
+        self.query = None
+        self.future = None
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ltm-prefetch")
+        self._lock = threading.Lock()
+
+    def update(self, partial, exclude=""):
+        if not self.memory.enabled:
+            return
+        words = partial.split()
+        with self._lock:
+            if len(words) < self.min_words:
+                return
+            if self.query is not None and len(words) < len(self.query.split()) + self.step_words:
+                return
+            if self.future is not None:
+                self.future.cancel()
+            self.query = partial
+            self.future = self._executor.submit(self.memory.retrieve, partial, exclude=exclude)
+
+    def take(self, text):
+        """Prefetched snippets for the final transcript `text`, or None if there are none usable."""
+        with self._lock:
+            query, future = self.query, self.future
+            self.query, self.future = None, None
+        if future is None:
+            return None
+        query_words, text_words = query.lower().split(), text.lower().split()
+        if text_words[:len(query_words)] != query_words or len(query_words) < self.min_coverage * len(text_words):
+            future.cancel()
+            self.misses += 1
+            return None
+        try:
+            memories = future.result(timeout=config_instance.get("ltm_search_timeout", 0.3))
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return memories
+
+    def reset(self):
+        with self._lock:
+            if self.future is not None:
+                self.future.cancel()
+            self.query, self.future = None, None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+# Global Instance
+long_term_instance = LongTermMemory()
@@ -1,127 +1,302 @@
 import json
 import os
+import time
 import uuid
+import threading
+from collections import deque
 from datetime import datetime
 import logging
+from src.config import config_instance
+from src.session_store import SessionStore
+from src.long_term import long_term_instance
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger("MemoryMgr")
 
+# Sessions with an open writer in this process; never treated as orphaned
+_live_sessions = set()
+_recovery_lock = threading.Lock()
+_recovered = False
+
+def read_tail(path, limit, block_size=8192):
+    """Reads the last `limit` entries of a JSONL file by seeking backwards from the end."""
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= limit:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    entries = []
+    for line in data.splitlines()[-(limit + 1):]:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue # Partial first line of the block or torn last line
+    return entries[-limit:]
+
+class TranscriptWriter:
+    """
+    Append-only JSONL transcript with group commit.
+
+    Each entry is one line, so an utterance costs O(1) I/O regardless of meeting
+    length. Lines are handed to the OS every `flush_every` entries and fsynced at
+    most every `fsync_interval` seconds (0 = on every flush). On open, a torn last
+    line left by a crash is truncated away.
+
+    The writer holds an exclusive flock on the log until close(), so another
+    process sharing the directory sees the file as live: opening it raises
+    BlockingIOError, and FileNotFoundError once it has been compacted away.
+    With create=False a missing log is not recreated.
+    """
+    def __init__(self, path, flush_every=1, fsync_interval=2.0, create=True):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.fsync_interval = fsync_interval
+        self.pending = 0
+        self.last_fsync = time.monotonic()
+        flags = os.O_WRONLY | os.O_APPEND | (os.O_CREAT if create else 0)
+        self.file = os.fdopen(os.open(path, flags, 0o644), "a", encoding="utf-8")
+        try:
+            self._lock()
+            self.count = self._recover()
+        except BaseException:
+            self.file.close()
+            raise
+
+    def _lock(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if os.fstat(self.file.fileno()).st_nlink == 0:
+            # Compacted and removed by its owner between our open and the lock
+            raise FileNotFoundError(self.path)
+
+    def _recover(self):
+        """Drops an incomplete trailing line and returns the number of intact entries."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = len(data)
+            if data and not data.endswith(b"\n"):
+                end = data.rfind(b"\n") + 1
+                f.truncate(end)
+                logger.warning(f"Recovered transcript {self.path}: dropped partial last line")
+            return data[:end].count(b"\n")
+
+    def append(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self, fsync=False):
+        self.file.flush()
+        self.pending = 0
+        now = time.monotonic()
+        if fsync or now - self.last_fsync >= self.fsync_interval:
+            os.fsync(self.file.fileno())
+            self.last_fsync = now
+
+    def close(self):
+        if not self.file.closed:
+            self.flush(fsync=True)
+            self.file.close()
+
+def iter_transcript(path):
+    """Lazily yields entries from a JSONL transcript, skipping a torn last line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
 class MemoryManager:
     def __init__(self, base_path="/workspace/memory"):
         self.base_path = base_path
-        self.sessions_file = os.path.join(base_path, "sessions.json")
+        self.sessions_file = os.path.join(base_path, "sessions.json") # Legacy, migrated on startup
         self.transcripts_dir = os.path.join(base_path, "transcripts")
         self.current_session_id = None
-        self.transcript = []
+        self.writer = None
+        self.recent = deque(maxlen=50)
+        # start/end/add_entry all swap or use the writer; one lock orders them
+        self._session_lock = threading.Lock()
+        
+        self.sessions = None
         
         # Ensure directories exist
         try:
             os.makedirs(self.transcripts_dir, exist_ok=True)
-            if not os.path.exists(self.sessions_file):
-                with open(self.sessions_file, 'w') as f:
-                    json.dump([], f)
+            self.sessions = SessionStore(os.path.join(base_path, "sessions.db"))
+            self.sessions.migrate_json(self.sessions_file, self.transcripts_dir)
+            self.recover_orphans()
         except Exception as e:
             logger.error(f"Failed to initialize memory storage: {e}")
 
+    def recover_orphans(self):
+        """
+        Finalizes transcript logs (.jsonl) left behind by a crash: drops a torn
+        last line, compacts the log into <id>.json, closes the session in the
+        catalog at its last entry's time and hands it to long-term memory.
+        Runs once per process, before any session of this process is live; logs
+        still locked by a writer in another process are skipped.
+        """
+        global _recovered
+        with _recovery_lock:
+            if _recovered:
+                return 0
+            _recovered = True
+            recovered = 0
+            for name in sorted(os.listdir(self.transcripts_dir)):
+                session_id, ext = os.path.splitext(name)
+                if ext != ".jsonl" or session_id in _live_sessions:
+                    continue
+                try:
+                    writer = TranscriptWriter(os.path.join(self.transcripts_dir, name), create=False)
+                except (BlockingIOError, FileNotFoundError):
+                    continue # Live in another process, or finished meanwhile
+                except Exception as e:
+                    logger.error(f"Failed to recover transcript {name}: {e}")
+                    continue
+                try:
+                    entries = list(iter_transcript(writer.path))
+                    self._compact_transcript(writer, session_id)
+                    last = entries[-1].get("timestamp") if entries else None
+                    self.sessions.end(session_id, transcript_path=self._transcript_path(session_id), end_time=last)
+                    info = self.sessions.get(session_id) or {}
+                    long_term_instance.start_session(session_id, info.get("url"))
+                    for entry in entries:
+                        long_term_instance.submit(session_id, entry)
+                    long_term_instance.end_session(session_id)
+                    recovered += 1
+                except Exception as e:
+                    logger.error(f"Failed to recover transcript {name}: {e}")
+            if recovered:
+                logger.warning(f"Recovered {recovered} transcripts left open by an earlier crash.")
+            return recovered
+
     def start_session(self, meeting_url):
-        self.current_session_id = str(uuid.uuid4())
-        self.transcript = []
-        
-        session_info = {
-            "id": self.current_session_id,
-            "url": meeting_url,
-            "start_time": datetime.now().isoformat(),
-            "end_time": None
-        }
-        
-        self._append_session(session_info)
-        logger.info(f"Started session: {self.current_session_id}")
-        return self.current_session_id
+        with self._session_lock:
+            self.current_session_id = str(uuid.uuid4())
+            _live_sessions.add(self.current_session_id)
+            self.recent.clear()
+            self.writer = TranscriptWriter(
+                self._transcript_path(self.current_session_id, ".jsonl"),
+                flush_every=config_instance.get("transcript_flush_every", 1),
+                fsync_interval=config_instance.get("transcript_fsync_interval", 2.0),
+            )
+
+            session_info = {
+                "id": self.current_session_id,
+                "url": meeting_url,
+                "start_time": datetime.now().isoformat(),
+                "end_time": None,
+                "transcript_path": self._transcript_path(self.current_session_id)
+            }
+
+            self._append_session(session_info)
+            long_term_instance.start_session(self.current_session_id, meeting_url)
+            logger.info(f"Started session: {self.current_session_id}")
+            return self.current_session_id
 
     def end_session(self):
-        if not self.current_session_id:
-            return
-            
-        # Update end time in sessions.json
-        self._update_session_end_time(self.current_session_id)
-        
-        # Save final transcript
-        self._save_transcript()
-        
-        logger.info(f"Ended session: {self.current_session_id}")
-        self.current_session_id = None
-        self.transcript = []
+        with self._session_lock:
+            if not self.current_session_id:
+                return
+
+            # Update end time in sessions.json
+            self._update_session_end_time(self.current_session_id)
+
+            # Compact the append log into the final JSON transcript
+            self._compact_transcript(self.writer, self.current_session_id)
+            long_term_instance.end_session(self.current_session_id)
+            _live_sessions.discard(self.current_session_id)
+
+            logger.info(f"Ended session: {self.current_session_id}")
+            self.current_session_id = None
+            self.writer = None
+            self.recent.clear()
 
     def add_entry(self, speaker, text):
-        if not self.current_session_id:
-            # Optionally auto-start session or just log warning
-            # logger.warning("No active session. Transcript entry ignored.")
-            return
+        with self._session_lock:
+            if not self.current_session_id:
+                # Optionally auto-start session or just log warning
+                # logger.warning("No active session. Transcript entry ignored.")
+                return
 
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "speaker": speaker,
-            "text": text
-        }
-        self.transcript.append(entry)
-        
-        # Persist frequently (or on every message for safety)
-        self._save_transcript()
+            entry = {
+                "timestamp": datetime.now().isoformat(),
+                "speaker": speaker,
+                "text": text
+            }
+            self.recent.append(entry)
+
+            # Append one line (group-committed), never rewrite the whole file
+            try:
+                self.writer.append(entry)
+            except Exception as e:
+                logger.error(f"Failed to append transcript entry: {e}")
+
+            # Embedded into long-term memory in the background
+            long_term_instance.submit(self.current_session_id, entry)
 
     def get_recent_context(self, limit=10):
         """Returns the last `limit` exchanges as a formatted string."""
-        if not self.transcript:
-            return ""
-            
-        recent = self.transcript[-limit:]
+        with self._session_lock:
+            if not self.current_session_id:
+                return ""
+
+            if limit <= len(self.recent) or len(self.recent) == self.writer.count:
+                recent = list(self.recent)[-limit:]
+            else:
+                # Older than the in-memory tail: read only the end of the log
+                self.writer.flush()
+                recent = read_tail(self.writer.path, limit)
         context_str = "\n".join([f"{e['speaker']}: {e['text']}" for e in recent])
         return context_str
 
-    def _save_transcript(self):
-        if not self.current_session_id:
+    def _transcript_path(self, session_id, ext=".json"):
+        return os.path.join(self.transcripts_dir, f"{session_id}{ext}")
+
+    def _compact_transcript(self, writer, session_id):
+        if not writer:
             return
-        file_path = os.path.join(self.transcripts_dir, f"{self.current_session_id}.json")
+        # The log stays locked until it is removed, so no other process recovers it twice
         try:
-            with open(file_path, 'w') as f:
-                json.dump(self.transcript, f, indent=2)
+            writer.flush(fsync=True)
+            final_path = self._transcript_path(session_id)
+            tmp_path = f"{final_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(list(iter_transcript(writer.path)), f, indent=2)
+            os.replace(tmp_path, final_path)
+            os.remove(writer.path)
         except Exception as e:
-            logger.error(f"Failed to save transcript: {e}")
+            logger.error(f"Failed to compact transcript: {e}")
+        finally:
+            writer.close()
 
     def _append_session(self, session_info):
         try:
-            # Read existing
-            sessions = []
-            if os.path.exists(self.sessions_file):
-                try:
-                    with open(self.sessions_file, 'r') as f:
-                        sessions = json.load(f)
-                except json.JSONDecodeError:
-                    sessions = []
-            
-            sessions.append(session_info)
-            
-            with open(self.sessions_file, 'w') as f:
-                json.dump(sessions, f, indent=2)
+            self.sessions.add(session_info)
         except Exception as e:
             logger.error(f"Failed to append session info: {e}")
 
     def _update_session_end_time(self, session_id):
         try:
-            if not os.path.exists(self.sessions_file):
-                return
-
-            with open(self.sessions_file, 'r') as f:
-                sessions = json.load(f)
-            
-            updated = False
-            for s in sessions:
-                if s['id'] == session_id:
-                    s['end_time'] = datetime.now().isoformat()
-                    updated = True
-                    break
-            
-            if updated:
-                with open(self.sessions_file, 'w') as f:
-                    json.dump(sessions, f, indent=2)
+            self.sessions.end(session_id, transcript_path=self._transcript_path(session_id))
         except Exception as e:
             logger.error(f"Failed to update session end time: {e}")
+
+    def find_sessions(self, **filters):
+        """Queries the session catalog (url, since, until, min_duration, max_duration, limit)."""
+        return self.sessions.query(**filters)
@@ -0,0 +1,230 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from src.config import config_instance
+from src.backends import backend_instance
+
+logger = logging.getLogger("ModelMgr")
+
+class ModelQueueTimeout(RuntimeError):
+    """Raised when a request waited `ollama_queue_timeout` for its model, or was cancelled while queued."""
+
+OLLAMA_GENERATE = "/api/generate"
+OLLAMA_PS = "/api/ps"
+
+class ModelStats:
+    def __init__(self):
+        self.requests = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.loads = 0
+        self.load_ms_total = 0.0
+        self.last_load_ms = None
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "avg_queue_ms": round(self.queue_ms_total / self.requests, 1) if self.requests else 0.0,
+            "max_queue_ms": round(self.queue_ms_max, 1),
+            "loads": self.loads,
+            "avg_load_ms": round(self.load_ms_total / self.loads, 1) if self.loads else 0.0,
+            "last_load_ms": self.last_load_ms,
+        }
+
+class ModelManager:
+    """
+    Keeps the configured Ollama models resident and schedules requests around them.
+
+    - Models come from config (model_vision / model_chat) and are preloaded at
+      startup and before each join; every request carries `ollama_keep_alive`.
+    - /api/ps is polled to track which models are actually loaded. Once both
+      models have been seen loaded together they are treated as co-resident.
+    - Otherwise requests are grouped by model: calls for the active model run
+      freely, a call for the other model waits until in-flight calls drain, and
+      once it has waited `ollama_affinity_ms` new calls for the active model
+      queue behind it, so the switch can't be starved. Alternating vision/chat
+      calls therefore cause one swap per phase instead of one per request.
+    - A queued request gives up with ModelQueueTimeout after
+      `ollama_queue_timeout` seconds or as soon as its `cancel` event is set.
+      co_resident follows the latest /api/ps sample, so an eviction turns
+      grouping back on.
+    - Queue time (scheduler wait) and load time (Ollama's load_duration) are
+      recorded per model and exposed through stats().
+    """
+    def __init__(self):
+        self.active = None
+        self.inflight = 0
+        self.waiting = {}
+        self.swaps = 0
+        self.co_resident = False
+        self.resident = {}
+        self.stats_by_model = {}
+        self._cond = threading.Condition()
+        self._monitor = threading.Thread(target=self._monitor_loop, name="ModelMonitor", daemon=True)
+        self._monitor.start()
+
+    # --- Config ---
+
+    def vision_model(self):
+        return config_instance.get("model_vision", "llama3.2-vision")
+
+    def chat_model(self):
+        return config_instance.get("model_chat", "llama3.2-vision")
+
+    def keep_alive(self):
+        return config_instance.get("ollama_keep_alive", "30m")
+
+    def _stats(self, model):
+        if model not in self.stats_by_model:
+            self.stats_by_model[model] = ModelStats()
+        return self.stats_by_model[model]
+
+    # --- Scheduling ---
+
+    def _needs_gating(self):
+        return not self.co_resident and self.vision_model() != self.chat_model()
+
+    def _may_run(self, model):
+        if self.active is None:
+            return True
+        if self.active != model:
+            return self.inflight == 0
+        # Active model: yield to another model that has waited past the affinity window
+        affinity = config_instance.get("ollama_affinity_ms", 2000) / 1000
+        now = time.monotonic()
+        return not any(m != model and now - since >= affinity for m, (_, since) in self.waiting.items())
+
+    @contextmanager
+    def slot(self, model, cancel=None):
+        """
+        Holds a scheduling slot for one request to `model`; yields the keep_alive
+        value to put in the payload. Raises ModelQueueTimeout if the slot isn't
+        granted within ollama_queue_timeout or `cancel` (an Event) is set first.
+        """
+        start = time.monotonic()
+        deadline = start + config_instance.get("ollama_queue_timeout", 60)
+        with self._cond:
+            if self._needs_gating() and not self._may_run(model):
+                count, since = self.waiting.get(model, (0, start))
+                self.waiting[model] = (count + 1, since)
+                try:
+                    while not self._may_run(model):
+                        if cancel is not None and cancel.is_set():
+                            raise ModelQueueTimeout(f"Request for {model} cancelled while queued")
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise ModelQueueTimeout(f"Request for {model} queued longer than the queue timeout")
+                        self._cond.wait(timeout=min(0.1 if cancel is not None else 1.0, remaining))
+                        if not self._needs_gating():
+                            break
+                finally:
+                    count, since = self.waiting[model]
+                    if count > 1:
+                        self.waiting[model] = (count - 1, since)
+                    else:
+                        del self.waiting[model]
+                    self._cond.notify_all()
+            if self.active != model:
+                if self.active is not None:
+                    self.swaps += 1
+                self.active = model
+            self.inflight += 1
+            queue_ms = (time.monotonic() - start) * 1000
+            stats = self._stats(model)
+            stats.requests += 1
+            stats.queue_ms_total += queue_ms
+            stats.queue_ms_max = max(stats.queue_ms_max, queue_ms)
+        try:
+            yield self.keep_alive()
+        finally:
+            with self._cond:
+                self.inflight -= 1
+                self._cond.notify_all()
+
+    def record(self, model, response):
+        """Records load time from a generate/chat response (load_duration is in ns)."""
+        load_ns = (response or {}).get("load_duration")
+        if not load_ns:
+            return
+        load_ms = load_ns / 1e6
+        # A warm request still reports a few ms of "load"; only count real loads
+        if load_ms >= config_instance.get("ollama_cold_load_ms", 500):
+            with self._cond:
+                stats = self._stats(model)
+                stats.loads += 1
+                stats.load_ms_total += load_ms
+                stats.last_load_ms = round(load_ms, 1)
+            logger.info(f"Model {model} loaded in {load_ms:.0f} ms")
+
+    # --- Residency ---
+
+    def warmup(self, models=None):
+        """Loads models into memory (empty generate request; near-free if already loaded)."""
+        models = models or list(dict.fromkeys([self.vision_model(), self.chat_model()]))
+        for model in models:
+            try:
+                with self.slot(model) as keep_alive:
+                    resp = backend_instance.get("ollama").post(
+                        OLLAMA_GENERATE, json={"model": model, "keep_alive": keep_alive}, timeout=300
+                    )
+                if resp.status_code == 200:
+                    self.record(model, resp.json())
+                    self.resident[model] = True
+                else:
+                    logger.warning(f"Warmup of {model} failed: {resp.status_code} {resp.text[:200]}")
+            except Exception as e:
+                logger.warning(f"Warmup of {model} failed: {e}")
+
+    def warmup_async(self, models=None):
+        threading.Thread(target=self.warmup, args=(models,), daemon=True).start()
+
+    def poll_residency(self):
+        """Refreshes `resident` from /api/ps; returns the list of loaded models."""
+        try:
+            resp = backend_instance.get("ollama").get(OLLAMA_PS, timeout=5)
+            loaded = [m.get("name") or m.get("model") for m in resp.json().get("models", [])]
+        except Exception as e:
+            logger.debug(f"Ollama /api/ps unavailable: {e}")
+            return None
+
+        wanted = {self.vision_model(), self.chat_model()}
+        for model in wanted:
+            was = self.resident.get(model)
+            now = any(name == model or name.split(":")[0] == model for name in loaded)
+            if was and not now:
+                logger.info(f"Model {model} was evicted")
+            self.resident[model] = now
+        co_resident = len(wanted) > 1 and all(self.resident.get(m) for m in wanted)
+        if co_resident != self.co_resident:
+            logger.info("Vision and chat models fit together; request grouping disabled." if co_resident
+                        else "Vision and chat models are no longer both loaded; request grouping enabled.")
+            with self._cond:
+                self.co_resident = co_resident
+                self._cond.notify_all()
+        return loaded
+
+    def _monitor_loop(self):
+        if config_instance.get("ollama_warmup_on_start", True):
+            self.warmup()
+        while True:
+            self.poll_residency()
+            time.sleep(config_instance.get("ollama_ps_interval", 30))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "vision_model": self.vision_model(),
+                "chat_model": self.chat_model(),
+                "keep_alive": self.keep_alive(),
+                "resident": dict(self.resident),
+                "co_resident": self.co_resident,
+                "active": self.active,
+                "inflight": self.inflight,
+                "waiting": {m: count for m, (count, _) in self.waiting.items()},
+                "swaps": self.swaps,
+                "models": {m: s.to_dict() for m, s in self.stats_by_model.items()},
+            }
+
+# Global Instance
+model_instance = ModelManager()
@@ -0,0 +1,137 @@
+import os
+import re
+import time
+import uuid
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.tts import tts_instance
+
+logger = logging.getLogger("SpeechPipeline")
+
+# Sentence boundary: terminal punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a hard line break.
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+
+class SentenceChunker:
+    """
+    Accumulates streamed LLM tokens and cuts them into speakable sentences.
+    Very short fragments ("Dr.", "Ok.") are held back until the chunk reaches `min_chars`.
+    """
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, token):
+        """Adds a token and returns the list of sentences that are now complete."""
+        self.buffer += token
+        sentences = []
+        while True:
+            cut = None
+            for match in SENTENCE_BOUNDARY.finditer(self.buffer):
+                if match.end() >= self.min_chars:
+                    cut = match.end()
+                    break
+            if cut is None:
+                break
+            sentence = self.buffer[:cut].strip()
+            self.buffer = self.buffer[cut:]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self):
+        """Returns whatever is left in the buffer (end of stream)."""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return rest or None
+
+class TurnTimer:
+    """
+    Records the first time each stage of a conversational turn is reached,
+    relative to the moment the turn started (ms).
+    """
+    def __init__(self):
+        self.start = time.monotonic()
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, stage):
+        with self._lock:
+            if stage not in self.marks:
+                self.marks[stage] = round((time.monotonic() - self.start) * 1000)
+
+    def summary(self):
+        with self._lock:
+            return dict(sorted(self.marks.items(), key=lambda kv: kv[1]))
+
+    def log(self):
+        timings = " ".join(f"{k}={v}ms" for k, v in self.summary().items())
+        logger.info(f"Turn timings: {timings}")
+
+class SpeechPipeline:
+    """
+    Streams sentences to TTS concurrently and plays the resulting clips strictly in order.
+
+    submit() returns immediately; synthesis and decoding run on a small thread pool while
+    a single player thread waits on each clip in submission order and queues it on the
+    PlaybackEngine. cancel() drops everything not yet spoken (barge-in).
+    """
+    def __init__(self, playback, work_dir="/tmp", synth_workers=2, timer=None):
+        self.playback = playback
+        self.work_dir = work_dir
+        self.cancelled = threading.Event()
+        self.timer = timer or TurnTimer()
+        self.executor = ThreadPoolExecutor(max_workers=synth_workers, thread_name_prefix="tts")
+        self.pending = queue.Queue()
+        self.player = threading.Thread(target=self._play_loop, daemon=True)
+        self.player.start()
+
+    def submit(self, sentence):
+        if self.cancelled.is_set():
+            return
+        self.timer.mark("first_sentence")
+        path = os.path.join(self.work_dir, f"speech_{uuid.uuid4().hex}.mp3")
+        future = self.executor.submit(self._synthesize, sentence, path)
+        self.pending.put((sentence, path, future))
+
+    def _synthesize(self, sentence, path):
+        try:
+            if self.cancelled.is_set() or not tts_instance.speak(sentence, path):
+                return None
+            self.timer.mark("first_synth")
+            return self.playback.decode(path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _play_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            sentence, path, future = item
+            try:
+                pcm = future.result()
+                if pcm and not self.cancelled.is_set():
+                    self.timer.mark("first_audio")
+                    logger.info(f"Speaking chunk: {sentence}")
+                    self.playback.play(pcm, block=True)
+            except Exception as e:
+                logger.error(f"Chunk playback failed: {e}")
+
+    def cancel(self):
+        """Stops speaking this reply: pending sentences are dropped and playback is cut."""
+        if not self.cancelled.is_set():
+            self.cancelled.set()
+            self.timer.mark("cancelled")
+            self.playback.stop()
+
+    def close(self):
+        """Waits for all submitted sentences to be spoken, then releases the workers."""
+        self.pending.put(None)
+        self.player.join()
+        self.executor.shutdown(wait=True)
+        self.timer.mark("done")
+        self.timer.log()
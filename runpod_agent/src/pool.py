@@ -0,0 +1,127 @@
+import os
+import uuid
+import logging
+import threading
+from src.bot import ZoomBot, reload_shared_config, warm_shared
+from src.browser import browser_pool_instance
+from src.audio import audio_instance
+from src.config import config_instance
+
+logger = logging.getLogger("BotPool")
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo (MB), or None if unavailable."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+class BotPool:
+    """
+    Registry of ZoomBot workers, one per meeting.
+
+    The "default" bot (used by /join, /leave, /status) is created on first use
+    and keeps the sinks created by start.sh. Every additional bot gets its own
+    PulseAudio sink/source pair, work directory (temp audio) and memory session,
+    plus its own browser. New bots are only admitted while CPU load and free RAM
+    leave room for one more. TTS/STT warmup and backends are shared by all bots.
+    """
+    def __init__(self):
+        self.bots = {}
+        self.devices = {}
+        self._lock = threading.Lock()
+
+    def prewarm(self):
+        """Startup warmup: shared TTS/STT caches and a warm browser for the default bot's devices."""
+        warm_shared()
+        if config_instance.get("browser_prewarm", True):
+            browser_pool_instance.register(browser_pool_instance.key("SpeakerSink", "MicSource"))
+
+    def default(self):
+        """The default bot, created on first use."""
+        with self._lock:
+            bot = self.bots.get("default")
+            if bot is None:
+                bot = self.bots["default"] = ZoomBot()
+                logger.info("Default bot created.")
+            return bot
+
+    def admission_check(self):
+        """Returns (ok, reason)."""
+        max_bots = config_instance.get("pool_max_bots", 4)
+        if len(self.bots) >= max_bots:
+            return False, f"Bot limit reached ({max_bots})"
+
+        load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+        max_load = config_instance.get("pool_max_load_per_cpu", 0.85)
+        if load_per_cpu > max_load:
+            return False, f"CPU load too high ({load_per_cpu:.2f} per core > {max_load})"
+
+        free_mb = available_memory_mb()
+        needed_mb = config_instance.get("pool_min_free_mem_mb", 1024) + config_instance.get("pool_bot_mem_mb", 1500)
+        if free_mb is not None and free_mb < needed_mb:
+            return False, f"Not enough free memory ({free_mb} MB < {needed_mb} MB)"
+        return True, "ok"
+
+    def create(self):
+        """Creates a new bot with private audio devices. Raises RuntimeError if not admitted."""
+        with self._lock:
+            ok, reason = self.admission_check()
+            if not ok:
+                raise RuntimeError(reason)
+            bot_id = uuid.uuid4().hex[:8]
+            devices = audio_instance.create_bot_devices(bot_id)
+            try:
+                bot = ZoomBot(
+                    bot_id=bot_id,
+                    speaker_sink=devices["speaker_sink"],
+                    mic_sink=devices["mic_sink"],
+                    mic_source=devices["mic_source"],
+                    work_dir=os.path.join("/tmp/zoombot", bot_id),
+                )
+            except Exception:
+                audio_instance.remove_bot_devices(devices["modules"])
+                raise
+            self.bots[bot_id] = bot
+            self.devices[bot_id] = devices
+        logger.info(f"Bot {bot_id} created ({len(self.bots)} active).")
+        return bot
+
+    def get(self, bot_id):
+        return self.bots.get(bot_id)
+
+    def reload_config(self):
+        """Reloads the shared config once, then lets every bot apply its own part."""
+        reload_shared_config()
+        for bot in list(self.bots.values()):
+            bot.apply_config()
+        logger.info(f"Configuration reloaded for {len(self.bots)} bot(s).")
+
+    def remove(self, bot_id):
+        """Leaves the meeting and releases the bot. The default bot only leaves."""
+        bot = self.bots.get(bot_id)
+        if not bot:
+            return False
+        if bot_id == "default":
+            bot.leave_meeting()
+            return True
+
+        with self._lock:
+            self.bots.pop(bot_id, None)
+            devices = self.devices.pop(bot_id, None)
+        bot.shutdown()
+        browser_pool_instance.drain(bot.browser_key())
+        if devices:
+            audio_instance.remove_bot_devices(devices["modules"])
+        logger.info(f"Bot {bot_id} removed.")
+        return True
+
+    def list(self):
+        return [bot.get_status() for bot in list(self.bots.values())]
+
+# Global Instance
+pool_instance = BotPool()
@@ -0,0 +1,133 @@
+import os
+import json
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime
+
+logger = logging.getLogger("SessionStore")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    start_ts REAL,
+    end_ts REAL,
+    duration REAL,
+    transcript_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_url ON sessions(url);
+CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions(start_ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_duration ON sessions(duration);
+"""
+
+COLUMNS = ("id", "url", "start_time", "end_time", "start_ts", "end_ts", "duration", "transcript_path")
+
+def _ts(iso):
+    return datetime.fromisoformat(iso).timestamp() if iso else None
+
+class SessionStore:
+    """
+    Indexed session catalog in SQLite (WAL mode).
+
+    Each start/end is a single atomic INSERT/UPDATE by primary key, so concurrent
+    bots (or processes) never lose each other's writes and bookkeeping stays
+    O(log n) as history grows. Times are stored both as ISO strings (as in the
+    old sessions.json) and as epoch seconds for range queries.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add(self, session_info):
+        row = {
+            "id": session_info["id"],
+            "url": session_info.get("url"),
+            "start_time": session_info.get("start_time"),
+            "end_time": session_info.get("end_time"),
+            "start_ts": _ts(session_info.get("start_time")),
+            "end_ts": _ts(session_info.get("end_time")),
+            "duration": None,
+            "transcript_path": session_info.get("transcript_path"),
+        }
+        if row["start_ts"] is not None and row["end_ts"] is not None:
+            row["duration"] = row["end_ts"] - row["start_ts"]
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO sessions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [row[c] for c in COLUMNS]
+            )
+
+    def end(self, session_id, transcript_path=None, end_time=None):
+        end = datetime.fromisoformat(end_time) if end_time else datetime.now()
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "UPDATE sessions SET end_time = ?, end_ts = ?, duration = ? - start_ts, "
+                "transcript_path = COALESCE(?, transcript_path) WHERE id = ?",
+                (end.isoformat(), end.timestamp(), end.timestamp(), transcript_path, session_id)
+            )
+            return cur.rowcount > 0
+
+    def get(self, session_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            return dict(row) if row else None
+
+    def query(self, url=None, since=None, until=None, min_duration=None, max_duration=None, limit=100):
+        """
+        Sessions filtered by exact URL, start time range (ISO strings) and
+        duration in seconds, newest first.
+        """
+        clauses, params = [], []
+        if url is not None:
+            clauses.append("url = ?")
+            params.append(url)
+        if since is not None:
+            clauses.append("start_ts >= ?")
+            params.append(_ts(since))
+        if until is not None:
+            clauses.append("start_ts < ?")
+            params.append(_ts(until))
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("duration <= ?")
+            params.append(max_duration)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM sessions {where} ORDER BY start_ts DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+            return [dict(r) for r in rows]
+
+    def migrate_json(self, json_path, transcripts_dir=None):
+        """One-shot import of a legacy sessions.json; the file is renamed afterwards."""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r") as f:
+                sessions = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Cannot migrate {json_path}: {e}")
+            return 0
+
+        for s in sessions:
+            if transcripts_dir and not s.get("transcript_path"):
+                s["transcript_path"] = os.path.join(transcripts_dir, f"{s['id']}.json")
+            self.add(s)
+        try:
+            os.replace(json_path, f"{json_path}.migrated")
+        except OSError:
+            pass # Another process already migrated it
+        logger.info(f"Migrated {len(sessions)} sessions from {json_path}")
+        return len(sessions)
@@ -0,0 +1,244 @@
+import json
+import queue
+import logging
+import threading
+import numpy as np
+import speech_recognition as sr
+from src.config import config_instance
+
+logger = logging.getLogger("STTMgr")
+
+class Hypothesis:
+    """A partial (still changing) recognition result for the utterance so far."""
+    def __init__(self, text):
+        self.text = text
+
+class BufferedStream:
+    """Stream adapter for batch-only engines: buffers PCM and decodes once on finish()."""
+    def __init__(self, engine, sample_rate):
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.chunks = []
+
+    def feed(self, pcm):
+        self.chunks.append(pcm)
+        return None
+
+    def finish(self):
+        pcm = b"".join(self.chunks)
+        self.chunks = []
+        return self.engine.transcribe(pcm, self.sample_rate) if pcm else None
+
+class GoogleEngine:
+    """Google Web Speech API via SpeechRecognition (network round trip per utterance)."""
+    streaming = False
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, sample_rate):
+        try:
+            return self.recognizer.recognize_google(sr.AudioData(pcm, sample_rate, 2))
+        except sr.UnknownValueError:
+            return None
+
+    def open_stream(self, sample_rate):
+        return BufferedStream(self, sample_rate)
+
+class VoskStream:
+    """
+    Incremental Vosk decoding of one VAD utterance. Vosk's own endpoints (short
+    pauses mid-sentence) are kept as segments, so the utterance is still
+    delivered as one transcript by finish() at the VAD's speech_end.
+    """
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.segments = []
+        self.last_partial = ""
+
+    def _text(self, tail=""):
+        return " ".join(t for t in self.segments + [tail] if t)
+
+    def feed(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.segments.append(text)
+            partial = ""
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        text = self._text(partial)
+        if text and text != self.last_partial:
+            self.last_partial = text
+            return Hypothesis(text)
+        return None
+
+    def finish(self):
+        text = self._text(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        self.segments = []
+        return text or None
+
+class VoskEngine:
+    """Offline Kaldi-based recognizer. The model is loaded once and shared by all streams."""
+    streaming = True
+
+    def __init__(self, model_path):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        logger.info(f"Loading Vosk model from {model_path}...")
+        self.model = Model(model_path)
+
+    def _recognizer(self, sample_rate):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.model, sample_rate)
+
+    def transcribe(self, pcm, sample_rate):
+        rec = self._recognizer(sample_rate)
+        rec.AcceptWaveform(pcm)
+        return json.loads(rec.FinalResult()).get("text", "") or None
+
+    def open_stream(self, sample_rate):
+        return VoskStream(self._recognizer(sample_rate))
+
+class WhisperEngine:
+    """faster-whisper (CTranslate2) with int8 weights on CPU. Batch-only."""
+    streaming = False
+
+    def __init__(self, model_name, language="en"):
+        from faster_whisper import WhisperModel
+        logger.info(f"Loading Whisper model '{model_name}' (int8, CPU)...")
+        self.model = WhisperModel(model_name, device="cpu", compute_type="int8")
+        self.language = language
+
+    def transcribe(self, pcm, sample_rate):
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if sample_rate != 16000:
+            audio = resample(audio, sample_rate, 16000)
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1, vad_filter=False)
+        text = " ".join(s.text.strip() for s in segments).strip()
+        return text or None
+
+    def open_stream(self, sample_rate):
+        return BufferedStream(self, sample_rate)
+
+def resample(audio, src_rate, dst_rate):
+    """Linear-interpolation resampler (good enough for speech recognition input)."""
+    if src_rate == dst_rate:
+        return audio
+    n = int(len(audio) * dst_rate / src_rate)
+    return np.interp(np.linspace(0, len(audio), n, endpoint=False), np.arange(len(audio)), audio).astype(audio.dtype)
+
+class STTManager:
+    """
+    Speech-to-text provider switch, selected by `stt_provider` in ConfigManager
+    (google | vosk | whisper). Local engines are loaded once and kept warm.
+    """
+    def __init__(self):
+        self.engines = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, provider=None):
+        provider = provider or config_instance.get("stt_provider", "google")
+        with self._lock:
+            if provider not in self.engines:
+                if provider == "vosk":
+                    self.engines[provider] = VoskEngine(config_instance.get("stt_model_path"))
+                elif provider == "whisper":
+                    self.engines[provider] = WhisperEngine(
+                        config_instance.get("stt_whisper_model", "base.en"),
+                        config_instance.get("stt_language", "en")
+                    )
+                else:
+                    self.engines[provider] = GoogleEngine()
+            return self.engines[provider]
+
+    def warmup(self):
+        """Loads the configured engine ahead of the first utterance."""
+        try:
+            self.get_engine()
+        except Exception as e:
+            logger.error(f"STT warmup failed: {e}")
+
+    def transcribe(self, pcm, sample_rate=16000):
+        provider = config_instance.get("stt_provider", "google")
+        try:
+            return self.get_engine(provider).transcribe(pcm, sample_rate)
+        except sr.RequestError:
+            raise
+        except Exception as e:
+            logger.error(f"STT Failed ({provider}): {e}")
+            if provider == "google":
+                return None
+            # Fallback to Google if the local engine fails
+            logger.info("Falling back to Google STT...")
+            return self.get_engine("google").transcribe(pcm, sample_rate)
+
+    def open_stream(self, sample_rate=16000):
+        provider = config_instance.get("stt_provider", "google")
+        try:
+            return self.get_engine(provider).open_stream(sample_rate)
+        except Exception as e:
+            logger.error(f"STT stream unavailable ({provider}): {e}")
+            return self.get_engine("google").open_stream(sample_rate)
+
+class StreamingTranscriber:
+    """
+    AudioCapture listener that decodes speech while it is still being spoken.
+
+    Capture events are handed to a worker thread (so decoding never stalls the
+    capture loop). Partial hypotheses go to `on_partial` (the bot starts its
+    memory search from them); the final transcript of an utterance is queued
+    once, when the VAD detects the end of speech.
+    """
+    def __init__(self, manager, sample_rate=16000, on_partial=None):
+        self.manager = manager
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.events = queue.Queue()
+        self.results = queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def __call__(self, event, frame):
+        self.events.put((event, frame))
+
+    def get(self, timeout=None):
+        """Returns the next final transcript, or None if none arrived within `timeout`."""
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self.running = False
+        self.events.put((None, None))
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        stream = None
+        while self.running:
+            event, frame = self.events.get()
+            try:
+                if event == "speech_start":
+                    stream = self.manager.open_stream(self.sample_rate)
+                elif event == "speech_frame" and stream:
+                    hyp = stream.feed(frame)
+                    if hyp and self.on_partial:
+                        self.on_partial(hyp.text)
+                elif event == "speech_end" and stream:
+                    text = stream.finish()
+                    if text:
+                        self.results.put(text)
+                    stream = None
+                elif event == "speech_discard":
+                    stream = None
+            except sr.RequestError as e:
+                logger.error(f"STT Service Error: {e}")
+                stream = None
+            except Exception as e:
+                logger.error(f"Streaming STT failed: {e}")
+                stream = None
+
+# Global Instance
+stt_instance = STTManager()
@@ -1,28 +1,193 @@
 import os
+import uuid
+import hashlib
 import logging
-import requests
+import threading
+from collections import OrderedDict
 from gtts import gTTS
 from src.config import config_instance
+from src.backends import backend_instance
 
 logger = logging.getLogger("TTSMgr")
 
+class TTSCache:
+    """
+    Content-addressed audio cache keyed by sha256(provider, voice, text).
+
+    Two tiers: an in-memory LRU of raw audio bytes and an on-disk directory of
+    `<key>.mp3` files, each bounded by size. Disk entries are evicted oldest-mtime
+    first; hits refresh the mtime.
+    """
+    def __init__(self, cache_dir="/workspace/tts_cache", max_memory_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.disk_bytes = sum(e.stat().st_size for e in os.scandir(cache_dir) if e.name.endswith(".mp3"))
+        except Exception as e:
+            logger.error(f"Failed to initialize TTS cache: {e}")
+
+    @staticmethod
+    def make_key(provider, voice, text):
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{provider}\0{voice}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key):
+        with self._lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.disk_bytes += len(data)
+                over = self.disk_bytes > self.max_disk_bytes
+            if over:
+                self._evict_disk()
+        except Exception as e:
+            logger.error(f"Failed to write TTS cache entry: {e}")
+
+    def _remember(self, key, data):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, old = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old)
+
+    def _evict_disk(self):
+        entries = sorted(
+            (e for e in os.scandir(self.cache_dir) if e.name.endswith(".mp3")),
+            key=lambda e: e.stat().st_mtime
+        )
+        total = sum(e.stat().st_size for e in entries)
+        target = self.max_disk_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self.disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_bytes": self.disk_bytes,
+            }
+
 class TTSManager:
     def __init__(self):
-        pass
+        self.cache = TTSCache(
+            cache_dir=config_instance.get("tts_cache_dir", "/workspace/tts_cache"),
+            max_memory_bytes=int(config_instance.get("tts_cache_memory_mb", 32)) * 1024 * 1024,
+            max_disk_bytes=int(config_instance.get("tts_cache_disk_mb", 512)) * 1024 * 1024,
+        )
+
+    def _voice(self, provider):
+        if provider == "openai":
+            return f"{config_instance.get('tts_api_url')}|{config_instance.get('tts_voice_id', 'alloy')}"
+        return "en"
 
     def speak(self, text, output_file="/tmp/speech.mp3"):
         provider = config_instance.get("tts_provider", "gtts")
+        key = self.cache.make_key(provider, self._voice(provider), text)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            with open(output_file, "wb") as f:
+                f.write(cached)
+            return True
         
         try:
             if provider == "openai":
-                return self._speak_openai(text, output_file)
+                success = self._speak_openai(text, output_file)
             else:
-                return self._speak_gtts(text, output_file)
+                success = self._speak_gtts(text, output_file)
         except Exception as e:
             logger.error(f"TTS Failed ({provider}): {e}")
-            # Fallback to gTTS if primary fails
+            # Fallback to gTTS if primary fails (cached under the gTTS key)
             logger.info("Falling back to gTTS...")
-            return self._speak_gtts(text, output_file)
+            provider = "gtts"
+            key = self.cache.make_key(provider, self._voice(provider), text)
+            success = self._speak_gtts(text, output_file)
+
+        if success:
+            with open(output_file, "rb") as f:
+                self.cache.put(key, f.read())
+        return success
+
+    def prewarm(self, phrases):
+        """Synthesizes fixed phrases into the cache ahead of time (skips cached ones)."""
+        for text in phrases:
+            provider = config_instance.get("tts_provider", "gtts")
+            key = self.cache.make_key(provider, self._voice(provider), text)
+            if key in self.cache.memory or os.path.exists(self.cache._path(key)):
+                continue
+            tmp_path = f"/tmp/tts_prewarm_{uuid.uuid4().hex}.mp3"
+            try:
+                self.speak(text, tmp_path)
+            except Exception as e:
+                logger.error(f"TTS prewarm failed for '{text}': {e}")
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        logger.info(f"TTS cache prewarmed: {self.cache.stats()}")
 
     def _speak_gtts(self, text, output_file):
         """Standard Google Translate TTS (Free, Robotic)"""
@@ -53,7 +218,7 @@ class TTSManager:
             "voice": voice_id
         }
         
-        response = requests.post(api_url, headers=headers, json=payload, timeout=10)
+        response = backend_instance.get("tts").post(api_url, headers=headers, json=payload)
         
         if response.status_code == 200:
             with open(output_file, "wb") as f:
@@ -0,0 +1,238 @@
+import io
+import os
+import re
+import json
+import time
+import logging
+import threading
+import numpy as np
+from PIL import Image
+from src.config import config_instance
+
+logger = logging.getLogger("VisionCache")
+
+def frame_signature(png_bytes, thumb_size=(64, 36)):
+    """
+    Returns (dhash, thumbnail) for a screenshot.
+    dhash: 64-bit difference hash (9x8 grayscale), stable across meetings.
+    thumbnail: small grayscale float array used for the frame-to-frame diff.
+    """
+    img = Image.open(io.BytesIO(png_bytes)).convert("L")
+    small = np.asarray(img.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    dhash = 0
+    for bit in bits:
+        dhash = (dhash << 1) | int(bit)
+    thumb = np.asarray(img.resize(thumb_size, Image.BILINEAR), dtype=np.float32)
+    return dhash, thumb
+
+# Bounding box of the foreground dialog (join form, audio prompt, launch card), in CSS px.
+DIALOG_BBOX_JS = """
+const visible = el => { const r = el.getBoundingClientRect(); return r.width > 40 && r.height > 40; };
+const candidates = Array.from(document.querySelectorAll(
+    '[role="dialog"], [role="alertdialog"], .zm-modal, .join-dialog, .preview-meeting-info, form'
+)).filter(visible);
+if (!candidates.length) return null;
+const area = el => { const r = el.getBoundingClientRect(); return r.width * r.height; };
+const r = candidates.sort((a, b) => area(b) - area(a))[0].getBoundingClientRect();
+return {x: r.left, y: r.top, width: r.width, height: r.height,
+        viewport_width: window.innerWidth, viewport_height: window.innerHeight};
+"""
+
+def dialog_region(driver):
+    """Returns the dialog bbox from DIALOG_BBOX_JS, or None if there is no dialog."""
+    try:
+        return driver.execute_script(DIALOG_BBOX_JS)
+    except Exception as e:
+        logger.warning(f"Dialog bbox probe failed: {e}")
+        return None
+
+def prepare_frame(png_bytes, max_side=768, fmt="JPEG", quality=70, region=None, margin=24):
+    """
+    Shrinks a screenshot before it is sent to the vision model.
+
+    Crops to `region` (CSS px bbox with viewport size, from dialog_region) plus
+    `margin`, unless it covers almost the whole page; downscales so the longer
+    side is at most `max_side`; re-encodes as JPEG or WebP at `quality`.
+    Returns the encoded bytes.
+    """
+    img = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+
+    if region and region.get("viewport_width"):
+        # Screenshot pixels per CSS pixel (devicePixelRatio / zoom)
+        sx = img.width / region["viewport_width"]
+        sy = img.height / region["viewport_height"]
+        box = (
+            max(0, int((region["x"] - margin) * sx)),
+            max(0, int((region["y"] - margin) * sy)),
+            min(img.width, int((region["x"] + region["width"] + margin) * sx)),
+            min(img.height, int((region["y"] + region["height"] + margin) * sy)),
+        )
+        crop_area = (box[2] - box[0]) * (box[3] - box[1])
+        if box[2] > box[0] and box[3] > box[1] and crop_area < 0.8 * img.width * img.height:
+            img = img.crop(box)
+
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    out = io.BytesIO()
+    fmt = fmt.upper()
+    if fmt == "WEBP":
+        img.save(out, format="WEBP", quality=quality, method=4)
+    elif fmt == "PNG":
+        img.save(out, format="PNG", optimize=True)
+    else:
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+def record_fixture(directory, png_bytes, region, action):
+    """
+    Saves a frame for benchmark_vision.py as `<ACTION>__<ms>.png` (label in the name)
+    plus `.bbox.json` with the dialog region. Labels come from the model and
+    should be reviewed before the set is used to compare variants.
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{action}__{int(time.time() * 1000)}")
+        with open(f"{base}.png", "wb") as f:
+            f.write(png_bytes)
+        if region:
+            with open(f"{base}.bbox.json", "w") as f:
+                json.dump(region, f)
+    except OSError as e:
+        logger.warning(f"Failed to record vision fixture: {e}")
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def join_scope(url):
+    """Page kind of a join-flow URL (host + path with meeting IDs masked), e.g. 'zoom.us/wc/#/join'."""
+    match = re.match(r"^[a-z]+://([^/?#]+)([^?#]*)", url or "")
+    if not match:
+        return ""
+    host, path = match.groups()
+    return f"{host.lower()}{re.sub(r'[0-9]+', '#', path)}"
+
+class FrameTracker:
+    """
+    Per-join memory of the previous frame and the decision made for it.
+    A frame counts as unchanged only if its thumbnail differs from the previous
+    one by less than `diff_threshold` on average (grey levels) AND no single
+    thumbnail pixel moved by `max_pixel_diff` or more, so a small icon or
+    banner change is not averaged away.
+    """
+    def __init__(self, diff_threshold=0.5, max_pixel_diff=12):
+        self.diff_threshold = diff_threshold
+        self.max_pixel_diff = max_pixel_diff
+        self.last_thumb = None
+        self.last_decision = None
+
+    def unchanged(self, thumb):
+        if self.last_thumb is None or self.last_decision is None:
+            return False
+        if thumb.shape != self.last_thumb.shape:
+            return False
+        diff = np.abs(thumb - self.last_thumb)
+        return float(np.mean(diff)) < self.diff_threshold and float(np.max(diff)) < self.max_pixel_diff
+
+    def remember(self, thumb, decision):
+        self.last_thumb = thumb
+        self.last_decision = decision
+
+class DecisionCache:
+    """
+    Cross-meeting cache of vision decisions keyed by screenshot dHash.
+
+    Zoom's pre-join screens look the same in every meeting, so a frame within
+    `max_distance` bits of a known hash on the same page kind (join_scope of the
+    URL) reuses that decision instead of calling the vision model. Persisted as
+    JSON so it survives restarts.
+
+    Only pre-join navigation actions are cached. In-meeting and terminal states
+    (CLICK_JOIN_AUDIO, END_SUCCESS, MEETING_ENDED) differ from each other by
+    details a 64-bit dHash cannot see (a muted mic icon, an "ended" banner), so
+    they always go to the model.
+    """
+    CACHEABLE = ("CLICK_LAUNCH", "ENTER_NAME", "SOLVE_CAPTCHA")
+
+    def __init__(self, path="/workspace/vision_cache.json", max_distance=2, max_entries=500):
+        self.path = path
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.entries = {}
+        self.model_calls = 0
+        self.avoided_unchanged = 0
+        self.avoided_cached = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    raw = json.load(f)
+                # Entries are "<scope>|<dhash>"; older unscoped caches are discarded
+                for key, decision in raw.items():
+                    scope, sep, dhash = key.rpartition("|")
+                    if sep and decision and decision[0] in self.CACHEABLE:
+                        self.entries[(scope, int(dhash))] = decision
+                logger.info(f"Loaded {len(self.entries)} cached vision decisions.")
+        except Exception as e:
+            logger.error(f"Failed to load vision cache: {e}")
+
+    def _save(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({f"{scope}|{dhash}": v for (scope, dhash), v in self.entries.items()}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save vision cache: {e}")
+
+    def lookup(self, scope, dhash):
+        with self._lock:
+            best, best_dist = None, self.max_distance + 1
+            for (key_scope, key), decision in self.entries.items():
+                if key_scope != scope:
+                    continue
+                dist = hamming(key, dhash)
+                if dist < best_dist:
+                    best, best_dist = decision, dist
+            return best
+
+    def store(self, scope, dhash, decision):
+        if decision[0] not in self.CACHEABLE:
+            return
+        with self._lock:
+            self.entries[(scope, dhash)] = list(decision)
+            while len(self.entries) > self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+            self._save()
+
+    def record(self, source):
+        """Counts where a decision came from: 'model', 'unchanged' or 'cached'."""
+        with self._lock:
+            if source == "model":
+                self.model_calls += 1
+            elif source == "unchanged":
+                self.avoided_unchanged += 1
+            elif source == "cached":
+                self.avoided_cached += 1
+
+    def stats(self):
+        with self._lock:
+            avoided = self.avoided_unchanged + self.avoided_cached
+            total = avoided + self.model_calls
+            return {
+                "model_calls": self.model_calls,
+                "avoided_unchanged": self.avoided_unchanged,
+                "avoided_cached": self.avoided_cached,
+                "avoided_ratio": round(avoided / total, 3) if total else 0.0,
+                "entries": len(self.entries),
+            }
+
+# Global Instance
+vision_cache_instance = DecisionCache(
+    path=config_instance.get("vision_cache_path", "/workspace/vision_cache.json"),
+    max_distance=config_instance.get("vision_cache_max_distance", 2),
+)
@@ -53,13 +53,13 @@ pactl load-module module-null-sink sink_name=SpeakerSink sink_properties=device.
 pactl set-default-sink SpeakerSink
 
 # B. Create MicSink (Zoom Input)
-# Agent will play 'mpg123' here.
+# Agent streams its voice here (PlaybackEngine via pacat).
 # Chrome will listen to MicSink.monitor (Default Source).
 pactl load-module module-null-sink sink_name=MicSink sink_properties=device.description=Microphone_Sink
 pactl load-module module-virtual-source source_name=MicSource master=MicSink.monitor source_properties=device.description=Microphone_Source
 
 # B. Create MicSink (Zoom Input)
-# Agent will play 'mpg123' here.
+# Agent streams its voice here (PlaybackEngine via pacat).
 # Chrome will listen to MicSink.monitor (Default Source).
 pactl load-module module-null-sink sink_name=MicSink sink_properties=device.description=Microphone_Sink
 pactl load-module module-virtual-source source_name=MicSource master=MicSink.monitor source_properties=device.description=Microphone_Source
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import argparse
+import threading
+
+# Ensure we can import from services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from services.memory.embedding_server import EmbeddingServer, EmbeddingClient
+
+def run_clients(encode_factory, clients, queries):
+    """Runs `clients` threads, each encoding `queries` single texts; returns texts/s."""
+    def worker(idx):
+        encode = encode_factory()
+        for q in range(queries):
+            encode(f"client {idx} asks question number {q} about the project deadline")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return clients * queries / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct encoder vs shared embedding server with cross-client batching.")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--socket", default="/tmp/bench_embeddings.sock")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = EmbeddingServer(args.socket)
+    load_s = time.perf_counter() - start
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    while not os.path.exists(args.socket):
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    client = EmbeddingClient(args.socket)
+    client.encode("warmup")
+    client_s = time.perf_counter() - start
+
+    lock = threading.Lock()
+    def direct():
+        # One in-process model shared by threads (what each worker does today)
+        def encode(text):
+            with lock:
+                return server.encoder.encode(text)
+        return encode
+
+    direct_rate = run_clients(direct, args.clients, args.queries)
+    served_rate = run_clients(lambda: client.encode, args.clients, args.queries)
+    server.shutdown()
+
+    print("\n--- Embedding Server Benchmark ---")
+    print(f"model load (in-process): {load_s:6.2f}s")
+    print(f"client cold start      : {client_s:6.3f}s")
+    print(f"direct encode          : {direct_rate:8.1f} texts/s")
+    print(f"server encode          : {served_rate:8.1f} texts/s (avg batch {server.stats()['avg_batch']})")
+
+if __name__ == "__main__":
+    main()
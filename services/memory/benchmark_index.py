@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import numpy as np
+
+# Ensure we can import from services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from services.memory.numpy_index import NumpyIndex
+
+def make_vectors(n, dim, clusters=64, seed=0):
+    """Clustered unit vectors, closer to real sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def exact_topk(data, queries, k):
+    scores = queries @ data.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+def run(name, search, queries, truth, k):
+    search(queries[0])  # warmup
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(q)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & set(ids))
+    lat = np.array(latencies)
+    print(f"{name:14s} recall@{k}={hits / (k * len(queries)):.3f}  p50={np.percentile(lat, 50):7.2f}ms  p95={np.percentile(lat, 95):7.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy memmap index vs embedded Qdrant: recall and latency.")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--path", default="/tmp/bench_index")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.path, ignore_errors=True)
+    data = make_vectors(args.count, args.dim)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+    truth = exact_topk(data, queries, args.k)
+    ids = list(range(args.count))
+    payloads = [{"seq": i} for i in ids]
+
+    print(f"\n--- Index Benchmark ({args.count} x {args.dim}) ---")
+    for quantize in (False, True):
+        index = NumpyIndex(os.path.join(args.path, f"numpy_{int(quantize)}"), dim=args.dim, quantize=quantize)
+        start = time.perf_counter()
+        for i in range(0, args.count, 1000):
+            index.upsert(ids[i:i + 1000], data[i:i + 1000], payloads[i:i + 1000])
+        print(f"{'numpy int8' if quantize else 'numpy float32':14s} ingest={time.perf_counter() - start:.2f}s")
+        run("numpy int8" if quantize else "numpy float32",
+            lambda q: [int(h["id"]) for h in index.search(q, limit=args.k)], queries, truth, args.k)
+
+    try:
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+    except ImportError:
+        print("qdrant-client not installed; skipping Qdrant comparison.")
+        return
+
+    client = QdrantClient(path=os.path.join(args.path, "qdrant"))
+    client.create_collection("bench", vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE))
+    start = time.perf_counter()
+    for i in range(0, args.count, 1000):
+        client.upsert("bench", points=[
+            models.PointStruct(id=j, vector=data[j].tolist(), payload=payloads[j]) for j in ids[i:i + 1000]
+        ])
+    print(f"{'qdrant':14s} ingest={time.perf_counter() - start:.2f}s")
+    run("qdrant", lambda q: [h.id for h in client.search("bench", query_vector=q.tolist(), limit=args.k)],
+        queries, truth, args.k)
+
+if __name__ == "__main__":
+    main()
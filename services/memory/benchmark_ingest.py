@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+
+# Ensure we can import from services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from services.memory.store import MemoryStore
+
+TOPICS = ["deadline", "server", "design review", "budget", "hiring", "release", "incident", "roadmap"]
+
+def make_items(n):
+    for i in range(n):
+        topic = TOPICS[i % len(TOPICS)]
+        yield f"Note {i}: the team discussed the {topic} and agreed on follow-up item #{i}.", {"topic": topic, "seq": i}
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-item vs batched MemoryStore ingestion on embedded Qdrant.")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--path", default="/tmp/bench_qdrant_ingest")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.path, ignore_errors=True)
+    memory = MemoryStore(use_local=True, local_path=args.path, collection_name="bench_ingest")
+    memory.encoder.encode("warmup")
+
+    print(f"Per-item add_memory x {args.count}...")
+    start = time.perf_counter()
+    for text, metadata in make_items(args.count):
+        memory.add_memory(text, metadata)
+    single_s = time.perf_counter() - start
+    single_rate = args.count / single_s
+
+    print(f"Batched add_memories x {args.count} (batch_size={args.batch_size})...")
+    items = list(make_items(args.count))
+    stats = memory.add_memories(items, ids=[f"bench-{i}" for i in range(args.count)], batch_size=args.batch_size)
+
+    print("\n--- Ingest Benchmark ---")
+    print(f"per-item : {single_rate:8.1f} items/s ({single_s:.2f}s)")
+    print(f"batched  : {stats['items_per_sec']:8.1f} items/s ({stats['seconds']:.2f}s)")
+    print(f"speedup  : {stats['items_per_sec'] / single_rate:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    Embeddings = object
+
+logger = logging.getLogger("EmbeddingCache")
+
+def normalize_text(text: str) -> str:
+    """Queries that differ only in case or whitespace share one cache entry."""
+    return " ".join(text.split()).casefold()
+
+class EmbeddingCache:
+    """
+    Shared query-embedding cache used by both memory backends.
+
+    Tier 1 is a bounded in-memory LRU; tier 2 is an optional SQLite file so
+    warm entries survive restarts. Concurrent requests for the same text are
+    deduplicated: the first caller computes, later callers wait on its Future.
+    `namespace` keeps vectors of different models apart.
+    """
+    def __init__(self, namespace: str, max_entries: int = 10000, disk_path: Optional[str] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.memory = OrderedDict()
+        self.inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+
+        if disk_path:
+            try:
+                with sqlite3.connect(disk_path) as conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            except Exception as e:
+                logger.error(f"Disk tier disabled ({disk_path}): {e}")
+                self.disk_path = None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.namespace}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _disk_get(self, key):
+        if not self.disk_path:
+            return None
+        try:
+            with sqlite3.connect(self.disk_path, timeout=5) as conn:
+                row = conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            return np.frombuffer(row[0], dtype=np.float32) if row else None
+        except Exception as e:
+            logger.warning(f"Disk tier read failed: {e}")
+            return None
+
+    def _disk_put(self, items):
+        if not self.disk_path or not items:
+            return
+        try:
+            with sqlite3.connect(self.disk_path, timeout=5) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items]
+                )
+        except Exception as e:
+            logger.warning(f"Disk tier write failed: {e}")
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _claim(self, texts: List[str]):
+        """
+        Splits requested texts into (results, owned, waiting):
+        cached vectors, keys this caller must compute, and Futures of
+        computations already in flight elsewhere.
+        """
+        results, owned, waiting = {}, OrderedDict(), {}
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                if key in results or key in owned or key in waiting:
+                    continue
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    results[key] = self.memory[key]
+                    self.hits += 1
+                elif key in self.inflight:
+                    waiting[key] = self.inflight[key]
+                    self.deduplicated += 1
+                else:
+                    future = Future()
+                    self.inflight[key] = future
+                    owned[key] = (text, future)
+
+        # Second tier outside the lock (I/O)
+        for key in list(owned):
+            vector = self._disk_get(key)
+            if vector is not None:
+                text, future = owned.pop(key)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, vector)
+                    self.inflight.pop(key, None)
+                future.set_result(vector)
+                results[key] = vector
+        with self._lock:
+            self.misses += len(owned)
+        return results, owned, waiting
+
+    def _fulfil(self, owned, vectors):
+        items = []
+        with self._lock:
+            for (key, (_, future)), vector in zip(owned.items(), vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                self.inflight.pop(key, None)
+                future.set_result(vector)
+                items.append((key, vector))
+        self._disk_put(items)
+        return dict(items)
+
+    def _fail(self, owned, error):
+        with self._lock:
+            for key, (_, future) in owned.items():
+                self.inflight.pop(key, None)
+                future.set_exception(error)
+
+    def get_many(self, texts: List[str], compute: Callable[[List[str]], List]) -> List[np.ndarray]:
+        """Returns one vector per text; only uncached, not-in-flight texts reach `compute`."""
+        results, owned, waiting = self._claim(texts)
+        if owned:
+            try:
+                vectors = compute([text for text, _ in owned.values()])
+            except Exception as e:
+                self._fail(owned, e)
+                raise
+            results.update(self._fulfil(owned, vectors))
+        for key, future in waiting.items():
+            results[key] = future.result()
+        return [results[self.key(t)] for t in texts]
+
+    async def aget_many(self, texts: List[str], acompute) -> List[np.ndarray]:
+        """Async variant of get_many; `acompute` is a coroutine function."""
+        results, owned, waiting = self._claim(texts)
+        if owned:
+            try:
+                vectors = await acompute([text for text, _ in owned.values()])
+            except Exception as e:
+                self._fail(owned, e)
+                raise
+            results.update(self._fulfil(owned, vectors))
+        for key, future in waiting.items():
+            results[key] = await asyncio.wrap_future(future)
+        return [results[self.key(t)] for t in texts]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "deduplicated": self.deduplicated,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self.memory),
+            }
+
+class CachedEncoder:
+    """SentenceTransformer-compatible `encode` that goes through an EmbeddingCache."""
+    def __init__(self, encoder, cache: EmbeddingCache):
+        self.encoder = encoder
+        self.cache = cache
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = self.cache.get_many(texts, lambda missing: self.encoder.encode(missing, **kwargs))
+        return vectors[0] if single else np.stack(vectors)
+
+    def __getattr__(self, name):
+        return getattr(self.encoder, name)
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper (e.g. around OllamaEmbeddings) that caches
+    queries. Documents are passed through so bulk writes do not evict queries.
+    """
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_query(self, text: str) -> List[float]:
+        vectors = self.cache.get_many([text], lambda missing: [self.embeddings.embed_query(t) for t in missing])
+        return vectors[0].tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async def compute(missing):
+            return [await self.embeddings.aembed_query(t) for t in missing]
+        vectors = await self.cache.aget_many([text], compute)
+        return vectors[0].tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
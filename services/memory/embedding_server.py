@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import queue
+import struct
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from typing import Any, Dict, List
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("EmbeddingServer")
+
+DEFAULT_SOCKET = "/tmp/embeddings.sock"
+
+# Wire format: every message is a 4-byte big-endian length followed by the body.
+# Request: JSON {"op": "encode", "texts": [...]} or {"op": "info"}.
+# Response: JSON header {"ok": true, "n": N, "dim": D} then, for encode, one
+# frame of N*D little-endian float32.
+
+def _send_frame(sock, body: bytes):
+    sock.sendall(struct.pack(">I", len(body)) + body)
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+def _recv_frame(sock) -> bytes:
+    (size,) = struct.unpack(">I", _recv_exact(sock, 4))
+    return _recv_exact(sock, size)
+
+class EmbeddingServer:
+    """
+    Hosts one SentenceTransformer for every process on the machine.
+
+    Each connection is served on its own thread, but encoding happens on a single
+    batcher thread: requests that arrive within `max_wait_ms` of each other are
+    concatenated (up to `max_batch` texts) and encoded in one call, so many
+    clients sending single queries get batch throughput.
+    """
+    def __init__(self, socket_path=DEFAULT_SOCKET, model_name="all-MiniLM-L6-v2", max_batch=64, max_wait_ms=5):
+        from sentence_transformers import SentenceTransformer
+
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = queue.Queue()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+        logger.info(f"Loading Embedding Model ({model_name})...")
+        self.encoder = SentenceTransformer(model_name)
+        self.dim = self.encoder.get_sentence_embedding_dimension()
+        logger.info("Embedding Model Loaded.")
+
+        self._batcher = threading.Thread(target=self._batch_loop, daemon=True)
+        self._batcher.start()
+        self.server = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Queues texts for the next batch and waits for their vectors."""
+        future = Future()
+        self.pending.put((texts, future))
+        return future.result()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self.pending.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            texts = [t for item, _ in batch for t in item]
+            try:
+                vectors = np.asarray(self.encoder.encode(texts, batch_size=self.max_batch), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Batch encode failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for item, future in batch:
+                future.set_result(vectors[offset:offset + len(item)])
+                offset += len(item)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch": round(self.texts / self.batches, 1) if self.batches else 0.0,
+        }
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        owner = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        request = json.loads(_recv_frame(self.request))
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        if request.get("op") == "info":
+                            header = {"ok": True, "model": owner.model_name, "dim": owner.dim, "stats": owner.stats()}
+                            _send_frame(self.request, json.dumps(header).encode())
+                            continue
+                        vectors = owner.encode(list(request.get("texts", [])))
+                        header = {"ok": True, "n": len(vectors), "dim": owner.dim}
+                        _send_frame(self.request, json.dumps(header).encode())
+                        _send_frame(self.request, vectors.astype("<f4").tobytes())
+                    except Exception as e:
+                        _send_frame(self.request, json.dumps({"ok": False, "error": str(e)}).encode())
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        logger.info(f"Embedding server listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+
+class EmbeddingClient:
+    """
+    Thin SentenceTransformer stand-in that forwards `encode` to an EmbeddingServer.
+    Keeps one connection per thread and reconnects once if the server restarted.
+    """
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _call(self, request):
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send_frame(sock, json.dumps(request).encode())
+                header = json.loads(_recv_frame(sock))
+                if not header.get("ok"):
+                    raise RuntimeError(header.get("error", "embedding server error"))
+                if request["op"] != "encode":
+                    return header, None
+                body = _recv_frame(sock)
+                return header, np.frombuffer(body, dtype="<f4").reshape(header["n"], header["dim"])
+            except (ConnectionError, OSError):
+                self._reset()
+                if attempt:
+                    raise
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        _, vectors = self._call({"op": "encode", "texts": texts})
+        return vectors[0] if single else vectors
+
+    def info(self) -> Dict[str, Any]:
+        header, _ = self._call({"op": "info"})
+        return header
+
+    def get_sentence_embedding_dimension(self):
+        return self.info()["dim"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server over a Unix socket.")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    EmbeddingServer(args.socket, args.model, args.max_batch, args.max_wait_ms).serve_forever()
+
+if __name__ == "__main__":
+    main()
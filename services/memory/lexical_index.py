@@ -0,0 +1,162 @@
+import re
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("LexicalIndex")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+# Question words and glue; OR-ing them would match nearly every chunk
+STOPWORDS = frozenset("""
+a about an and are as at be but by can did do does for from had has have how i if in is it its me my
+of on or our so that the their them then there these they this to us was we were what when where which
+who why will with would you your
+""".split())
+
+def query_terms(query: str) -> List[str]:
+    """Distinct lowercase tokens of `query` without stopwords."""
+    tokens = list(dict.fromkeys(TOKEN_RE.findall(query.lower())))
+    return [t for t in tokens if t not in STOPWORDS]
+
+def filter_sql(filters: Optional[Dict[str, Any]], column: str = "payload") -> Tuple[str, list]:
+    """
+    Translates a filter dict into a SQL condition on a JSON column.
+
+    {"project": "Apollo"}           -> equality
+    {"type": ["config", "secret"]}  -> any of
+    {"timestamp": {"gte": t0}}      -> range (gt/gte/lt/lte)
+    All conditions must hold. Returns ("", []) when there is nothing to filter.
+    """
+    clauses, params = [], []
+    for field, cond in (filters or {}).items():
+        if not FIELD_RE.match(field):
+            raise ValueError(f"Invalid filter field: {field}")
+        expr = f"json_extract({column}, '$.{field}')"
+        if isinstance(cond, dict):
+            for op, sql_op in (("gt", ">"), ("gte", ">="), ("lt", "<"), ("lte", "<=")):
+                if op in cond:
+                    clauses.append(f"{expr} {sql_op} ?")
+                    params.append(cond[op])
+        elif isinstance(cond, (list, tuple, set)):
+            cond = list(cond)
+            clauses.append(f"{expr} IN ({','.join('?' * len(cond))})")
+            params.extend(cond)
+        else:
+            clauses.append(f"{expr} = ?")
+            params.append(cond)
+    return " AND ".join(clauses), params
+
+class LexicalIndex:
+    """
+    BM25 keyword index (SQLite FTS5) kept next to the vector store.
+
+    Exact tokens such as IPs, ticket numbers or code names rank poorly in
+    embedding space; FTS5 ranks them by BM25 instead. The full payload is stored
+    unindexed alongside the text so metadata filters and result payloads need no
+    round trip to the vector store. FTS5 can't index `point_id`, so a regular
+    `ids` table maps each point ID to its docs rowid and replaces/deletes go
+    by rowid instead of scanning the whole table.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(point_id UNINDEXED, text, payload UNINDEXED)"
+            )
+            has_ids = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ids'").fetchone()
+            conn.execute("CREATE TABLE IF NOT EXISTS ids (point_id TEXT PRIMARY KEY, doc_rowid INTEGER NOT NULL)")
+            if not has_ids:
+                # Index files written before the ids table existed
+                conn.execute("INSERT OR REPLACE INTO ids (point_id, doc_rowid) SELECT point_id, rowid FROM docs")
+
+    @staticmethod
+    def _delete_ids(conn, point_ids):
+        for (rowid,) in conn.execute(
+            f"SELECT doc_rowid FROM ids WHERE point_id IN ({','.join('?' * len(point_ids))})", point_ids
+        ).fetchall():
+            conn.execute("DELETE FROM docs WHERE rowid = ?", (rowid,))
+        conn.execute(f"DELETE FROM ids WHERE point_id IN ({','.join('?' * len(point_ids))})", point_ids)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def add(self, items: Iterable[Tuple[Any, str, Dict[str, Any]]]):
+        """Indexes (point_id, text, payload) items, replacing earlier versions."""
+        # Last occurrence of an ID within the batch wins
+        rows = list({str(pid): (str(pid), text or "", json.dumps(payload)) for pid, text, payload in items}.values())
+        if not rows:
+            return
+        with self._lock, closing(self._connect()) as conn, conn:
+            for start in range(0, len(rows), 500):
+                self._delete_ids(conn, [r[0] for r in rows[start:start + 500]])
+            for row in rows:
+                rowid = conn.execute("INSERT INTO docs (point_id, text, payload) VALUES (?, ?, ?)", row).lastrowid
+                conn.execute("INSERT INTO ids (point_id, doc_rowid) VALUES (?, ?)", (row[0], rowid))
+
+    def delete(self, point_ids: Iterable[Any]):
+        point_ids = [str(p) for p in point_ids]
+        with self._lock, closing(self._connect()) as conn, conn:
+            for start in range(0, len(point_ids), 500):
+                self._delete_ids(conn, point_ids[start:start + 500])
+
+    @staticmethod
+    def match_query(query: str) -> Optional[str]:
+        """
+        Any-term FTS5 query over the non-stopword tokens; each token is quoted so
+        punctuation can't break the syntax. None if nothing is left to match.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+        return " OR ".join(f'"{t}"' for t in terms)
+
+    def search(self, query: str, limit: int = 20, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Top matches as dicts with id, score (BM25, higher is better), coverage
+        (share of the query's terms found in the text) and payload.
+        """
+        match = self.match_query(query)
+        if not match:
+            return []
+        terms = query_terms(query)
+        where, params = filter_sql(filters)
+        sql = "SELECT point_id, -bm25(docs) AS score, text, payload FROM docs WHERE docs MATCH ?"
+        if where:
+            sql += f" AND {where}"
+        sql += " ORDER BY bm25(docs) LIMIT ?"
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(sql, (match, *params, limit)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Lexical search failed: {e}")
+            return []
+        hits = []
+        for pid, score, text, payload in rows:
+            tokens = set(TOKEN_RE.findall(text.lower()))
+            coverage = sum(t in tokens for t in terms) / len(terms)
+            hits.append({"id": pid, "score": score, "coverage": coverage, "payload": json.loads(payload)})
+        return hits
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+def rrf_fuse(rankings: List[List[Dict[str, Any]]], k: int = 60, limit: int = 5) -> List[Tuple[str, float, Dict[str, Any]]]:
+    """
+    Reciprocal-rank fusion of ranked hit lists (dicts with id and payload):
+    score(d) = sum over lists of 1 / (k + rank). Returns (id, score, first hit seen).
+    """
+    fused, hits = {}, {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            fused[hit["id"]] = fused.get(hit["id"], 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit["id"], hit)
+    ordered = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [(pid, score, hits[pid]) for pid, score in ordered]
@@ -0,0 +1,266 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+try:
+    from services.memory.lexical_index import filter_sql
+except ImportError:
+    from lexical_index import filter_sql
+
+logger = logging.getLogger("NumpyIndex")
+
+class NumpyIndex:
+    """
+    Single-node vector index on memory-mapped NumPy arrays.
+
+    Vectors are L2-normalised on insert so cosine similarity is one matrix-vector
+    product; top-k uses argpartition. With `quantize=True` rows are stored as int8
+    with a per-row float32 scale (4x less memory). Payloads, caller IDs and
+    tombstones live in a SQLite sidecar. Rows are append-only: upserting an
+    existing ID tombstones the old row, and `compact()` rewrites live rows.
+
+    Layout of `path`: meta.json, vectors.npy (float32 or int8), scales.npy
+    (int8 only), payloads.db.
+    """
+    GROWTH = 2
+    MIN_CAPACITY = 1024
+    CHUNK_ROWS = 16384
+
+    def __init__(self, path: str, dim: int = 384, quantize: bool = False):
+        self.path = path
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        self.dim = meta.get("dim", dim)
+        self.quantize = meta.get("quantize", quantize)
+        self.count = meta.get("count", 0)
+        capacity = meta.get("capacity", self.MIN_CAPACITY)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE, payload TEXT, deleted INTEGER DEFAULT 0)"
+            )
+            rows = conn.execute("SELECT row FROM points WHERE deleted = 0").fetchall()
+            # A crash after the vector write but before the meta write leaves rows
+            # beyond `count` in SQLite; keep only what meta.json vouches for.
+            conn.execute("DELETE FROM points WHERE row >= ?", (self.count,))
+
+        self._open(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        for (row,) in rows:
+            if row < self.count:
+                self.alive[row] = True
+
+    # --- Storage ---
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.path, "payloads.db"), timeout=30)
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, "meta.json"), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_meta(self):
+        meta = {"dim": self.dim, "quantize": self.quantize, "count": self.count, "capacity": self.capacity}
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def _memmap(self, name, dtype, shape):
+        file_path = os.path.join(self.path, name)
+        if os.path.exists(file_path):
+            arr = np.load(file_path, mmap_mode="r+")
+            if arr.shape[0] >= shape[0]:
+                return arr
+            # Grow: copy into a larger file, then swap it in
+            grown = np.lib.format.open_memmap(f"{file_path}.tmp", mode="w+", dtype=dtype, shape=shape)
+            grown[:arr.shape[0]] = arr
+            grown.flush()
+            del arr, grown
+            os.replace(f"{file_path}.tmp", file_path)
+            return np.load(file_path, mmap_mode="r+")
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+
+    def _open(self, capacity):
+        self.capacity = capacity
+        if self.quantize:
+            self.vectors = self._memmap("vectors.npy", np.int8, (capacity, self.dim))
+            self.scales = self._memmap("scales.npy", np.float32, (capacity,))
+        else:
+            self.vectors = self._memmap("vectors.npy", np.float32, (capacity, self.dim))
+            self.scales = None
+
+    def _ensure_capacity(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= self.GROWTH
+        self.vectors.flush()
+        self.vectors = None
+        self.scales = None
+        self._open(capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+
+    # --- Writes ---
+
+    def _encode_rows(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        if not self.quantize:
+            return vectors, None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def upsert(self, ids: Sequence[Any], vectors, payloads: Sequence[Dict[str, Any]]):
+        """Appends rows; an ID that already exists is tombstoned and re-appended."""
+        ids = [str(i) for i in ids]
+        # Within one batch the last occurrence of an ID wins
+        last = {pid: i for i, pid in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids = [ids[i] for i in keep]
+            vectors = np.asarray(vectors)[keep]
+            payloads = [payloads[i] for i in keep]
+        rows, scales = self._encode_rows(vectors)
+        with self._lock, closing(self._connect()) as conn, conn:
+            self._ensure_capacity(self.count + len(ids))
+            start = self.count
+            self.vectors[start:start + len(ids)] = rows
+            if self.quantize:
+                self.scales[start:start + len(ids)] = scales
+                self.scales.flush()
+            self.vectors.flush()
+
+            placeholders = ",".join("?" * len(ids))
+            for (row,) in conn.execute(f"SELECT row FROM points WHERE id IN ({placeholders})", ids).fetchall():
+                self.alive[row] = False
+            conn.execute(f"DELETE FROM points WHERE id IN ({placeholders})", ids)
+            conn.executemany(
+                "INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)",
+                [(start + i, pid, json.dumps(payload)) for i, (pid, payload) in enumerate(zip(ids, payloads))]
+            )
+            self.alive[start:start + len(ids)] = True
+            self.count += len(ids)
+            self._write_meta()
+
+    def delete(self, ids: Sequence[Any]) -> int:
+        """Tombstones rows by caller ID; space is reclaimed by compact()."""
+        ids = [str(i) for i in ids]
+        placeholders = ",".join("?" * len(ids))
+        with self._lock, closing(self._connect()) as conn, conn:
+            rows = conn.execute(f"SELECT row FROM points WHERE id IN ({placeholders}) AND deleted = 0", ids).fetchall()
+            for (row,) in rows:
+                self.alive[row] = False
+            conn.execute(f"UPDATE points SET deleted = 1 WHERE id IN ({placeholders})", ids)
+            return len(rows)
+
+    def compact(self):
+        """Rewrites the matrix without tombstoned rows."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            live = np.flatnonzero(self.alive[:self.count])
+            vectors = np.array(self.vectors[live])
+            scales = np.array(self.scales[live]) if self.quantize else None
+            records = conn.execute("SELECT row, id, payload FROM points WHERE deleted = 0 ORDER BY row").fetchall()
+
+            self.vectors[:len(live)] = vectors
+            if self.quantize:
+                self.scales[:len(live)] = scales
+                self.scales.flush()
+            self.vectors.flush()
+            conn.execute("DELETE FROM points")
+            conn.executemany(
+                "INSERT INTO points (row, id, payload) VALUES (?, ?, ?)",
+                [(i, pid, payload) for i, (_, pid, payload) in enumerate(records)]
+            )
+            self.alive[:] = False
+            self.alive[:len(live)] = True
+            self.count = len(live)
+            self._write_meta()
+            logger.info(f"Compacted index to {self.count} rows")
+
+    # --- Reads ---
+
+    def __len__(self):
+        return int(self.alive[:self.count].sum())
+
+    def scores(self, query) -> np.ndarray:
+        """Cosine similarity of `query` against every stored row (tombstones included)."""
+        q = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        block = self.vectors[:self.count]
+        if not self.quantize:
+            return block @ q
+        # int8 @ float32 would upcast the whole matrix to float64; convert in chunks
+        out = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, self.CHUNK_ROWS):
+            end = start + self.CHUNK_ROWS
+            out[start:end] = block[start:end].astype(np.float32) @ q
+        return out * self.scales[:self.count]
+
+    def filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Bool mask of rows whose payload satisfies `filters` (see filter_sql)."""
+        where, params = filter_sql(filters)
+        mask = np.zeros(self.count, dtype=bool)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT row FROM points WHERE deleted = 0 AND {where or '1'}", params).fetchall()
+        for (row,) in rows:
+            if row < self.count:
+                mask[row] = True
+        return mask
+
+    def iter_points(self):
+        """Yields (id, payload) for every live point."""
+        with closing(self._connect()) as conn:
+            for pid, payload in conn.execute("SELECT id, payload FROM points WHERE deleted = 0 ORDER BY row"):
+                yield pid, json.loads(payload)
+
+    def search(self, query, limit: int = 5, score_threshold: Optional[float] = None,
+               mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Top-`limit` rows by cosine similarity as dicts with id, score, payload.
+        `mask` (bool array over rows) restricts the candidates, e.g. to a filter.
+        """
+        with self._lock:
+            if self.count == 0:
+                return []
+            scores = self.scores(query)
+            candidates = self.alive[:self.count] if mask is None else self.alive[:self.count] & mask[:self.count]
+            scores = np.where(candidates, scores, -np.inf)
+            k = min(limit, int(candidates.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            if score_threshold is not None:
+                top = top[scores[top] >= score_threshold]
+            return self._fetch(top, scores)
+
+    def _fetch(self, rows, scores) -> List[Dict[str, Any]]:
+        if len(rows) == 0:
+            return []
+        rows = [int(r) for r in rows]
+        with closing(self._connect()) as conn:
+            records = conn.execute(
+                f"SELECT row, id, payload FROM points WHERE row IN ({','.join('?' * len(rows))})", rows
+            ).fetchall()
+        by_row = {row: (pid, payload) for row, pid, payload in records}
+        return [
+            {"id": by_row[r][0], "score": float(scores[r]), "payload": json.loads(by_row[r][1])}
+            for r in rows if r in by_row
+        ]
@@ -1,44 +1,138 @@
 import os
 import time
+import uuid
 import logging
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
-from sentence_transformers import SentenceTransformer
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+try:
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+except ImportError:
+    QdrantClient = None # Only the "numpy" backend is available
+
+try:
+    from services.memory.embedding_cache import EmbeddingCache, CachedEncoder
+    from services.memory.embedding_server import EmbeddingClient
+    from services.memory.numpy_index import NumpyIndex
+    from services.memory.lexical_index import LexicalIndex, rrf_fuse
+except ImportError:
+    from embedding_cache import EmbeddingCache, CachedEncoder
+    from embedding_server import EmbeddingClient
+    from numpy_index import NumpyIndex
+    from lexical_index import LexicalIndex, rrf_fuse
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MemoryService")
 
+class LazyEncoder:
+    """
+    Defers loading the embedding model until the first encode.
+
+    With `socket_path` pointing at a running embedding_server the model is not
+    loaded in this process at all; otherwise sentence_transformers (and torch) are
+    only imported when needed.
+    """
+    def __init__(self, model_name="all-MiniLM-L6-v2", socket_path=None):
+        self.model_name = model_name
+        self.socket_path = socket_path
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._encoder is not None
+
+    def get(self):
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    self._encoder = self._load()
+        return self._encoder
+
+    def _load(self):
+        if self.socket_path and os.path.exists(self.socket_path):
+            logger.info(f"Using shared embedding server at {self.socket_path}")
+            return EmbeddingClient(self.socket_path)
+
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading Embedding Model ({self.model_name})...")
+        encoder = SentenceTransformer(self.model_name)
+        logger.info("Embedding Model Loaded.")
+        return encoder
+
+    def encode(self, sentences, **kwargs):
+        return self.get().encode(sentences, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
 class MemoryStore:
-    def __init__(self, qdrant_host="localhost", qdrant_port=6333, collection_name="agent_memory", use_local=False, local_path="./qdrant_data"):
+    def __init__(self, qdrant_host="localhost", qdrant_port=6333, collection_name="agent_memory", use_local=False, local_path="./qdrant_data",
+                 query_cache_size=10000, query_cache_path=None, embedding_socket=None,
+                 backend=None, quantize=False, hybrid=True, lexical_path=None, payload_indexes=("project", "type")):
         self.collection_name = collection_name
+        self.backend = backend or os.getenv("MEMORY_BACKEND", "qdrant")
+        self.is_local = use_local or qdrant_host == "local" or self.backend == "numpy"
+        self.last_ingest_stats = None
+        self.client = None
+        self.index = None
+        self.lexical = None
+        self.indexed_fields = set()
         
-        # Initialize Qdrant Client (Remote or Embedded)
+        # Initialize Vector Store (NumPy memmap, Remote or Embedded Qdrant)
         try:
-            if use_local or qdrant_host == "local":
+            if self.backend == "numpy":
+                index_path = os.path.join(local_path, self.collection_name)
+                logger.info(f"Opening NumPy index at: {index_path} (quantize={quantize})")
+                self.index = NumpyIndex(index_path, dim=384, quantize=quantize)
+            elif self.is_local:
                 logger.info(f"Connecting to Local Embedded Qdrant at: {local_path}")
                 self.client = QdrantClient(path=local_path)
             else:
                 logger.info(f"Connecting to Remote Qdrant at {qdrant_host}:{qdrant_port}")
                 self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
             
-            logger.info("Qdrant Connected.")
+            logger.info("Vector Store Ready.")
         except Exception as e:
-            logger.error(f"Failed to connect to Qdrant: {e}")
+            logger.error(f"Failed to open vector store: {e}")
             raise e
 
-        # Initialize Embedding Model (MiniLM is fast and good specific for semantic search)
+        # Embedding Model (MiniLM is fast and good specific for semantic search)
         # In production, we might use OpenAI embeddings
-        logger.info("Loading Embedding Model (all-MiniLM-L6-v2)...")
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-        logger.info("Embedding Model Loaded.")
+        # Loaded on first use, or served by a shared embedding_server (EMBEDDING_SOCKET)
+        self.encoder = LazyEncoder('all-MiniLM-L6-v2', socket_path=embedding_socket or os.getenv("EMBEDDING_SOCKET"))
+
+        # Repeated queries ("what did we decide?") skip the encoder entirely.
+        # Only queries go through the cache; bulk ingestion would just evict them.
+        self.query_cache = EmbeddingCache(
+            namespace="all-MiniLM-L6-v2",
+            max_entries=query_cache_size,
+            disk_path=query_cache_path or os.getenv("EMBEDDING_CACHE_PATH")
+        )
+        self.query_encoder = CachedEncoder(self.encoder, self.query_cache)
+
+        # BM25 keyword index next to the vectors, for exact tokens (IPs, code names)
+        if hybrid:
+            lexical_path = lexical_path or os.getenv("LEXICAL_INDEX_PATH") or os.path.join(local_path, f"{collection_name}.lexical.db")
+            os.makedirs(os.path.dirname(os.path.abspath(lexical_path)), exist_ok=True)
+            self.lexical = LexicalIndex(lexical_path)
 
         # Ensure Collection Exists
         self._init_collection()
+        for field in payload_indexes:
+            self._ensure_payload_index(field, "keyword")
 
     def _init_collection(self):
         """Create the collection if it doesn't exist."""
+        if self.index is not None:
+            return
         try:
             collections = self.client.get_collections()
             exists = any(c.name == self.collection_name for c in collections.collections)
@@ -57,7 +151,67 @@ class MemoryStore:
         except Exception as e:
             logger.error(f"Failed to initialize collection: {e}")
 
-    def add_memory(self, text: str, metadata: Dict[str, Any] = None):
+    def _ensure_payload_index(self, field: str, schema: str):
+        """Creates a Qdrant payload index so filters on `field` don't scan every point."""
+        if self.client is None or field in self.indexed_fields:
+            return
+        try:
+            field_schema = {
+                "keyword": models.PayloadSchemaType.KEYWORD,
+                "float": models.PayloadSchemaType.FLOAT,
+                "bool": models.PayloadSchemaType.BOOL,
+            }[schema]
+            self.client.create_payload_index(
+                collection_name=self.collection_name, field_name=field, field_schema=field_schema
+            )
+        except Exception as e:
+            logger.warning(f"Payload index on '{field}' not created: {e}")
+        self.indexed_fields.add(field)
+
+    def _qdrant_filter(self, filters: Optional[Dict[str, Any]]):
+        """
+        Builds a Qdrant Filter from the filter dict used across the store:
+        scalar -> match, list -> match any, {"gte": ..} -> range. All must hold.
+        """
+        if not filters:
+            return None
+        conditions = []
+        for field, cond in filters.items():
+            if isinstance(cond, dict):
+                self._ensure_payload_index(field, "float")
+                conditions.append(models.FieldCondition(key=field, range=models.Range(**cond)))
+            elif isinstance(cond, (list, tuple, set)):
+                self._ensure_payload_index(field, "keyword")
+                conditions.append(models.FieldCondition(key=field, match=models.MatchAny(any=list(cond))))
+            else:
+                self._ensure_payload_index(field, "bool" if isinstance(cond, bool) else "keyword")
+                conditions.append(models.FieldCondition(key=field, match=models.MatchValue(value=cond)))
+        return models.Filter(must=conditions)
+
+    @staticmethod
+    def _point_id(memory_id=None):
+        """
+        Qdrant accepts unsigned ints and UUIDs. Other caller IDs are mapped to a
+        deterministic UUIDv5 so re-ingesting the same ID overwrites (idempotent upsert).
+        """
+        if memory_id is None:
+            return str(uuid.uuid4())
+        if isinstance(memory_id, int):
+            return memory_id
+        try:
+            return str(uuid.UUID(str(memory_id)))
+        except ValueError:
+            return str(uuid.uuid5(uuid.NAMESPACE_URL, str(memory_id)))
+
+    @staticmethod
+    def _canonical_id(point_id) -> str:
+        """One string form per point (dashed UUID or int), whichever backend or index returned it."""
+        try:
+            return str(uuid.UUID(str(point_id)))
+        except ValueError:
+            return str(point_id)
+
+    def add_memory(self, text: str, metadata: Dict[str, Any] = None, memory_id=None):
         """
         Embeds text and stores it in Qdrant.
         """
@@ -66,53 +220,226 @@ class MemoryStore:
 
         try:
             vector = self.encoder.encode(text).tolist()
-            payload = metadata or {}
+            payload = dict(metadata or {})
             payload["text"] = text
             payload["timestamp"] = time.time()
 
-            operation_info = self.client.upsert(
+            self._upsert([(self._point_id(memory_id), vector, payload)])
+            logger.info(f"Memory stored: '{text[:30]}...'")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add memory: {e}")
+            return False
+
+    def add_memories(self, items: Iterable[Tuple[str, Dict[str, Any]]], ids: Optional[List[Any]] = None,
+                     batch_size: int = 64, parallel: int = 2) -> Dict[str, Any]:
+        """
+        Bulk version of add_memory. `items` yields (text, metadata); `ids`, if given,
+        supplies one caller ID per item for idempotent upserts.
+        Returns throughput stats (see ingest_stream).
+        """
+        if ids is not None:
+            items = ((text, metadata, memory_id) for (text, metadata), memory_id in zip(items, ids))
+        return self.ingest_stream(items, batch_size=batch_size, parallel=parallel)
+
+    def ingest_stream(self, stream: Iterable[Tuple], batch_size: int = 64, parallel: int = 2) -> Dict[str, Any]:
+        """
+        Streaming ingest of (text, metadata) or (text, metadata, id) tuples.
+
+        Items are cut into micro-batches; each batch is encoded in one encoder call
+        and upserted as one request. Uploads run on `parallel` threads so encoding
+        of the next batch overlaps with the network round trip of the previous one
+        (embedded Qdrant is written from a single thread). Items with empty text are
+        skipped and counted in the stats.
+        """
+        start = time.perf_counter()
+        count = 0
+        failed = 0
+        skipped = 0
+        workers = 1 if self.is_local else max(1, parallel)
+        stream = iter(stream)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            uploads = []
+            while True:
+                raw = list(islice(stream, batch_size))
+                if not raw:
+                    break
+                batch = [item for item in raw if item and item[0]]
+                skipped += len(raw) - len(batch)
+                if not batch:
+                    continue
+                texts = [item[0] for item in batch]
+                vectors = self.encoder.encode(texts, batch_size=batch_size)
+                now = time.time()
+                points = []
+                for item, vector in zip(batch, vectors):
+                    payload = dict(item[1] or {})
+                    payload["text"] = item[0]
+                    payload["timestamp"] = now
+                    points.append((self._point_id(item[2] if len(item) > 2 else None), vector, payload))
+                uploads.append((len(points), pool.submit(self._upsert, points)))
+                count += len(points)
+
+                # Bound memory: don't let more than `workers` batches queue up
+                while len(uploads) > workers:
+                    failed += self._wait_upload(*uploads.pop(0))
+            for size, future in uploads:
+                failed += self._wait_upload(size, future)
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "count": count - failed,
+            "failed": failed,
+            "skipped": skipped,
+            "seconds": round(elapsed, 3),
+            "items_per_sec": round((count - failed) / elapsed, 1) if elapsed else 0.0,
+        }
+        self.last_ingest_stats = stats
+        logger.info(f"Ingested {stats['count']} memories in {stats['seconds']}s ({stats['items_per_sec']} items/s)")
+        return stats
+
+    def _upsert(self, points: List[Tuple[Any, Any, Dict[str, Any]]]):
+        """Writes (id, vector, payload) points to whichever backend is active."""
+        if self.index is not None:
+            self.index.upsert([p[0] for p in points], [p[1] for p in points], [p[2] for p in points])
+        else:
+            self.client.upsert(
                 collection_name=self.collection_name,
                 points=[
-                    models.PointStruct(
-                        id=str(os.urandom(16).hex()),  # Simple random ID
-                        vector=vector,
-                        payload=payload
-                    )
+                    models.PointStruct(id=point_id, vector=list(map(float, vector)), payload=payload)
+                    for point_id, vector, payload in points
                 ]
             )
-            logger.info(f"Memory stored: '{text[:30]}...'")
+        if self.lexical is not None:
+            self.lexical.add((point_id, payload.get("text"), payload) for point_id, _, payload in points)
+
+    def delete_memories(self, memory_ids: List[Any]) -> bool:
+        """Removes memories by the caller IDs they were stored with."""
+        try:
+            point_ids = [self._point_id(m) for m in memory_ids]
+            if self.index is not None:
+                self.index.delete(point_ids)
+            else:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=point_ids)
+                )
+            if self.lexical is not None:
+                self.lexical.delete(point_ids)
             return True
         except Exception as e:
-            logger.error(f"Failed to add memory: {e}")
+            logger.error(f"Failed to delete memories: {e}")
             return False
 
-    def search_memory(self, query: str, limit: int = 5, score_threshold: float = 0.5) -> List[Dict]:
+    @staticmethod
+    def _wait_upload(size, future):
+        """Returns the number of points lost if the batch upload failed."""
+        try:
+            future.result()
+            return 0
+        except Exception as e:
+            logger.error(f"Failed to upload batch of {size} memories: {e}")
+            return size
+
+    def _vector_search(self, query: str, limit: int, score_threshold: float,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Cosine search with filters pushed down to the backend; hits are dicts with id, score, payload."""
+        vector = self.query_encoder.encode(query).tolist()
+
+        if self.index is not None:
+            mask = self.index.filter_mask(filters) if filters else None
+            return self.index.search(vector, limit=limit, score_threshold=score_threshold, mask=mask)
+
+        search_result = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            query_filter=self._qdrant_filter(filters),
+            limit=limit,
+            score_threshold=score_threshold
+        )
+        return [{"id": str(hit.id), "score": hit.score, "payload": hit.payload} for hit in search_result]
+
+    def search_memory(self, query: str, limit: int = 5, score_threshold: float = 0.5,
+                      filters: Optional[Dict[str, Any]] = None, mode: str = "vector", rrf_k: int = 60,
+                      lexical_min_coverage: float = 0.5) -> List[Dict]:
         """
-        Semantically searches memory for the query.
+        Searches memory for the query.
+
+        mode="vector" (default) is plain cosine search. mode="hybrid" also runs a
+        BM25 keyword search and merges both rankings with reciprocal-rank fusion,
+        so exact tokens are found without raising `limit`. Results are ordered by
+        `rrf_score`; `score` stays the cosine similarity (None for keyword-only
+        hits). `score_threshold` applies to vector hits; a keyword-only hit must
+        contain at least `lexical_min_coverage` of the query's non-stopword terms.
+        `filters` (e.g. {"project": "Apollo"}, {"type": ["config", "secret"]},
+        {"timestamp": {"gte": t0}}) restrict both searches.
         """
         try:
-            vector = self.encoder.encode(query).tolist()
-            
-            search_result = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=vector,
-                limit=limit,
-                score_threshold=score_threshold
-            )
-            
+            if mode == "vector" or self.lexical is None:
+                return [
+                    {"text": hit["payload"].get("text"), "score": hit["score"], "metadata": hit["payload"]}
+                    for hit in self._vector_search(query, limit, score_threshold, filters)
+                ]
+
+            candidates = max(limit * 4, 20)
+            vector_hits = self._vector_search(query, candidates, score_threshold, filters)
+            lexical_hits = self.lexical.search(query, limit=candidates, filters=filters)
+            # Qdrant, NumpyIndex and the lexical index may format the same UUID differently
+            for hit in vector_hits + lexical_hits:
+                hit["id"] = self._canonical_id(hit["id"])
+            vector_scores = {hit["id"]: hit["score"] for hit in vector_hits}
+            # Keyword-only hits must match a good share of the query, not one common word
+            lexical_hits = [hit for hit in lexical_hits
+                            if hit["id"] in vector_scores or hit["coverage"] >= lexical_min_coverage]
+            lexical_scores = {hit["id"]: hit["score"] for hit in lexical_hits}
+
             results = []
-            for hit in search_result:
+            for point_id, score, hit in rrf_fuse([vector_hits, lexical_hits], k=rrf_k, limit=limit):
                 results.append({
-                    "text": hit.payload.get("text"),
-                    "score": hit.score,
-                    "metadata": hit.payload
+                    "text": hit["payload"].get("text"),
+                    "score": vector_scores.get(point_id),
+                    "rrf_score": score,
+                    "lexical_score": lexical_scores.get(point_id),
+                    "metadata": hit["payload"]
                 })
-            
             return results
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
 
+    def rebuild_lexical_index(self) -> int:
+        """Backfills the keyword index from the vector store (collections created before hybrid search)."""
+        if self.lexical is None:
+            return 0
+        count = 0
+        if self.index is not None:
+            batch = []
+            for point_id, payload in self.index.iter_points():
+                batch.append((point_id, payload.get("text"), payload))
+                if len(batch) >= 500:
+                    self.lexical.add(batch)
+                    count += len(batch)
+                    batch = []
+            self.lexical.add(batch)
+            count += len(batch)
+        else:
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name, limit=500, offset=offset, with_payload=True, with_vectors=False
+                )
+                self.lexical.add((p.id, p.payload.get("text"), p.payload) for p in points)
+                count += len(points)
+                if offset is None:
+                    break
+        logger.info(f"Lexical index rebuilt with {count} memories")
+        return count
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the query-embedding cache."""
+        return self.query_cache.stats()
+
 # Simple CLI test
 if __name__ == "__main__":
     memory = MemoryStore(qdrant_host=os.getenv("QDRANT_HOST", "localhost"))
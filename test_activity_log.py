@@ -0,0 +1,75 @@
+import sys
+import os
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+# Ensure we can import from agent and services
+sys.path.insert(0, os.path.dirname(__file__))
+
+# agent.memory_manager needs the agent's database stack
+for module in ("yaml", "sqlalchemy", "langchain_postgres", "langchain_ollama"):
+    pytest.importorskip(module)
+
+from agent.memory_manager import ActivityLogWriter
+
+class RecordingEngine:
+    """Stands in for a SQLAlchemy engine: records each batch handed to one INSERT."""
+    def __init__(self, gate=None, fail=False):
+        self.batches = []
+        self.gate = gate
+        self.fail = fail
+
+    @contextmanager
+    def begin(self):
+        if self.gate:
+            self.gate.wait(5)
+        yield self
+
+    def execute(self, statement, rows):
+        if self.fail:
+            raise RuntimeError("database down")
+        self.batches.append(list(rows))
+
+def test_rows_are_written_in_batches():
+    engine = RecordingEngine()
+    writer = ActivityLogWriter(engine, batch_size=100, flush_interval=0.05)
+    for i in range(250):
+        assert writer.submit("action", "ok", {"i": i})
+    writer.close()
+    assert sum(len(b) for b in engine.batches) == 250
+    assert max(len(b) for b in engine.batches) <= 100
+    stats = writer.stats()
+    assert stats["written"] == 250
+    assert stats["batches"] == len(engine.batches)
+    assert [row["details"]["i"] for b in engine.batches for row in b] == list(range(250))
+
+def test_close_flushes_and_rejects_new_rows():
+    engine = RecordingEngine()
+    writer = ActivityLogWriter(engine, batch_size=100, flush_interval=60)
+    writer.submit("join", "ok")
+    writer.close()
+    assert len(engine.batches) == 1
+    assert not writer.submit("late", "ok")
+    assert writer.stats()["dropped"] == 1
+
+def test_full_queue_waits_briefly_then_drops():
+    gate = threading.Event()
+    engine = RecordingEngine(gate=gate)
+    writer = ActivityLogWriter(engine, batch_size=1, flush_interval=0.01, max_queue=2, enqueue_timeout=0.01)
+    results = [writer.submit("spam", "ok") for _ in range(20)]
+    gate.set()
+    writer.close()
+    stats = writer.stats()
+    assert stats["dropped"] == results.count(False) > 0
+    assert stats["overflows"] >= stats["dropped"]
+    assert stats["written"] == results.count(True)
+
+def test_failed_batches_are_counted():
+    writer = ActivityLogWriter(RecordingEngine(fail=True), batch_size=10, flush_interval=0.01)
+    for _ in range(3):
+        writer.submit("action", "error")
+    writer.close()
+    assert writer.stats()["failed"] == 3
+    assert writer.stats()["written"] == 0
@@ -0,0 +1,129 @@
+import sys
+import os
+
+import pytest
+
+# runpod_agent modules import each other as `src.*`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "runpod_agent"))
+
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+
+from src.config import config_instance
+from src.browser import BrowserPool
+
+KEY = ("Sink1", "Mic1")
+
+class FakeBrowser:
+    """PooledBrowser stand-in; no Chrome involved."""
+    def __init__(self, key, healthy=True, rss_mb=100, reset_ok=True):
+        self.key = key
+        self.driver = object()
+        self.uses = 0
+        self.baseline_rss_mb = 100
+        self._healthy = healthy
+        self._rss_mb = rss_mb
+        self._reset_ok = reset_ok
+        self.quit_called = False
+
+    def healthy(self):
+        return self._healthy
+
+    def rss_mb(self):
+        return self._rss_mb
+
+    def reset(self):
+        return self._reset_ok
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = BrowserPool()
+    launched = []
+
+    def launch(key):
+        browser = FakeBrowser(key)
+        launched.append(browser)
+        with pool._lock:
+            pool.launches += 1
+        return browser
+
+    monkeypatch.setattr(pool, "_launch", launch)
+    # Refills are asserted explicitly; don't race the test with warm-up threads
+    monkeypatch.setattr(pool, "replenish_async", lambda key: pool.replenished.append(key))
+    pool.replenished = []
+    pool.launched = launched
+    pool.targets[KEY] = 1
+    pool.idle[KEY] = []
+    return pool
+
+def test_acquire_prefers_a_warm_browser(pool):
+    warm = FakeBrowser(KEY)
+    pool.idle[KEY].append(warm)
+    assert pool.acquire(KEY) is warm
+    assert pool.launches == 0
+    assert pool.replenished == [KEY]
+    assert pool.stats()["idle"] == {"Sink1/Mic1": 0}
+
+def test_acquire_launches_cold_when_idle_is_empty(pool):
+    browser = pool.acquire(KEY)
+    assert browser is pool.launched[0]
+    assert pool.launches == 1
+    assert pool.stats()["last_acquire_ms"] is not None
+
+def test_unhealthy_idle_browsers_are_replaced(pool):
+    dead = FakeBrowser(KEY, healthy=False)
+    pool.idle[KEY].append(dead)
+    browser = pool.acquire(KEY)
+    assert dead.quit_called
+    assert browser is pool.launched[0]
+    assert pool.unhealthy == 1
+
+def test_release_returns_a_reset_browser_and_counts_reuse(pool):
+    browser = pool.acquire(KEY)
+    pool.release(browser)
+    assert pool.idle[KEY] == [browser]
+    assert browser.uses == 1
+    assert pool.acquire(KEY) is browser
+    assert pool.reuses == 1
+
+def test_release_recycles_worn_browsers(pool, monkeypatch):
+    monkeypatch.setitem(config_instance.config, "browser_max_uses", 2)
+    browser = pool.acquire(KEY)
+    browser.uses = 1
+    pool.release(browser)
+    assert browser.quit_called
+    assert pool.recycled == 1
+    assert pool.idle[KEY] == []
+
+def test_release_recycles_bloated_browsers(pool, monkeypatch):
+    monkeypatch.setitem(config_instance.config, "browser_max_rss_growth_mb", 800)
+    browser = pool.acquire(KEY)
+    browser._rss_mb = browser.baseline_rss_mb + 900
+    pool.release(browser)
+    assert browser.quit_called
+    assert pool.recycled == 1
+
+def test_release_quits_when_reset_fails_or_pool_is_full(pool):
+    broken = FakeBrowser(KEY, reset_ok=False)
+    pool.release(broken)
+    assert broken.quit_called
+    assert pool.recycled == 0
+
+    pool.idle[KEY].append(FakeBrowser(KEY))
+    extra = FakeBrowser(KEY)
+    pool.release(extra)
+    assert extra.quit_called
+    assert len(pool.idle[KEY]) == 1
+
+def test_drain_quits_idle_browsers_and_stops_refilling(pool):
+    idle = FakeBrowser(KEY)
+    pool.idle[KEY].append(idle)
+    pool.drain(KEY)
+    assert idle.quit_called
+    browser = pool.acquire(KEY)
+    pool.release(browser)
+    assert browser.quit_called
+    assert pool.replenished == []
@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+
+import pytest
+
+# runpod_agent modules import each other as `src.*`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "runpod_agent"))
+
+# src.conversation pulls in the HTTP backends
+pytest.importorskip("requests")
+
+from src.config import config_instance
+config_instance.config["ltm_enabled"] = False # no vector store under /workspace
+
+from src.conversation import Conversation, MEMORY_HEADER, SYSTEM_PROMPT
+
+def conversation_with(turns, words=30):
+    conv = Conversation("test")
+    for i in range(turns):
+        conv.messages.append({"role": "user", "content": f"question {i} " + "word " * words})
+        conv.messages.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return conv
+
+def test_build_keeps_the_prefix_stable():
+    conv = Conversation("test")
+    first = conv.build("hello")
+    conv.commit("hello", "hi there")
+    second = conv.build("how are you", memories="- Alice owns the roadmap")
+    assert second[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert second[:len(first)] == first
+    assert second[-1]["content"].startswith(MEMORY_HEADER)
+    assert second[-1]["content"].endswith("how are you")
+
+def test_commit_stores_the_plain_user_turn():
+    conv = Conversation("test")
+    conv.build("what did we decide?", memories="- ship on Friday\n\n- Bob reviews")
+    conv.commit("what did we decide?", "We ship on Friday.")
+    assert conv.messages == [
+        {"role": "user", "content": "what did we decide?"},
+        {"role": "assistant", "content": "We ship on Friday."},
+    ]
+    # The next request drops the old memories: its prefix ends before that user turn
+    following = conv.build("and who reviews?")
+    assert following[1:] == conv.messages + [{"role": "user", "content": "and who reviews?"}]
+    assert conv.turns == 1
+
+def test_summary_follows_the_system_prompt():
+    conv = Conversation("test")
+    conv.summary = "Alice and Bob planned the launch."
+    messages = conv.build("next?")
+    assert messages[1] == {"role": "system", "content": "Summary of the conversation so far:\nAlice and Bob planned the launch."}
+
+def test_fold_moves_old_turns_into_the_summary(monkeypatch):
+    monkeypatch.setitem(config_instance.config, "chat_keep_tokens", 60)
+    conv = conversation_with(turns=4)
+    folded = []
+    monkeypatch.setattr(conv, "_summarize", lambda previous, messages: folded.extend(messages) or "SUMMARY")
+    latest = conv.messages[-2:]
+    conv._fold()
+    assert conv.summary == "SUMMARY"
+    assert conv.folds == 1
+    assert conv.messages[-2:] == latest
+    assert len(folded) % 2 == 0 and folded[0]["content"].startswith("question 0")
+    assert len(conv.messages) + len(folded) == 8
+    assert not conv._summarizing
+
+def test_fold_always_keeps_the_latest_pair(monkeypatch):
+    monkeypatch.setitem(config_instance.config, "chat_keep_tokens", 0)
+    conv = conversation_with(turns=3)
+    monkeypatch.setattr(conv, "_summarize", lambda previous, messages: "SUMMARY")
+    conv._fold()
+    assert [m["content"].split()[:2] for m in conv.messages] == [["question", "2"], ["answer", "2"]]
+
+def test_failed_summary_drops_the_turns(monkeypatch):
+    monkeypatch.setitem(config_instance.config, "chat_keep_tokens", 0)
+    conv = conversation_with(turns=3)
+    conv.summary = "earlier"
+    monkeypatch.setattr(conv, "_summarize", lambda previous, messages: None)
+    conv._fold()
+    assert conv.summary == "earlier"
+    assert len(conv.messages) == 2
+
+def test_commit_folds_in_the_background_over_budget(monkeypatch):
+    monkeypatch.setitem(config_instance.config, "chat_history_budget", 50)
+    monkeypatch.setitem(config_instance.config, "chat_keep_tokens", 10)
+    conv = conversation_with(turns=2)
+    monkeypatch.setattr(conv, "_summarize", lambda previous, messages: "SUMMARY")
+    conv.commit("one more", "sure", {"prompt_eval_count": 120, "prompt_eval_duration": 5e6})
+    deadline = time.monotonic() + 5
+    while conv.folds == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert conv.folds == 1
+    stats = conv.stats()
+    assert stats["last_turn"]["prompt_tokens"] == 120
+    assert stats["avg_prefill_ms"] == 5.0
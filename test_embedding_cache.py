@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import threading
+
+import numpy as np
+import pytest
+
+# Ensure we can import from services
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.memory.embedding_cache import CachedEncoder, EmbeddingCache
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [np.full(4, len(t), dtype=np.float32) for t in texts]
+
+def test_only_misses_are_computed():
+    cache = EmbeddingCache("test")
+    compute = CountingEncoder()
+    cache.get_many(["alpha", "beta"], compute)
+    vectors = cache.get_many(["beta", "gamma", "gamma"], compute)
+    assert compute.calls == [["alpha", "beta"], ["gamma"]]
+    assert len(vectors) == 3
+    assert cache.stats()["hits"] == 1
+
+def test_case_and_whitespace_share_an_entry():
+    cache = EmbeddingCache("test")
+    compute = CountingEncoder()
+    cache.get_many(["What is  the project?"], compute)
+    cache.get_many(["  what is the PROJECT? "], compute)
+    assert len(compute.calls) == 1
+
+def test_namespaces_are_separate():
+    assert EmbeddingCache("model-a").key("hello") != EmbeddingCache("model-b").key("hello")
+
+def test_lru_bound():
+    cache = EmbeddingCache("test", max_entries=2)
+    compute = CountingEncoder()
+    cache.get_many(["a", "b", "c"], compute)
+    assert cache.stats()["entries"] == 2
+    cache.get_many(["a"], compute)
+    assert compute.calls[-1] == ["a"]
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    EmbeddingCache("test", disk_path=path).get_many(["persisted"], CountingEncoder())
+    restarted = EmbeddingCache("test", disk_path=path)
+    compute = CountingEncoder()
+    vector = restarted.get_many(["persisted"], compute)[0]
+    assert compute.calls == []
+    assert restarted.stats()["disk_hits"] == 1
+    assert np.array_equal(vector, np.full(4, len("persisted"), dtype=np.float32))
+
+def test_concurrent_requests_are_deduplicated():
+    cache = EmbeddingCache("test")
+    started, release = threading.Event(), threading.Event()
+    compute = CountingEncoder()
+
+    def slow(texts):
+        started.set()
+        release.wait(5)
+        return compute(texts)
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_many(["shared"], slow)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get_many(["shared"], slow)))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["deduplicated"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert compute.calls == [["shared"]]
+    assert len(results) == 2
+    assert cache.stats()["deduplicated"] == 1
+
+def test_failures_propagate_and_are_not_cached():
+    cache = EmbeddingCache("test")
+
+    def broken(texts):
+        raise RuntimeError("encoder down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_many(["x"], broken)
+    assert cache.inflight == {}
+    compute = CountingEncoder()
+    cache.get_many(["x"], compute)
+    assert compute.calls == [["x"]]
+
+def test_cached_encoder_matches_sentence_transformers_shapes():
+    class Encoder:
+        dim = 4
+        def encode(self, sentences, **kwargs):
+            return np.ones((len(sentences), 4), dtype=np.float32)
+
+    encoder = CachedEncoder(Encoder(), EmbeddingCache("test"))
+    assert encoder.encode("one").shape == (4,)
+    assert encoder.encode(["one", "two"]).shape == (2, 4)
+    assert encoder.dim == 4
@@ -0,0 +1,92 @@
+import sys
+import os
+
+# runpod_agent modules import each other as `src.*`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "runpod_agent"))
+
+from src.join_state import JoinStateClassifier, page_signature
+
+def page(**overrides):
+    snapshot = {
+        "url": "https://zoom.us/wc/123/join",
+        "text": "",
+        "buttons": [],
+        "aria": [],
+        "name_input": False,
+        "join_button": False,
+        "captcha": False,
+        "footer_buttons": 0,
+    }
+    snapshot.update(overrides)
+    return snapshot
+
+class FakeDriver:
+    """Returns the queued probe results in order, repeating the last one."""
+    def __init__(self, pages):
+        self.pages = list(pages)
+
+    def execute_script(self, script):
+        return self.pages.pop(0) if len(self.pages) > 1 else self.pages[0]
+
+def action(p):
+    decision = JoinStateClassifier().match(p)
+    return decision[0] if decision else None
+
+def test_match_join_flow_screens():
+    assert action(page(buttons=["launch meeting"])) == "CLICK_LAUNCH"
+    assert action(page(name_input=True, join_button=True, buttons=["join"])) == "ENTER_NAME"
+    assert action(page(name_input=True, text="please enter your name")) == "ENTER_NAME"
+    assert action(page(buttons=["join audio by computer"])) == "CLICK_JOIN_AUDIO"
+    assert action(page(aria=["mute my microphone"], buttons=["leave"])) == "END_SUCCESS"
+    assert action(page(captcha=True)) == "SOLVE_CAPTCHA"
+
+def test_match_rule_order():
+    # In the meeting but audio not joined yet: the audio prompt wins
+    assert action(page(buttons=["leave", "join audio"], footer_buttons=5)) == "CLICK_JOIN_AUDIO"
+    # An ended banner wins over anything still on screen
+    assert action(page(text="the host has ended this meeting", buttons=["leave"])) == "MEETING_ENDED"
+
+def test_preview_mute_toggles_are_not_in_meeting():
+    preview = dict(aria=["mute", "start video"], buttons=["mute", "start video", "join"])
+    assert action(page(join_button=True, **preview)) != "END_SUCCESS"
+    assert action(page(name_input=True, join_button=True, **preview)) == "ENTER_NAME"
+    # Name already filled in, no join button class: still not proof of being inside
+    assert action(page(**preview)) is None
+    assert action(page(footer_buttons=2, **preview)) == "END_SUCCESS"
+
+def test_match_falls_back_to_vision():
+    classifier = JoinStateClassifier()
+    assert classifier.match(None) is None
+    assert classifier.match(page(buttons=["something else"])) is None
+    # A broken probe (missing keys) must not raise
+    assert classifier.match({"url": "about:blank"}) is None
+
+def test_classify_counts_rule_coverage():
+    classifier = JoinStateClassifier()
+    classifier.classify(FakeDriver([page(buttons=["launch meeting"])]))
+    classifier.classify(FakeDriver([page()]))
+    stats = classifier.stats()
+    assert stats["counts"]["launch_page"] == 1
+    assert stats["counts"]["vision_fallback"] == 1
+    assert stats["rule_coverage"] == 0.5
+
+def test_wait_for_change_settles_on_the_new_screen():
+    before, after = page(buttons=["launch meeting"]), page(name_input=True, join_button=True)
+    driver = FakeDriver([before, before, after])
+    latest, changed = JoinStateClassifier().wait_for_change(
+        driver, page_signature(before), timeout=2.0, poll=0.01, quiet=0.05)
+    assert changed
+    assert page_signature(latest) == page_signature(after)
+
+def test_wait_for_change_times_out_on_a_static_page():
+    before = page(buttons=["launch meeting"])
+    latest, changed = JoinStateClassifier().wait_for_change(
+        FakeDriver([before]), page_signature(before), timeout=0.1, poll=0.01, quiet=0.05)
+    assert not changed
+
+def test_wait_for_quiet():
+    a, b = page(buttons=["a"]), page(buttons=["b"])
+    latest, settled = JoinStateClassifier().wait_for_quiet(
+        FakeDriver([a, b, b]), timeout=2.0, poll=0.01, quiet=0.05)
+    assert settled
+    assert page_signature(latest) == page_signature(b)
@@ -0,0 +1,127 @@
+import re
+import sys
+import os
+import zlib
+import sqlite3
+
+import numpy as np
+import pytest
+
+# Ensure we can import from services
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.memory.lexical_index import LexicalIndex, filter_sql, rrf_fuse
+
+def test_filter_sql():
+    assert filter_sql(None) == ("", [])
+    where, params = filter_sql({"project": "Apollo", "type": ["config", "secret"], "timestamp": {"gte": 10, "lt": 20}})
+    assert where == ("json_extract(payload, '$.project') = ? AND "
+                     "json_extract(payload, '$.type') IN (?,?) AND "
+                     "json_extract(payload, '$.timestamp') >= ? AND "
+                     "json_extract(payload, '$.timestamp') < ?")
+    assert params == ["Apollo", "config", "secret", 10, 20]
+
+def test_filter_sql_rejects_injected_fields():
+    with pytest.raises(ValueError):
+        filter_sql({"x') OR 1=1 --": 1})
+
+def test_search_finds_exact_tokens_and_filters(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add([
+        ("1", "The server IP address is 192.168.1.50.", {"type": "config"}),
+        ("2", "The project code name is Project Apollo.", {"type": "project"}),
+        ("3", "Ticket ABC-1234 is blocked on review.", {"type": "ticket"}),
+    ])
+    assert [h["id"] for h in index.search("192.168.1.50")][0] == "1"
+    assert [h["id"] for h in index.search("abc-1234")][0] == "3"
+    assert index.search("apollo", filters={"type": "config"}) == []
+    assert index.search("?!") == []
+
+def test_add_replaces_and_delete_removes(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add([("1", "old text", {})])
+    index.add([("1", "new text", {"v": 2})])
+    assert index.count() == 1
+    assert index.search("old") == []
+    assert index.search("new")[0]["payload"] == {"v": 2}
+    index.delete(["1"])
+    assert index.count() == 0
+
+def test_rrf_fuse_rewards_agreement():
+    vector = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    lexical = [{"id": "c"}, {"id": "d"}]
+    fused = rrf_fuse([vector, lexical], k=60, limit=3)
+    ids = [pid for pid, _, _ in fused]
+    assert ids[:2] == ["c", "a"] # c is ranked by both lists
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+def test_rrf_fuse_keeps_the_first_hit_seen():
+    fused = rrf_fuse([[{"id": "a", "payload": {"from": "vector"}}], [{"id": "a", "payload": {"from": "lexical"}}]])
+    assert fused == [("a", pytest.approx(2 / 61), {"id": "a", "payload": {"from": "vector"}})]
+
+def test_stopwords_are_not_matched(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add([("1", "What is the plan for the launch?", {}), ("2", "The deadline is Friday.", {})])
+    assert LexicalIndex.match_query("what is the") is None
+    assert [h["id"] for h in index.search("what is the deadline")] == ["2"]
+
+def test_hits_report_term_coverage(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add([("1", "server IP changed", {}), ("2", "server room is cold", {})])
+    coverage = {h["id"]: h["coverage"] for h in index.search("server IP")}
+    assert coverage == {"1": 1.0, "2": 0.5}
+
+def test_duplicate_ids_in_one_add_keep_the_last(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add([("1", "first", {}), ("1", "second", {})])
+    assert index.count() == 1
+    assert index.search("first") == []
+
+def test_opens_indexes_written_without_the_ids_table(tmp_path):
+    path = str(tmp_path / "lexical.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE VIRTUAL TABLE docs USING fts5(point_id UNINDEXED, text, payload UNINDEXED)")
+        conn.execute("INSERT INTO docs VALUES ('1', 'legacy row', '{}')")
+    index = LexicalIndex(path)
+    index.add([("1", "fresh row", {})])
+    assert index.count() == 1
+    assert [h["id"] for h in index.search("fresh")] == ["1"]
+
+class HashingEncoder:
+    """Bag-of-words vectors: texts sharing words are similar, no model download."""
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        out = []
+        for text in [sentences] if single else sentences:
+            vector = np.zeros(384, dtype=np.float32)
+            for token in re.findall(r"\w+", text.lower()):
+                vector[zlib.crc32(token.encode()) % 384] += 1.0
+            out.append(vector / max(np.linalg.norm(vector), 1e-6))
+        return out[0] if single else np.stack(out)
+
+@pytest.fixture
+def store(tmp_path):
+    from services.memory.store import MemoryStore
+    store = MemoryStore(backend="numpy", local_path=str(tmp_path), payload_indexes=())
+    store.encoder._encoder = HashingEncoder()
+    store.add_memory("The project code name is Project Apollo.", {"type": "project"})
+    store.add_memory("The server IP address is 192.168.1.50.", {"type": "config"})
+    store.add_memory("What is the plan for the launch party?", {"type": "social"})
+    return store
+
+def test_vector_mode_is_the_default(store):
+    results = store.search_memory("project code name", score_threshold=0.1)
+    assert results[0]["text"].startswith("The project code name")
+    assert "rrf_score" not in results[0]
+    assert 0 < results[0]["score"] <= 1.0
+
+def test_hybrid_keeps_cosine_in_score(store):
+    results = store.search_memory("192.168.1.50", score_threshold=0.99, mode="hybrid")
+    assert results[0]["text"] == "The server IP address is 192.168.1.50."
+    assert results[0]["score"] is None # keyword-only hit
+    assert results[0]["rrf_score"] > 0
+
+def test_hybrid_drops_weak_keyword_only_hits(store):
+    # Only "party" overlaps with the launch chunk: 1 of 3 terms, below the coverage bar
+    results = store.search_memory("what is the party budget deadline", score_threshold=0.99, mode="hybrid")
+    assert results == []
@@ -0,0 +1,81 @@
+import sys
+import os
+
+import numpy as np
+
+# Ensure we can import from services
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.memory.numpy_index import NumpyIndex
+
+DIM = 384
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+
+def test_search_ranks_by_cosine(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM)
+    vecs = vectors(20)
+    index.upsert(range(20), vecs, [{"n": i} for i in range(20)])
+    hits = index.search(vecs[7] * 3.0, limit=3) # scale must not matter
+    assert hits[0]["id"] == "7"
+    assert hits[0]["payload"] == {"n": 7}
+    assert abs(hits[0]["score"] - 1.0) < 1e-4
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+
+def test_upsert_replaces_existing_ids(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM)
+    vecs = vectors(3)
+    index.upsert(["a", "b"], vecs[:2], [{"v": 1}, {"v": 1}])
+    index.upsert(["a"], vecs[2:], [{"v": 2}])
+    assert len(index) == 2
+    hit = index.search(vecs[2], limit=1)[0]
+    assert (hit["id"], hit["payload"]) == ("a", {"v": 2})
+    assert all(h["id"] != "a" or h["payload"]["v"] == 2 for h in index.search(vecs[0], limit=5))
+
+def test_duplicate_ids_in_one_batch_keep_the_last(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM)
+    vecs = vectors(3)
+    index.upsert(["x", "y", "x"], vecs, [{"v": 1}, {"v": 1}, {"v": 2}])
+    assert len(index) == 2
+    assert dict(index.iter_points())["x"] == {"v": 2}
+
+def test_delete_compact_and_reopen(tmp_path):
+    path = str(tmp_path / "idx")
+    index = NumpyIndex(path, dim=DIM)
+    vecs = vectors(5)
+    index.upsert(range(5), vecs, [{"n": i} for i in range(5)])
+    assert index.delete([1, 3]) == 2
+    assert len(index) == 3
+    index.compact()
+    assert index.count == 3
+
+    reopened = NumpyIndex(path, dim=DIM)
+    assert len(reopened) == 3
+    assert reopened.search(vecs[4], limit=1)[0]["id"] == "4"
+    assert "1" not in {h["id"] for h in reopened.search(vecs[1], limit=5)}
+
+def test_filter_mask_and_threshold(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM)
+    vecs = vectors(6)
+    index.upsert(range(6), vecs, [{"team": "a" if i % 2 else "b"} for i in range(6)])
+    hits = index.search(vecs[0], limit=6, mask=index.filter_mask({"team": "a"}))
+    assert {h["id"] for h in hits} == {"1", "3", "5"}
+    assert [h["id"] for h in index.search(vecs[0], limit=6, score_threshold=0.99)] == ["0"]
+
+def test_quantized_index_keeps_the_ranking(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM, quantize=True)
+    vecs = vectors(50, seed=1)
+    index.upsert(range(50), vecs, [{} for _ in range(50)])
+    for i in (0, 17, 49):
+        hit = index.search(vecs[i], limit=1)[0]
+        assert hit["id"] == str(i)
+        assert hit["score"] > 0.98
+
+def test_grows_past_initial_capacity(tmp_path):
+    index = NumpyIndex(str(tmp_path / "idx"), dim=DIM)
+    n = NumpyIndex.MIN_CAPACITY + 10
+    vecs = vectors(n)
+    index.upsert(range(n), vecs, [{} for _ in range(n)])
+    assert len(index) == n
+    assert index.search(vecs[-1], limit=1)[0]["id"] == str(n - 1)
@@ -0,0 +1,41 @@
+import sys
+import os
+
+import pytest
+
+# runpod_agent modules import each other as `src.*`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "runpod_agent"))
+
+# src.pipeline pulls in the TTS manager and its HTTP backends
+pytest.importorskip("requests")
+pytest.importorskip("gtts")
+
+from src.pipeline import SentenceChunker
+
+def feed_all(chunker, tokens):
+    sentences = []
+    for token in tokens:
+        sentences.extend(chunker.feed(token))
+    return sentences
+
+def test_cuts_at_sentence_boundaries():
+    chunker = SentenceChunker()
+    tokens = ["Hello every", "one, thanks for ", "joining. How ", "is the project going? ", "Good"]
+    assert feed_all(chunker, tokens) == ["Hello everyone, thanks for joining.", "How is the project going?"]
+    assert chunker.flush() == "Good"
+    assert chunker.flush() is None
+
+def test_holds_short_fragments_back():
+    chunker = SentenceChunker(min_chars=12)
+    assert chunker.feed("Ok. ") == []
+    assert chunker.feed("Dr. Smith is here. ") == ["Ok. Dr. Smith is here."]
+
+def test_line_breaks_and_closing_quotes_end_a_sentence():
+    chunker = SentenceChunker()
+    assert chunker.feed('She said "we ship on Friday." Then we rest\n') == ['She said "we ship on Friday."', "Then we rest"]
+
+def test_no_boundary_until_whitespace_follows():
+    chunker = SentenceChunker()
+    # "3.5" must not be cut: the dot is not followed by whitespace
+    assert chunker.feed("The version is 3.5") == []
+    assert chunker.feed(" and it works. ") == ["The version is 3.5 and it works."]
@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+
+import numpy as np
+
+# runpod_agent modules import each other as `src.*`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "runpod_agent"))
+
+from src.vision import DecisionCache, FrameTracker, join_scope
+
+SCOPE = "zoom.us/wc/#/join"
+LAUNCH = ["CLICK_LAUNCH", "Launch button visible", "I see the launch button."]
+
+def test_frame_tracker_needs_a_previous_decision():
+    tracker = FrameTracker()
+    thumb = np.zeros((36, 64), dtype=np.float32)
+    assert not tracker.unchanged(thumb)
+    tracker.remember(thumb, LAUNCH)
+    assert tracker.unchanged(thumb.copy())
+
+def test_frame_tracker_sees_small_local_changes():
+    tracker = FrameTracker(diff_threshold=0.5, max_pixel_diff=12)
+    thumb = np.zeros((36, 64), dtype=np.float32)
+    tracker.remember(thumb, LAUNCH)
+    icon = thumb.copy()
+    icon[10, 10] = 200 # mean diff stays tiny, one pixel moved a lot
+    assert not tracker.unchanged(icon)
+    assert not tracker.unchanged(np.zeros((8, 9), dtype=np.float32))
+
+def test_join_scope_masks_meeting_ids():
+    assert join_scope("https://us05web.zoom.us/wc/84512345678/join?pwd=abc") == "us05web.zoom.us/wc/#/join"
+    assert join_scope("https://Zoom.us/j/123#success") == "zoom.us/j/#"
+    assert join_scope(None) == ""
+
+def test_decision_cache_lookup_is_scoped_and_bounded(tmp_path):
+    cache = DecisionCache(path=str(tmp_path / "cache.json"), max_distance=2)
+    dhash = 0b1011_0000
+    cache.store(SCOPE, dhash, LAUNCH)
+    assert cache.lookup(SCOPE, dhash) == LAUNCH
+    assert cache.lookup(SCOPE, dhash ^ 0b11) == LAUNCH # 2 bits away
+    assert cache.lookup(SCOPE, dhash ^ 0b111) is None # 3 bits away
+    assert cache.lookup("app.zoom.us/wc/#/leave", dhash) is None
+
+def test_decision_cache_skips_in_meeting_states(tmp_path):
+    cache = DecisionCache(path=str(tmp_path / "cache.json"))
+    cache.store(SCOPE, 1, ["END_SUCCESS", "In the meeting", None])
+    cache.store(SCOPE, 2, ["MEETING_ENDED", "Ended banner", None])
+    assert cache.lookup(SCOPE, 1) is None
+    assert cache.stats()["entries"] == 0
+
+def test_decision_cache_persists_and_drops_unscoped_entries(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = DecisionCache(path=path)
+    cache.store(SCOPE, 42, LAUNCH)
+
+    with open(path) as f:
+        raw = json.load(f)
+    raw["7"] = LAUNCH # pre-scope format
+    with open(path, "w") as f:
+        json.dump(raw, f)
+
+    reloaded = DecisionCache(path=path)
+    assert reloaded.lookup(SCOPE, 42) == LAUNCH
+    assert reloaded.stats()["entries"] == 1
+
+def test_decision_cache_evicts_oldest(tmp_path):
+    cache = DecisionCache(path=str(tmp_path / "cache.json"), max_distance=0, max_entries=2)
+    for dhash in (1, 2, 3):
+        cache.store(SCOPE, dhash, LAUNCH)
+    assert cache.lookup(SCOPE, 1) is None
+    assert cache.lookup(SCOPE, 3) == LAUNCH
+
+def test_decision_cache_stats():
+    cache = DecisionCache(path=os.devnull)
+    for source in ("model", "unchanged", "cached", "cached"):
+        cache.record(source)
+    stats = cache.stats()
+    assert stats["model_calls"] == 1
+    assert stats["avoided_ratio"] == 0.75